@@ -86,10 +86,10 @@ async def boot():
                         await first_boot_provision()
                         import provision
                         mid = getattr(settings, 'MACHINE_ID', None)
-                        prov = provision.fetch_provisioning(unit_id=getattr(settings, 'UNIT_ID', None), machine_id=mid, base_url=getattr(settings, 'TMON_ADMIN_API_URL', None))
+                        prov = await provision.fetch_provisioning(unit_id=getattr(settings, 'UNIT_ID', None), machine_id=mid, base_url=getattr(settings, 'TMON_ADMIN_API_URL', None))
                         if isinstance(prov, dict) and prov:
                             try:
-                                provision.apply_settings(prov)
+                                await provision.apply_settings(prov)
                             except Exception as e:
                                 await log_exception('boot.apply_settings', e)
                     except Exception as e:
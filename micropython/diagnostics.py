@@ -28,10 +28,10 @@ def _backlog_size():
             path = get_log_dir().rstrip('/') + '/field_data_backlog.log'
         except Exception:
             pass
-        with open(path, 'r') as f:
-            n = 0
-            for _ in f:
-                n += 1
+        import field_journal
+        n = 0
+        for _ in field_journal.iter_records(path):
+            n += 1
         return n
     except Exception:
         return 0
@@ -93,13 +93,93 @@ def get_lora_health():
         'missed_syncs': max_missed,
         'remote_nodes': remote_count,
         'last_heartbeat_ts': latest_hb,
+        'rx': _lora_rx_stats(),
+        'slots': _lora_slot_stats(),
+        'sessions': _lora_session_stats(),
+        'node_info': _lora_node_info_stats(),
+        'counters': _lora_counter_stats(),
+        'airtime': _lora_airtime_stats(),
     }
 
 
+def _lora_rx_stats():
+    try:
+        import lora
+        return lora.get_rx_stats()
+    except Exception:
+        return {}
+
+
+def _lora_slot_stats():
+    try:
+        import lora
+        return lora.get_slot_stats()
+    except Exception:
+        return {}
+
+
+def _lora_session_stats():
+    try:
+        import lora
+        return lora.get_session_stats()
+    except Exception:
+        return {}
+
+
+def _lora_node_info_stats():
+    try:
+        import lora
+        return lora.get_node_info_stats()
+    except Exception:
+        return {}
+
+
+def _lora_counter_stats():
+    try:
+        import lora
+        return lora.get_counter_stats()
+    except Exception:
+        return {}
+
+
+def _lora_airtime_stats():
+    try:
+        import lora
+        return lora.get_airtime_stats()
+    except Exception:
+        return {}
+
+
+def _journal_stats():
+    try:
+        import field_journal
+        return field_journal.get_stats()
+    except Exception:
+        return {}
+
+
+def _http_pool_stats():
+    try:
+        import http_client
+        return http_client.get_stats()
+    except Exception:
+        return {}
+
+
 def get_transmission_stats():
+    journal = _journal_stats()
     return {
         'backlog_size': _backlog_size(),
         'last_successful_upload': _last_upload_ts(),
+        'pending_bytes': int(journal.get('pending_bytes', 0) or 0),
+        'pending_segments': int(journal.get('segments', 0) or 0),
+        'dropped_bytes': int(journal.get('dropped_bytes', 0) or 0),
+        'pending_lanes': journal.get('lanes', {}),
+        'evicted_records': int(journal.get('evicted_records', 0) or 0),
+        'evicted_segments': int(journal.get('evicted_segments', 0) or 0),
+        'retired_segments': int(journal.get('retired_segments', 0) or 0),
+        'downsampled_records': int(journal.get('downsampled_records', 0) or 0),
+        'http_pool': _http_pool_stats(),
     }
 
 
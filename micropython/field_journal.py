@@ -0,0 +1,816 @@
+# TMON field-data journal: append-only segments with a persisted delivered cursor.
+#
+# The active segment is FIELD_DATA_LOG. Once it reaches FIELD_DATA_SEGMENT_BYTES it is
+# sealed by renaming it to '<base>.<seq>.seg'. A small cursor file '<base>.cursor.json'
+# records the oldest pending segment ('tail'), the byte offset delivered inside it ('off'),
+# and any spans delivered out of order ('done'). Uploads resume from the cursor, partial
+# success advances it, and fully delivered segments are retired by rename into the
+# DATA_HISTORY_LOG rotation chain instead of being copied line by line. Segments evicted by
+# the byte budget were never delivered; they are deleted, not archived as history.
+#
+# Segments hold a mix of legacy JSON lines and binary frames (FIELD_DATA_BINARY):
+#   0x01 <u16 len> <schema JSON>   column keys, column types, and constant meta
+#   0x02 <u16 len> <record body>   null bitmap, zero bitmap, packed non-zero values, JSON extras
+# A record frame is decoded with the most recent schema frame earlier in the same segment,
+# and comes back out of iter_records in the same dict shape record_field_data produced.
+
+try:
+    import ujson
+except Exception:
+    import json as ujson
+
+try:
+    import uos as os
+except Exception:
+    import os
+
+try:
+    import ustruct as struct
+except Exception:
+    import struct
+
+try:
+    import utime as time
+except Exception:
+    import time
+
+import settings
+from config_persist import read_json, write_json_atomic
+
+_FRAME_SCHEMA = 0x01
+_FRAME_RECORD = 0x02
+
+# Envelope keys that are constant for a device; stored once per schema frame.
+_META_KEYS = ('unit_id', 'machine_id', 'firmware_version', 'NODE_TYPE')
+
+# Column codes: f=float32, i=int32, ?=bool, s=short utf-8 string, x=JSON extras only.
+_ZERO = {'f': 0.0, 'i': 0, '?': False, 's': '', 'x': None}
+
+# Upper bound on out-of-order delivered spans kept in the cursor file.
+_DONE_MAX = 64
+
+# Priority lanes in drain order. Each lane is its own journal (segments + cursor file);
+# 'normal' is FIELD_DATA_LOG itself and the others sit beside it as field_data.<lane>.log.
+LANES = ('frost', 'watch', 'relay', 'normal')
+
+# Budget eviction order; 'backlog' is the legacy payload journal. 'frost' is only evicted
+# beyond its own FIELD_DATA_FROST_MAX_BYTES, or as a last resort (see enforce_budget).
+EVICT_ORDER = ('normal', 'backlog', 'relay', 'watch')
+
+_states = {}
+
+# Active-file writer state per journal path: [schema, column index, file size after last write].
+_writers = {}
+
+
+def _base(path):
+    if path.endswith('.log'):
+        return path[:-4]
+    return path
+
+
+def _cursor_path(path):
+    return _base(path) + '.cursor.json'
+
+
+def _seg_path(path, seq):
+    return '%s.%d.seg' % (_base(path), seq)
+
+
+def _file_size(path):
+    try:
+        return os.stat(path)[6]
+    except Exception:
+        return -1
+
+
+def _active_path(path=None):
+    return path or settings.FIELD_DATA_LOG
+
+
+def lane_path(lane, path=None):
+    path = _active_path(path)
+    if lane == 'normal':
+        return path
+    return '%s.%s.log' % (_base(path), lane)
+
+
+def lane_paths(path=None):
+    return [lane_path(lane, path) for lane in LANES]
+
+
+def backlog_path():
+    # Same location utils uses for FIELD_DATA_BACKLOG (settings.LOG_DIR follows the SD card).
+    return settings.LOG_DIR.rstrip('/') + '/field_data_backlog.log'
+
+
+def _path_for(path, st, seq):
+    if seq >= st['head']:
+        return path
+    return _seg_path(path, seq)
+
+
+def _load(path):
+    st = _states.get(path)
+    if st is not None:
+        return st
+    raw = read_json(_cursor_path(path), None)
+    st = {'head': 0, 'tail': 0, 'off': 0, 'low': 0, 'done': [], 'dropped': 0, 'evicted': 0, 'thinned': 0,
+          'retired': 0, 'evsegs': 0, 'ds': []}
+    if isinstance(raw, dict):
+        for k in ('head', 'tail', 'off', 'low', 'dropped', 'evicted', 'thinned', 'retired', 'evsegs'):
+            try:
+                st[k] = int(raw.get(k, st[k]) or 0)
+            except Exception:
+                pass
+        try:
+            st['done'] = [[int(d[0]), int(d[1]), int(d[2])] for d in (raw.get('done') or [])]
+        except Exception:
+            st['done'] = []
+        try:
+            st['ds'] = [int(x) for x in (raw.get('ds') or [])]
+        except Exception:
+            st['ds'] = []
+    # A seal that renamed the active file but crashed before saving leaves seg(head) behind.
+    changed = False
+    while _file_size(_seg_path(path, st['head'])) >= 0:
+        st['head'] += 1
+        changed = True
+    if st['tail'] > st['head']:
+        st['tail'] = st['head']
+        st['off'] = 0
+        changed = True
+    _states[path] = st
+    if changed:
+        _save(path)
+    return st
+
+
+def _save(path):
+    st = _states.get(path)
+    if st is None:
+        return False
+    return write_json_atomic(_cursor_path(path), st)
+
+
+def _decode_line(line):
+    """Return the record dict for one JSON journal line, or None for junk/partial lines."""
+    try:
+        if not line or line[-1:] != b'\n':
+            return None
+        text = line.decode('utf-8', 'ignore').strip()
+        if not text or text[0] != '{':
+            return None
+        obj = ujson.loads(text)
+        return obj if isinstance(obj, dict) else None
+    except Exception:
+        return None
+
+
+def _read_frame(f, want_body=True):
+    """Read one JSON line or binary frame: (nbytes, kind, data, complete); nbytes 0 at EOF."""
+    first = f.read(1)
+    if not first:
+        return 0, None, None, True
+    kind = first[0]
+    if kind == _FRAME_SCHEMA or kind == _FRAME_RECORD:
+        hdr = f.read(2)
+        if len(hdr) < 2:
+            return 1 + len(hdr), None, None, False
+        n = hdr[0] | (hdr[1] << 8)
+        if want_body or kind == _FRAME_SCHEMA:
+            body = f.read(n)
+            return 3 + len(body), kind, body, len(body) == n
+        here = f.tell()
+        f.seek(here + n)
+        return 3 + n, kind, None, True
+    line = first + f.readline()
+    return len(line), 'j', line, line[-1:] == b'\n'
+
+
+def _load_schema(body):
+    try:
+        sc = ujson.loads(body)
+        if isinstance(sc, dict) and isinstance(sc.get('k'), list):
+            return sc
+    except Exception:
+        pass
+    return None
+
+
+def _epoch_offset():
+    try:
+        if hasattr(time, 'gmtime') and time.gmtime(0)[0] >= 2000:
+            return 946684800
+    except Exception:
+        pass
+    return 0
+
+
+def _decode_record(body, sc):
+    keys = sc['k']
+    types = sc['t']
+    n = len(keys)
+    nb = (n + 7) >> 3
+    pos = nb + nb
+    rec = {}
+    for i in range(n):
+        t = types[i]
+        bit = 1 << (i & 7)
+        if body[i >> 3] & bit or t == 'x':
+            rec[keys[i]] = None
+            continue
+        if body[nb + (i >> 3)] & bit:
+            rec[keys[i]] = _ZERO[t]
+            continue
+        if t == 's':
+            ln = body[pos]
+            rec[keys[i]] = bytes(body[pos + 1:pos + 1 + ln]).decode('utf-8', 'ignore')
+            pos += 1 + ln
+        elif t == 'f':
+            rec[keys[i]] = struct.unpack_from('<f', body, pos)[0]
+            pos += 4
+        elif t == 'i':
+            rec[keys[i]] = struct.unpack_from('<i', body, pos)[0]
+            pos += 4
+        else:
+            rec[keys[i]] = bool(body[pos])
+            pos += 1
+    if pos < len(body):
+        extras = ujson.loads(bytes(body[pos:]))
+        if isinstance(extras, dict):
+            rec.update(extras)
+    meta = sc.get('m') or {}
+    for k in meta:
+        rec[k] = meta[k]
+    ts = rec.get('timestamp')
+    if sc.get('iso') and isinstance(ts, int) and 'ts_iso' not in rec:
+        try:
+            lt = time.localtime(ts - _epoch_offset())
+            rec['ts_iso'] = '%04d-%02d-%02d %02d:%02d:%02d' % lt[:6]
+        except Exception:
+            pass
+    return rec
+
+
+def _decode_frame(kind, data, sc):
+    """Return the record dict for a complete JSON line or record frame, else None."""
+    try:
+        if kind == 'j':
+            return _decode_line(data)
+        if kind == _FRAME_RECORD and sc is not None:
+            return _decode_record(data, sc)
+    except Exception:
+        pass
+    return None
+
+
+def _scan_schema(f, start, end, sc):
+    """Return the last schema frame found between start and end (record bodies are skipped)."""
+    f.seek(start)
+    pos = start
+    while pos < end:
+        nbytes, kind, data, complete = _read_frame(f, want_body=False)
+        if not nbytes or not complete:
+            break
+        pos += nbytes
+        if kind == _FRAME_SCHEMA:
+            sc = _load_schema(data) or sc
+    f.seek(end)
+    return sc
+
+
+def _has_records_from(p, off):
+    try:
+        with open(p, 'rb') as f:
+            sc = _scan_schema(f, 0, off, None) if off else None
+            while True:
+                nbytes, kind, data, complete = _read_frame(f)
+                if not nbytes:
+                    return False
+                if not complete:
+                    continue
+                if kind == _FRAME_SCHEMA:
+                    sc = _load_schema(data) or sc
+                elif _decode_frame(kind, data, sc) is not None:
+                    return True
+    except Exception:
+        return False
+
+
+def add_span(spans, seq, start, end):
+    """Append (seq, start, end) to spans, merging with the previous span when contiguous."""
+    if spans:
+        last = spans[-1]
+        if last[0] == seq and last[2] == start:
+            spans[-1] = (seq, last[1], end)
+            return spans
+    spans.append((seq, start, end))
+    return spans
+
+
+def _advance(path, st):
+    """Move the cursor over delivered spans and past exhausted sealed segments."""
+    while True:
+        seq = st['tail']
+        off = st['off']
+        keep = []
+        for d in sorted(st['done']):
+            if d[0] < seq or (d[0] == seq and d[2] <= off):
+                continue
+            if d[0] == seq and d[1] <= off:
+                off = d[2]
+                continue
+            keep.append(d)
+        st['done'] = keep
+        st['off'] = off
+        if seq >= st['head']:
+            break
+        p = _seg_path(path, seq)
+        size = _file_size(p)
+        if size < 0 or off >= size or not _has_records_from(p, off):
+            st['tail'] = seq + 1
+            st['off'] = 0
+            continue
+        break
+    if len(st['done']) > _DONE_MAX:
+        # Keep the newest spans; the oldest ones are simply resent (at-least-once delivery).
+        st['done'] = st['done'][-_DONE_MAX:]
+
+
+def retire(path=None):
+    """Rename sealed segments behind the cursor into the DATA_HISTORY_LOG rotation chain.
+
+    Sealed segments are retired by rename only. Backlog segments are deleted instead, and
+    evicted segments are already gone (_evict_oldest deletes them), so only delivered data
+    reaches the history chain; 'retired' counts those segments.
+    """
+    path = _active_path(path)
+    st = _load(path)
+    moved = 0
+    try:
+        from log_rotate import archive_file
+    except Exception:
+        archive_file = None
+    history = getattr(settings, 'DATA_HISTORY_LOG', None)
+    if path == backlog_path():
+        # Backlog segments hold upload payloads, not samples; they are not history.
+        history = None
+    max_rot = int(getattr(settings, 'LOG_MAX_ROTATIONS', 3))
+    while st['low'] < st['tail']:
+        p = _seg_path(path, st['low'])
+        if _file_size(p) >= 0:
+            ok = False
+            if archive_file and history:
+                ok = archive_file(p, history, max_rot)
+            if not ok:
+                try:
+                    os.remove(p)
+                except Exception:
+                    pass
+            moved += 1
+        st['low'] += 1
+    if moved:
+        st['retired'] += moved
+        _save(path)
+    return moved
+
+
+def _column_type(v):
+    if isinstance(v, bool):
+        return '?'
+    if isinstance(v, int):
+        return 'i'
+    if isinstance(v, float):
+        return 'f'
+    if isinstance(v, str):
+        return 's'
+    return 'x'
+
+
+def _pack_value(t, v):
+    """Pack v for column type t, or return None when it does not fit (goes to extras)."""
+    try:
+        if t == 'f' and isinstance(v, (int, float)) and not isinstance(v, bool):
+            return struct.pack('<f', v)
+        if t == 'i' and isinstance(v, int) and not isinstance(v, bool) and -0x80000000 <= v <= 0x7fffffff:
+            return struct.pack('<i', v)
+        if t == '?' and isinstance(v, bool):
+            return b'\x01' if v else b'\x00'
+        if t == 's' and isinstance(v, str):
+            raw = v.encode('utf-8')
+            if len(raw) <= 255:
+                return bytes((len(raw),)) + raw
+    except Exception:
+        pass
+    return None
+
+
+def _frame(kind, body):
+    n = len(body)
+    return bytes((kind, n & 0xff, (n >> 8) & 0xff)) + body
+
+
+def _schema_for(entry):
+    meta = {}
+    keys = []
+    types = ''
+    for k in entry:
+        v = entry[k]
+        if k in _META_KEYS and isinstance(v, str):
+            meta[k] = v
+            continue
+        if k == 'ts_iso' and isinstance(entry.get('timestamp'), int):
+            continue
+        keys.append(k)
+        types += _column_type(v)
+    sc = {'k': keys, 't': types, 'm': meta}
+    if 'ts_iso' in entry and isinstance(entry.get('timestamp'), int):
+        sc['iso'] = 1
+    return sc
+
+
+def _schema_fits(sc, index, entry):
+    meta = sc['m']
+    for k in entry:
+        if k in index:
+            continue
+        if k in meta and entry[k] == meta[k]:
+            continue
+        if k == 'ts_iso' and sc.get('iso'):
+            continue
+        return False
+    return True
+
+
+def _encode_record(entry, sc):
+    keys = sc['k']
+    types = sc['t']
+    nb = (len(keys) + 7) >> 3
+    nulls = bytearray(nb)
+    zeros = bytearray(nb)
+    parts = [b'', b'']
+    extras = None
+    for i in range(len(keys)):
+        k = keys[i]
+        t = types[i]
+        v = entry.get(k)
+        packed = None
+        if v is not None and t != 'x':
+            if v == _ZERO[t] and type(v) is type(_ZERO[t]):
+                zeros[i >> 3] |= 1 << (i & 7)
+                continue
+            packed = _pack_value(t, v)
+        if packed is None:
+            nulls[i >> 3] |= 1 << (i & 7)
+            if v is not None:
+                if extras is None:
+                    extras = {}
+                extras[k] = v
+        else:
+            parts.append(packed)
+    parts[0] = bytes(nulls)
+    parts[1] = bytes(zeros)
+    if extras:
+        parts.append(ujson.dumps(extras).encode())
+    return b''.join(parts)
+
+
+def append(entry, path=None, packed=False):
+    """Append one record to the active segment (binary frame when packed, else a JSON line)."""
+    path = _active_path(path)
+    if not packed or not isinstance(entry, dict):
+        with open(path, 'a') as f:
+            f.write(ujson.dumps(entry) + '\n')
+        _writers.pop(path, None)
+        return True
+    w = _writers.get(path)
+    out = b''
+    # Emit a schema frame at the start of every segment, after any foreign write, and
+    # whenever the key set or constant meta changes. Type drift alone goes to extras.
+    if w is None or w[2] != _file_size(path) or not _schema_fits(w[0], w[1], entry):
+        sc = _schema_for(entry)
+        index = {}
+        for i in range(len(sc['k'])):
+            index[sc['k'][i]] = i
+        w = [sc, index, 0]
+        _writers[path] = w
+        out = _frame(_FRAME_SCHEMA, ujson.dumps(sc).encode())
+    body = _encode_record(entry, w[0])
+    if len(body) > 0xffff:
+        _writers.pop(path, None)
+        return append(entry, path, False)
+    out += _frame(_FRAME_RECORD, body)
+    with open(path, 'ab') as f:
+        f.write(out)
+    w[2] = _file_size(path)
+    return True
+
+
+def seal(path=None, force=False):
+    """Seal the active segment once it reaches FIELD_DATA_SEGMENT_BYTES (or any size if force)."""
+    path = _active_path(path)
+    st = _load(path)
+    size = _file_size(path)
+    limit = int(getattr(settings, 'FIELD_DATA_SEGMENT_BYTES', 16 * 1024))
+    if size <= 0 or (not force and size < limit):
+        return False
+    try:
+        os.rename(path, _seg_path(path, st['head']))
+    except Exception:
+        return False
+    st['head'] += 1
+    _writers.pop(path, None)
+    _save(path)
+    enforce_budget()
+    retire(path)
+    return True
+
+
+def clear(path=None):
+    """Treat everything currently in the journal as delivered."""
+    path = _active_path(path)
+    seal(path, force=True)
+    st = _load(path)
+    st['tail'] = st['head']
+    st['off'] = 0
+    st['done'] = []
+    _save(path)
+    retire(path)
+
+
+def _count_records(p, off=0):
+    n = 0
+    try:
+        with open(p, 'rb') as f:
+            sc = _scan_schema(f, 0, off, None) if off else None
+            while True:
+                nbytes, kind, data, complete = _read_frame(f, want_body=False)
+                if not nbytes:
+                    break
+                if not complete:
+                    continue
+                if kind == _FRAME_RECORD:
+                    n += 1
+                elif kind == 'j' and _decode_line(data) is not None:
+                    n += 1
+    except Exception:
+        pass
+    return n
+
+
+def _downsample(p, keep_every):
+    """Rewrite a sealed segment keeping every keep_every-th record; return records removed."""
+    tmp = p + '.tmp'
+    n = 0
+    removed = 0
+    with open(p, 'rb') as src, open(tmp, 'wb') as dst:
+        while True:
+            nbytes, kind, data, complete = _read_frame(src)
+            if not nbytes:
+                break
+            if not complete:
+                continue
+            if kind == _FRAME_SCHEMA:
+                dst.write(_frame(kind, data))
+                continue
+            if kind == 'j' and _decode_line(data) is None:
+                continue
+            if n % keep_every == 0:
+                dst.write(data if kind == 'j' else _frame(kind, data))
+            else:
+                removed += 1
+            n += 1
+    os.remove(p)
+    os.rename(tmp, p)
+    return removed
+
+
+def _budget_path(lane):
+    if lane == 'backlog':
+        return backlog_path()
+    return lane_path(lane)
+
+
+def total_pending_bytes():
+    total = 0
+    for lane in LANES:
+        total += pending_bytes(lane_path(lane))
+    return total + pending_bytes(backlog_path())
+
+
+def _active_headroom(lane, seg_bytes):
+    """Bytes lane's active segment may still grow before it is sealed."""
+    if lane not in ('normal', 'backlog') and not getattr(settings, 'FIELD_DATA_PRIORITY_LANES', True):
+        return 0
+    return max(0, seg_bytes - max(0, _file_size(_budget_path(lane))))
+
+
+def _evict_oldest(path, st, over):
+    """Delete sealed segments from the tail until over bytes are freed; returns (freed, records).
+
+    The segments are undelivered, so they are removed here rather than left for retire() to
+    archive into DATA_HISTORY_LOG; 'evsegs' counts them apart from retired segments.
+    """
+    freed = 0
+    n = 0
+    while freed < over and st['tail'] < st['head']:
+        p = _seg_path(path, st['tail'])
+        size = max(0, _file_size(p) - st['off'])
+        k = _count_records(p, st['off'])
+        st['dropped'] += size
+        st['evicted'] += k
+        st['evsegs'] += 1
+        n += k
+        freed += size
+        try:
+            os.remove(p)
+        except Exception:
+            pass
+        st['tail'] += 1
+        st['off'] = 0
+        _advance(path, st)
+    return freed, n
+
+
+def _finish_evict(path, st):
+    st['ds'] = [x for x in st['ds'] if x >= st['tail']]
+    _save(path)
+    retire(path)
+
+
+def enforce_budget():
+    """Keep all field-data journals under FIELD_DATA_MAX_BYTES by thinning or evicting old segments.
+
+    Every active segment that is still filling is counted at its full FIELD_DATA_SEGMENT_BYTES,
+    so appends until the next seal cannot push the journals past the ceiling (a segment only
+    outgrows that while an upload holds it open). The frost lane is first cut back to its own
+    FIELD_DATA_FROST_MAX_BYTES (active segment included). Other lanes are then visited in
+    EVICT_ORDER, oldest segment first. With FIELD_DATA_EVICT_DOWNSAMPLE set to N > 1, a
+    normal-lane segment is first thinned to every Nth record (once); otherwise, or once thinned,
+    it is dropped. Frost segments inside the frost budget are only dropped when nothing else is
+    left to evict, i.e. when that budget plus the other active segments exceeds the ceiling.
+    """
+    max_bytes = int(getattr(settings, 'FIELD_DATA_MAX_BYTES', 256 * 1024))
+    seg_bytes = int(getattr(settings, 'FIELD_DATA_SEGMENT_BYTES', 16 * 1024))
+    frost_max = int(getattr(settings, 'FIELD_DATA_FROST_MAX_BYTES', max_bytes // 4))
+    total = total_pending_bytes()
+    for lane in LANES + ('backlog',):
+        total += _active_headroom(lane, seg_bytes)
+    evicted = 0
+    frost_path = lane_path('frost')
+    frost = _load(frost_path)
+    over = pending_bytes(frost_path) + _active_headroom('frost', seg_bytes) - frost_max
+    if over > 0:
+        freed, n = _evict_oldest(frost_path, frost, over)
+        if freed:
+            total -= freed
+            evicted += n
+            _finish_evict(frost_path, frost)
+    if total <= max_bytes:
+        return evicted
+    keep_every = int(getattr(settings, 'FIELD_DATA_EVICT_DOWNSAMPLE', 0) or 0)
+    for lane in EVICT_ORDER + ('frost',):
+        path = _budget_path(lane)
+        st = _load(path)
+        changed = False
+        if lane == 'normal' and keep_every > 1:
+            for seq in range(st['tail'], st['head']):
+                if total <= max_bytes:
+                    break
+                if seq in st['ds'] or (seq == st['tail'] and st['off']):
+                    continue
+                if any(d[0] == seq for d in st['done']):
+                    continue
+                p = _seg_path(path, seq)
+                before = _file_size(p)
+                try:
+                    st['thinned'] += _downsample(p, keep_every)
+                except Exception:
+                    continue
+                st['ds'].append(seq)
+                total -= max(0, before - _file_size(p))
+                changed = True
+        if total > max_bytes:
+            freed, n = _evict_oldest(path, st, total - max_bytes)
+            if freed or n:
+                total -= freed
+                evicted += n
+                changed = True
+        if changed:
+            _finish_evict(path, st)
+        if total <= max_bytes:
+            break
+    return evicted
+
+
+def pending_bytes(path=None):
+    """Approximate undelivered bytes in the journal (out-of-order spans not subtracted)."""
+    path = _active_path(path)
+    st = _load(path)
+    total = 0
+    for seq in range(st['tail'], st['head'] + 1):
+        size = _file_size(_path_for(path, st, seq))
+        if size > 0:
+            total += size
+    return max(0, total - st['off'])
+
+
+def iter_records(path=None):
+    """Yield (seq, start, end, record) for every undelivered record from the cursor onward.
+
+    start..end spans the record's line or frame plus any junk and schema frames before it, so
+    delivering the span also consumes them. Spans already marked delivered are skipped.
+    """
+    path = _active_path(path)
+    st = _load(path)
+    seq = st['tail']
+    off = st['off']
+    while seq <= st['head']:
+        p = _path_for(path, st, seq)
+        size = _file_size(p)
+        if seq >= st['head'] and off > max(0, size):
+            # Active file was truncated or replaced underneath us; restart at its beginning.
+            off = 0
+            if st['tail'] == seq:
+                st['off'] = 0
+                st['done'] = [d for d in st['done'] if d[0] != seq]
+                _save(path)
+        if size > off:
+            try:
+                f = open(p, 'rb')
+            except Exception:
+                f = None
+            if f is not None:
+                try:
+                    # Binary records need the schema frame that precedes them in this segment.
+                    sc = _scan_schema(f, 0, off, None) if off else None
+                    pos = off
+                    gap = off
+                    while True:
+                        for d in st['done']:
+                            if d[0] == seq and d[1] <= pos < d[2]:
+                                sc = _scan_schema(f, pos, d[2], sc)
+                                pos = d[2]
+                                gap = pos
+                        nbytes, kind, data, complete = _read_frame(f)
+                        if not nbytes:
+                            break
+                        if not complete and seq >= st['head']:
+                            break
+                        pos += nbytes
+                        if kind == _FRAME_SCHEMA:
+                            sc = _load_schema(data) or sc
+                            continue
+                        obj = _decode_frame(kind, data, sc) if complete else None
+                        data = None
+                        if obj is None:
+                            continue
+                        yield seq, gap, pos, obj
+                        gap = pos
+                finally:
+                    try:
+                        f.close()
+                    except Exception:
+                        pass
+        seq += 1
+        off = 0
+
+
+def mark_delivered(spans, path=None):
+    """Record delivered (seq, start, end) spans and persist the advanced cursor."""
+    path = _active_path(path)
+    st = _load(path)
+    for seq, start, end in spans:
+        if seq < st['tail'] or (seq == st['tail'] and end <= st['off']):
+            continue
+        st['done'].append([int(seq), int(start), int(end)])
+    merged = []
+    for d in sorted(st['done']):
+        if merged and merged[-1][0] == d[0] and d[1] <= merged[-1][2]:
+            merged[-1][2] = max(merged[-1][2], d[2])
+        else:
+            merged.append(d)
+    st['done'] = merged
+    _advance(path, st)
+    return _save(path)
+
+
+def get_stats(path=None):
+    """Pending/eviction totals across all lanes and the backlog, plus pending bytes per lane."""
+    stats = {'segments': 0, 'pending_bytes': 0, 'dropped_bytes': 0,
+             'evicted_records': 0, 'evicted_segments': 0, 'retired_segments': 0,
+             'downsampled_records': 0, 'lanes': {}}
+    for lane in LANES + ('backlog',):
+        p = backlog_path() if lane == 'backlog' else lane_path(lane, path)
+        st = _load(p)
+        pending = pending_bytes(p)
+        stats['segments'] += st['head'] - st['tail'] + 1
+        stats['pending_bytes'] += pending
+        stats['dropped_bytes'] += st['dropped']
+        stats['evicted_records'] += st['evicted']
+        stats['evicted_segments'] += st['evsegs']
+        stats['retired_segments'] += st['retired']
+        stats['downsampled_records'] += st['thinned']
+        stats['lanes'][lane] = pending
+    return stats
@@ -5,9 +5,9 @@
 
 import os
 try:
-    import urequests as requests
+    import http_client as requests
 except Exception:
-    import requests
+    requests = None
 
 # Import device settings robustly: prefer package import micropython.settings; fallback to local 'settings' if present
 device_settings = None
@@ -72,7 +72,7 @@ def compute_file_sha256(path):
             hexsum = ''
     return hexsum
 
-def fetch_manifest_expected_sha(manifest_url, filename):
+async def fetch_manifest_expected_sha(manifest_url, filename):
     """
     Fetch manifest JSON from manifest_url and try to find the expected sha for filename.
     Returns expected sha hex (no 'sha256:' prefix) or None on failure.
@@ -80,7 +80,7 @@ def fetch_manifest_expected_sha(manifest_url, filename):
     if not manifest_url:
         return None
     try:
-        r = requests.get(manifest_url, timeout=10) if hasattr(requests, 'get') else requests.get(manifest_url)
+        r = await requests.get(manifest_url, timeout=10)
         if not r:
             return None
         try:
@@ -115,7 +115,7 @@ def fetch_manifest_expected_sha(manifest_url, filename):
     return None
 
 # --- Modified download function: verify against expected or manifest ---
-def download_and_apply_firmware(url, version_hint=None, target_path=None, chunk_size=CHUNK_SIZE, expected_sha=None, manifest_url=None):
+async def download_and_apply_firmware(url, version_hint=None, target_path=None, chunk_size=CHUNK_SIZE, expected_sha=None, manifest_url=None):
     """
     Download firmware to the device OTA backup path and verify SHA against expected_sha or manifest_url.
     Returns dict: {
@@ -130,6 +130,8 @@ def download_and_apply_firmware(url, version_hint=None, target_path=None, chunk_
     """
     if not url:
         return {'ok': False, 'error': 'no_url'}
+    if requests is None:
+        return {'ok': False, 'error': 'no_http_client'}
 
     # Ensure backup dir exists
     try:
@@ -153,7 +155,7 @@ def download_and_apply_firmware(url, version_hint=None, target_path=None, chunk_
             # Use the filename part of URL as hint
             import os as _os
             fname_hint = _os.path.basename(url) or (version_hint or 'firmware.bin')
-            server_expected = fetch_manifest_expected_sha(manifest_url, fname_hint)
+            server_expected = await fetch_manifest_expected_sha(manifest_url, fname_hint)
             if server_expected:
                 expected_sha = server_expected
             manifest_checked = True
@@ -161,14 +163,14 @@ def download_and_apply_firmware(url, version_hint=None, target_path=None, chunk_
         record_exception('firmware_updater.download.fetch_manifest_pre', e, status='WARN')
 
     try:
-        resp = requests.get(url, stream=True, timeout=30) if hasattr(requests, 'get') else requests.get(url, timeout=30)
+        resp = await requests.get(url, stream=True, timeout=30)
     except Exception as e:
         return {'ok': False, 'error': f'http_error:{e}'}
 
     status = getattr(resp, 'status_code', None)
     if status not in (200, 201):
         try:
-            body = getattr(resp, 'text', '')[:1024]
+            body = (await resp.read(1024)).decode('utf-8', 'ignore')
             _note = f'HTTP {status} body_snip={body[:512]}'
         except Exception as e:
             record_exception('firmware_updater.download.http_body_snip', e, status='WARN')
@@ -181,23 +183,14 @@ def download_and_apply_firmware(url, version_hint=None, target_path=None, chunk_
 
     total_written = 0
     try:
-        # streaming write
-        if hasattr(resp, 'iter_content'):
-            with open(target_path, 'wb') as f:
-                for chunk in resp.iter_content(chunk_size):
-                    if not chunk:
-                        continue
-                    f.write(chunk)
-                    total_written += len(chunk)
-        else:
-            data = getattr(resp, 'content', None)
-            if data is None and hasattr(resp, 'text'):
-                data = getattr(resp, 'text', '').encode('utf-8', 'ignore')
-            if not data:
-                data = b''
-            with open(target_path, 'wb') as f:
-                f.write(data)
-            total_written = len(data)
+        # streaming write; yields to the event loop between chunks
+        with open(target_path, 'wb') as f:
+            while True:
+                chunk = await resp.read(chunk_size)
+                if not chunk:
+                    break
+                f.write(chunk)
+                total_written += len(chunk)
     finally:
         try:
             resp.close()
@@ -222,7 +215,7 @@ def download_and_apply_firmware(url, version_hint=None, target_path=None, chunk_
         try:
             import os as _os
             fname_hint = _os.path.basename(url) or (version_hint or 'firmware.bin')
-            server_expected = fetch_manifest_expected_sha(manifest_url, fname_hint)
+            server_expected = await fetch_manifest_expected_sha(manifest_url, fname_hint)
             if server_expected:
                 expected_sha = server_expected
             manifest_checked = True
@@ -242,7 +235,7 @@ def download_and_apply_firmware(url, version_hint=None, target_path=None, chunk_
                 try:
                     import os as _os
                     fname_hint = _os.path.basename(url) or (version_hint or 'firmware.bin')
-                    server_expected = fetch_manifest_expected_sha(manifest_url, fname_hint)
+                    server_expected = await fetch_manifest_expected_sha(manifest_url, fname_hint)
                     if server_expected and server_expected.lower() == computed:
                         return {'ok': True, 'path': target_path, 'size': total_written, 'sha256': computed, 'expected_sha': server_expected, 'manifest_checked': True}
                 except Exception as e:
@@ -0,0 +1,399 @@
+# TMON async HTTP client: HTTP/1.1 over asyncio.open_connection with a keep-alive pool.
+#
+# urequests blocks the whole uasyncio loop for the full request timeout, starving the LoRa
+# RX loop and sensor tasks. Every socket operation here is an awaited stream call wrapped
+# in asyncio.wait_for, so network I/O yields to the rest of the firmware and no single
+# connect/read/write can stall longer than the request timeout (HTTP_TIMEOUT_S default).
+#
+# At most one idle connection is kept per (scheme, host, port) and reused for the next
+# request to that host, so field-data uploads, command polling, settings sync, diagnostics
+# and OTA share one TLS session per WordPress host. A pooled connection is dropped when it
+# has been idle longer than HTTP_POOL_IDLE_S, after HTTP_POOL_MAX_REQUESTS requests, when
+# the server answers 'Connection: close' / HTTP/1.0, or when a response body was not fully
+# read. A request on a reused connection is retried once on a fresh one only when the
+# connection was evidently closed while idle: writing the request failed (other than by
+# timeout), or the server closed it without sending a status line. Timeouts, malformed
+# responses and errors after the first response byte are raised to the caller.
+#
+# get/post/request are coroutines returning a Response with the urequests surface used
+# across the firmware: status_code, reason, headers, content, text, json() and close().
+# Bodies (Content-Length, chunked, or until close) are read before returning unless
+# stream=True; streamed responses are consumed with 'await resp.read(n)' and return their
+# connection to the pool on close() once the body has been fully read.
+
+try:
+    import uasyncio as asyncio
+except Exception:
+    import asyncio
+
+try:
+    import ujson
+except Exception:
+    import json as ujson
+
+try:
+    import utime as time
+except Exception:
+    import time
+
+try:
+    import settings
+except Exception:
+    settings = None
+
+_idle = {}
+_stats = {'opened': 0, 'reused': 0, 'retried': 0, 'closed': 0, 'timeouts': 0}
+
+
+def _now_ms():
+    try:
+        return time.ticks_ms()
+    except AttributeError:
+        return int(time.time() * 1000)
+
+
+def _elapsed_ms(since):
+    try:
+        return time.ticks_diff(time.ticks_ms(), since)
+    except AttributeError:
+        return _now_ms() - since
+
+
+def _enabled():
+    return bool(getattr(settings, 'HTTP_POOL_ENABLED', True))
+
+
+def _split_url(url):
+    try:
+        proto, _, host, path = url.split('/', 3)
+    except ValueError:
+        proto, _, host = url.split('/', 2)
+        path = ''
+    if proto == 'http:':
+        port = 80
+    elif proto == 'https:':
+        port = 443
+    else:
+        raise ValueError('Unsupported protocol: ' + proto)
+    if ':' in host:
+        host, port = host.split(':', 1)
+        port = int(port)
+    return proto, host, port, '/' + path
+
+
+async def _io(coro, timeout):
+    if not timeout:
+        return await coro
+    try:
+        return await asyncio.wait_for(coro, timeout)
+    except asyncio.TimeoutError:
+        _stats['timeouts'] += 1
+        raise OSError(110, 'ETIMEDOUT')
+
+
+class _Conn:
+    def __init__(self, key, reader, writer):
+        self.key = key
+        self.reader = reader
+        self.writer = writer
+        self.timeout = None
+        self.uses = 0
+        self.last_used = _now_ms()
+
+    async def write(self, data):
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        self.writer.write(data)
+        await _io(self.writer.drain(), self.timeout)
+
+    async def readline(self):
+        return await _io(self.reader.readline(), self.timeout)
+
+    async def read(self, n):
+        buf = b''
+        while len(buf) < n:
+            chunk = await _io(self.reader.read(n - len(buf)), self.timeout)
+            if not chunk:
+                break
+            buf += chunk
+        return buf
+
+    async def read_some(self, n):
+        return await _io(self.reader.read(n), self.timeout)
+
+    def close(self):
+        _stats['closed'] += 1
+        try:
+            self.writer.close()
+        except Exception:
+            pass
+
+
+async def _open(key, timeout):
+    proto, host, port = key
+    tls = proto == 'https:'
+    try:
+        reader, writer = await _io(asyncio.open_connection(host, port, ssl=tls or None, server_hostname=host if tls else None), timeout)
+    except TypeError:
+        # Older uasyncio: no server_hostname keyword.
+        reader, writer = await _io(asyncio.open_connection(host, port, ssl=tls or None), timeout)
+    _stats['opened'] += 1
+    return _Conn(key, reader, writer)
+
+
+async def _acquire(key, timeout):
+    conn = _idle.pop(key, None)
+    if conn is not None:
+        idle_ms = int(getattr(settings, 'HTTP_POOL_IDLE_S', 30)) * 1000
+        if _elapsed_ms(conn.last_used) > idle_ms:
+            conn.close()
+            conn = None
+    reused = conn is not None
+    if conn is None:
+        conn = await _open(key, timeout)
+    else:
+        _stats['reused'] += 1
+    conn.timeout = timeout
+    return conn, reused
+
+
+def _release(conn, reusable):
+    if not reusable or not _enabled() or conn.uses >= int(getattr(settings, 'HTTP_POOL_MAX_REQUESTS', 50)):
+        conn.close()
+        return
+    conn.last_used = _now_ms()
+    prev = _idle.get(conn.key)
+    if prev is not None:
+        prev.close()
+    _idle[conn.key] = conn
+    max_hosts = int(getattr(settings, 'HTTP_POOL_MAX_HOSTS', 2))
+    while len(_idle) > max_hosts:
+        oldest = None
+        for k in _idle:
+            if oldest is None or _elapsed_ms(_idle[k].last_used) > _elapsed_ms(_idle[oldest].last_used):
+                oldest = k
+        _idle.pop(oldest).close()
+
+
+def close_all():
+    """Close every pooled connection (e.g. after a WiFi reconnect)."""
+    for key in list(_idle.keys()):
+        try:
+            _idle.pop(key).close()
+        except Exception:
+            pass
+
+
+def get_stats():
+    out = dict(_stats)
+    out['idle'] = len(_idle)
+    return out
+
+
+class Response:
+    def __init__(self, conn, status, reason, headers, keep_alive):
+        self.status_code = status
+        self.reason = reason
+        self.headers = headers
+        self.encoding = 'utf-8'
+        self._conn = conn
+        self._keep_alive = keep_alive
+        self._cached = None
+        self._chunk_left = 0
+        self._done = False
+        te = self._header('transfer-encoding') or ''
+        self._chunked = 'chunked' in te.lower()
+        cl = self._header('content-length')
+        self._left = int(cl) if cl is not None and not self._chunked else None
+        if status in (204, 304) or (self._left == 0 and not self._chunked):
+            self._done = True
+        elif self._left is None and not self._chunked:
+            # Body delimited by connection close; cannot be reused.
+            self._keep_alive = False
+
+    def _header(self, name):
+        for k in self.headers:
+            if k.lower() == name:
+                return self.headers[k]
+        return None
+
+    async def read(self, sz=1024):
+        """Return the next piece of the body (at most sz bytes); b'' once it is exhausted."""
+        conn = self._conn
+        if self._done or conn is None:
+            return b''
+        if self._chunked:
+            if self._chunk_left == 0:
+                line = await conn.readline()
+                if not line:
+                    self._keep_alive = False
+                    self._done = True
+                    return b''
+                self._chunk_left = int(line.split(b';', 1)[0].strip() or b'0', 16)
+                if self._chunk_left == 0:
+                    while True:
+                        trailer = await conn.readline()
+                        if not trailer or trailer == b'\r\n':
+                            break
+                    self._done = True
+                    return b''
+            data = await conn.read(min(sz, self._chunk_left))
+            self._chunk_left -= len(data)
+            if not data:
+                self._keep_alive = False
+                self._done = True
+            elif self._chunk_left == 0:
+                await conn.read(2)
+            return data
+        if self._left is not None:
+            data = await conn.read(min(sz, self._left))
+            self._left -= len(data)
+            if self._left <= 0 or not data:
+                if not data:
+                    self._keep_alive = False
+                self._done = True
+            return data
+        data = await conn.read_some(sz)
+        if not data:
+            self._done = True
+        return data
+
+    async def _read_all(self):
+        parts = []
+        try:
+            while True:
+                data = await self.read(2048)
+                if not data:
+                    break
+                parts.append(data)
+        finally:
+            self._cached = b''.join(parts)
+            self.close()
+
+    @property
+    def content(self):
+        # Streamed responses must be drained with read(); content is only what was buffered.
+        return self._cached if self._cached is not None else b''
+
+    @property
+    def text(self):
+        return str(self.content, self.encoding)
+
+    def json(self):
+        return ujson.loads(self.content)
+
+    def close(self):
+        conn = self._conn
+        if conn is None:
+            return
+        self._conn = None
+        _release(conn, self._keep_alive and self._done)
+
+
+async def _send(conn, method, host, path, headers, data, keep_alive):
+    lines = ['%s %s HTTP/1.1\r\n' % (method, path)]
+    if 'Host' not in headers:
+        lines.append('Host: %s\r\n' % host)
+    for k in headers:
+        lines.append('%s: %s\r\n' % (k, headers[k]))
+    if data is not None:
+        lines.append('Content-Length: %d\r\n' % len(data))
+    lines.append('Connection: %s\r\n\r\n' % ('keep-alive' if keep_alive else 'close'))
+    head = ''.join(lines).encode('utf-8')
+    # One write for small bodies keeps the request in a single TLS record.
+    if data and len(data) <= 1024:
+        await conn.write(head + data)
+    else:
+        await conn.write(head)
+        if data:
+            await conn.write(data)
+
+
+async def _read_head(conn):
+    """Status line and headers; None when the peer closed before sending anything."""
+    line = await conn.readline()
+    if not line:
+        return None
+    parts = line.split(None, 2)
+    if len(parts) < 2:
+        raise ValueError('HTTP error: BadStatusLine: %s' % line)
+    version = parts[0]
+    status = int(parts[1])
+    reason = parts[2].rstrip().decode('utf-8', 'ignore') if len(parts) > 2 else ''
+    headers = {}
+    while True:
+        line = await conn.readline()
+        if not line or line == b'\r\n':
+            break
+        k, _, v = line.decode('utf-8', 'ignore').partition(':')
+        headers[k.strip()] = v.strip()
+    return version, status, reason, headers
+
+
+async def request(method, url, data=None, json=None, headers=None, stream=None, timeout=None):
+    proto, host, port, path = _split_url(url)
+    key = (proto, host, port)
+    if timeout is None:
+        timeout = getattr(settings, 'HTTP_TIMEOUT_S', 10)
+    hdrs = dict(headers or {})
+    if json is not None:
+        data = ujson.dumps(json)
+        if 'Content-Type' not in hdrs:
+            hdrs['Content-Type'] = 'application/json'
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    if data is None and method in ('POST', 'PUT', 'PATCH'):
+        data = b''
+    max_requests = int(getattr(settings, 'HTTP_POOL_MAX_REQUESTS', 50))
+    for attempt in (0, 1):
+        conn, reused = await _acquire(key, timeout)
+        conn.uses += 1
+        keep_alive = _enabled() and conn.uses < max_requests
+        try:
+            await _send(conn, method, host, path, hdrs, data, keep_alive)
+        except Exception as e:
+            conn.close()
+            if reused and attempt == 0 and e.args[:1] != (110,):
+                # Stale keep-alive connection; retry once on a fresh socket (not after a timeout).
+                _stats['retried'] += 1
+                continue
+            raise
+        try:
+            head = await _read_head(conn)
+        except Exception:
+            conn.close()
+            raise
+        if head is None:
+            conn.close()
+            if reused and attempt == 0:
+                # Server closed the idle connection before answering; retry once on a fresh socket.
+                _stats['retried'] += 1
+                continue
+            raise ValueError('HTTP error: connection closed before response')
+        version, status, reason, rhdrs = head
+        conn_hdr = ''
+        for k in rhdrs:
+            if k.lower() == 'connection':
+                conn_hdr = rhdrs[k].lower()
+        if version != b'HTTP/1.1' or 'close' in conn_hdr:
+            keep_alive = False
+        resp = Response(conn, status, reason, rhdrs, keep_alive)
+        if not stream:
+            await resp._read_all()
+        return resp
+
+
+async def get(url, **kw):
+    return await request('GET', url, **kw)
+
+
+async def post(url, **kw):
+    return await request('POST', url, **kw)
+
+
+async def put(url, **kw):
+    return await request('PUT', url, **kw)
+
+
+async def delete(url, **kw):
+    return await request('DELETE', url, **kw)
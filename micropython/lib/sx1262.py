@@ -36,6 +36,7 @@ class SX1262(SX126X):
     def __init__(self, spi_bus, clk, mosi, miso, cs, irq, rst, gpio):
         super().__init__(spi_bus, clk, mosi, miso, cs, irq, rst, gpio)
         self._callbackFunction = self._dummyFunction
+        self._rxFlag = None
 
     def begin(self, freq=434.0, bw=125.0, sf=9, cr=7, syncWord=SX126X_SYNC_WORD_PRIVATE,
               power=14, currentLimit=60.0, preambleLength=8, implicit=False, implicitLen=0xFF,
@@ -216,6 +217,34 @@ class SX1262(SX126X):
             super().clearDio1Action()
             return state
 
+    def setRxFlag(self, flag):
+        # Interrupt-driven receive: DIO1 only sets flag (e.g. asyncio.ThreadSafeFlag); the
+        # waiting task reads the frame with recvInto(). No SPI or allocation in the handler.
+        self._rxFlag = flag
+        if flag is not None:
+            super().setDio1Action(self._onDio1)
+        else:
+            super().clearDio1Action()
+
+    def _onDio1(self, pin):
+        flag = self._rxFlag
+        if flag is not None:
+            flag.set()
+
+    def recvInto(self, buf):
+        # Non-blocking read of the pending packet into a preallocated buffer, then re-arm RX.
+        # Returns (length, state); a packet longer than buf is truncated.
+        length = super().getPacketLength()
+        if length > len(buf):
+            length = len(buf)
+        state = super().readData(buf, length)
+        state2 = super().startReceive()
+        if state2 != ERR_NONE:
+            return 0, state2
+        if state == ERR_NONE or state == ERR_CRC_MISMATCH:
+            return length, state
+        return 0, state
+
     def setOperatingMode(self, mode):
         """Set the operating mode of the SX1262 module."""
         if mode == self.MODE_TX:
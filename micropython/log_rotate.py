@@ -20,23 +20,43 @@ def _file_size(path):
         return 0
 
 
-def _rotate_one(path, max_rotations=3):
+def _shift_rotations(path, max_rotations=3):
     try:
-        if _file_size(path) <= 0:
-            return False
+        os.remove('%s.%d' % (path, max_rotations))
+    except Exception:
+        pass
 
+    for i in range(max_rotations - 1, 0, -1):
+        src = '%s.%d' % (path, i)
+        dst = '%s.%d' % (path, i + 1)
         try:
-            os.remove('%s.%d' % (path, max_rotations))
+            os.rename(src, dst)
         except Exception:
             pass
 
-        for i in range(max_rotations - 1, 0, -1):
-            src = '%s.%d' % (path, i)
-            dst = '%s.%d' % (path, i + 1)
+
+def archive_file(src, path, max_rotations=3):
+    """Move src into path's rotation chain as path.1 (rename only, no copy)."""
+    try:
+        if _file_size(src) <= 0:
             try:
-                os.rename(src, dst)
+                os.remove(src)
             except Exception:
                 pass
+            return True
+        _shift_rotations(path, max_rotations)
+        os.rename(src, path + '.1')
+        return True
+    except Exception:
+        return False
+
+
+def _rotate_one(path, max_rotations=3):
+    try:
+        if _file_size(path) <= 0:
+            return False
+
+        _shift_rotations(path, max_rotations)
 
         try:
             os.rename(path, path + '.1')
@@ -11,6 +11,7 @@ import ujson
 import os
 import uasyncio as asyncio
 import random
+import math
 import ubinascii as _ub
 import gc
 try:
@@ -23,14 +24,6 @@ try:
 except ImportError:
     machine = None
     sys = None
-try:
-    import _thread
-except Exception:
-    _thread = None
-try:
-    import threading
-except Exception:
-    threading = None
 try:
     from sx1262 import SX1262
 except ImportError:
@@ -63,21 +56,11 @@ except Exception:
     send_ota_job_status = None
 
 import uhashlib
-try:
-    import hmac
-except ImportError:
-    def hmac_sha256(key, msg):
-        BLOCK_SIZE = 64
-        if len(key) > BLOCK_SIZE:
-            key = uhashlib.sha256(key).digest()
-        key += b'\x00' * (BLOCK_SIZE - len(key))
-        opad = bytes((x ^ 0x5C) for x in key)
-        ipad = bytes((x ^ 0x36) for x in key)
-        inner = uhashlib.sha256(ipad + msg).digest()
-        return uhashlib.sha256(opad + inner).digest()
-else:
-    def hmac_sha256(key, msg):
-        return hmac.new(key, msg, uhashlib.sha256).digest()
+from lora_hmac import hmac_sha256, digest_eq, tag_hex, tag_ok
+import lora_slots
+import lora_session
+import lora_counters
+import lora_airtime
 
 from itertools import cycle
 def xor_bytes(a, b):
@@ -229,16 +212,32 @@ tx_counter = 0
 remote_counters = {}
 _lora_ota_cache = {'version': None, 'files': None}
 _remote_lora_ota_jobs = {}
+_ota_bcast = None
 _remote_ota_rx = {
     'chunks': {},
     'session': None,
     'version': None,
     'files': {},
     'received': {},
+    'partial': {},
+    'stream': None,
 }
+# Remote: broadcast session announced in the last ACK (AT:), and whether its LORA_OTA_END came.
+_remote_ota_bcast = {'session': None, 'ended': False}
 _crc_selftest_done = False
 _relay_dupe = []
 
+# DIO1 receive ring (LORA_IRQ_RX): _rx_pump copies frames out of the radio as soon as the IRQ
+# fires, so a frame is never overwritten by the next one while the loop is busy elsewhere.
+_rx_flag = None
+_rx_ready = None
+_rx_ring = None
+_rx_lens = None
+_rx_head = 0
+_rx_count = 0
+_rx_pump_started = False
+_rx_stats = {'frames': 0, 'dropped': 0, 'errors': 0}
+
 
 def _safe_int(v, default=0):
     try:
@@ -343,7 +342,10 @@ def _sha256_hex(data):
 
 
 def _read_local_firmware_files():
-    """Read local firmware files for LoRa OTA push and return metadata list."""
+    """Metadata (name, path, size, sha256) of local firmware files for LoRa OTA push.
+
+    Files are hashed in blocks and stay on flash; senders read the slices they transmit.
+    """
     base_ver = str(getattr(settings, 'FIRMWARE_VERSION', '') or '').strip()
     if _lora_ota_cache.get('version') == base_ver and isinstance(_lora_ota_cache.get('files'), list):
         return _lora_ota_cache.get('files')
@@ -354,7 +356,7 @@ def _read_local_firmware_files():
         name = str(rel or '').strip()
         if not name:
             continue
-        raw = None
+        row = None
         candidates = [
             name,
             './' + name,
@@ -362,27 +364,41 @@ def _read_local_firmware_files():
         ]
         for fp in candidates:
             try:
+                h = uhashlib.sha256()
+                size = 0
                 with open(fp, 'rb') as rf:
-                    raw = rf.read()
-                if raw is not None:
-                    break
+                    while True:
+                        block = rf.read(512)
+                        if not block:
+                            break
+                        h.update(block)
+                        size += len(block)
+                row = {
+                    'name': name,
+                    'path': fp,
+                    'size': size,
+                    'sha256': _ub.hexlify(h.digest()).decode().lower(),
+                }
+                break
             except Exception:
-                raw = None
-        if raw is None:
+                row = None
+        if row is None:
             continue
-        files.append({
-            'name': name,
-            'sha256': _sha256_hex(raw),
-            'data_b64': _ub.b2a_base64(raw).rstrip(b'\n').decode(),
-        })
+        files.append(row)
+        gc.collect()
 
     _lora_ota_cache['version'] = base_ver
     _lora_ota_cache['files'] = files
     return files
 
 
-def _stage_remote_lora_ota_job(remote_uid, remote_ver):
-    """Prepare a LoRa OTA push job when base firmware is newer than remote."""
+def _stage_remote_lora_ota_job(remote_uid, remote_ver, stream=False, resume=None):
+    """Prepare a LoRa OTA push job when base firmware is newer than remote.
+
+    stream: the remote advertised LORA_OTA_STREAM (chunk-streamed files); older remotes get
+    each file as one base64 payload. resume: the remote's OTA_RESUME report; when it is for
+    this version the session continues and only missing files/chunks are sent.
+    """
     if not _is_lora_hub_node():
         return None
     if not bool(getattr(settings, 'ENABLE_LORA_OTA', True)):
@@ -395,22 +411,192 @@ def _stage_remote_lora_ota_job(remote_uid, remote_ver):
     if not files:
         return None
 
-    sess = f"{remote_uid}:{int(time.time())}"
+    # No ':' in the session: it travels as one field of the ACK and names staged files.
+    sess = f"{remote_uid}-{int(time.time())}"
+    bcast = False
+    if not (stream and isinstance(resume, dict) and resume.get('session') and str(resume.get('version') or '') == base_ver):
+        resume = None
+        if stream and _ota_bcast_enroll(str(remote_uid), base_ver):
+            sess = _ota_bcast['session']
+            bcast = True
+    else:
+        sess = str(resume.get('session'))
     _remote_lora_ota_jobs[str(remote_uid)] = {
         'session': sess,
         'version': base_ver,
         'remote_version': str(remote_ver or ''),
         'files': files,
+        'stream': bool(stream),
+        'resume': resume,
+        'bcast': bcast,
         'sent': False,
     }
     return sess
 
 
+# Broadcast LoRa OTA (LORA_OTA_BROADCAST): rather than one unicast push per remote, stream-capable
+# remotes on an older version that check in while a campaign is pending are enrolled and told
+# (ACK ...:AT:<s>) to open a receive window at the campaign start, one TDMA cycle plus
+# LORA_OTA_BCAST_LEAD_S after the campaign was opened so every remote checks in once before.
+# At the start the hub sends META, each file (header, LORA_OTA_DATA chunks, FEC parity) and
+# LORA_OTA_END once to UID '*'. Each remote keeps what it got as a resumable session and reports
+# it at its next check-in; the hub then unicasts only that remote's missing chunks and APPLY.
+# Remotes that check in after the start (or within LORA_OTA_BCAST_REPEAT_S of a finished
+# campaign) get a unicast push. Broadcast frames use their own replay counter stream ('*').
+
+def _ota_bcast_enroll(uid, version):
+    """Enroll uid in the pending broadcast campaign for version (opening one if needed); True when enrolled."""
+    global _ota_bcast
+    if not bool(getattr(settings, 'LORA_OTA_BROADCAST', True)):
+        return False
+    now = time.time()
+    b = _ota_bcast
+    if b is not None and b['version'] == version:
+        if b['started']:
+            if now - b['start'] < _safe_int(getattr(settings, 'LORA_OTA_BCAST_REPEAT_S', 86400), 86400):
+                return False
+            b = None
+        elif b['start'] - now < _safe_int(getattr(settings, 'LORA_OTA_BCAST_MIN_LEAD_S', 20), 20):
+            return False
+    else:
+        b = None
+    if b is None:
+        start = int(now + lora_slots.cycle_s() + _safe_int(getattr(settings, 'LORA_OTA_BCAST_LEAD_S', 60), 60))
+        b = _ota_bcast = {
+            'session': 'bcast-%d' % start,
+            'version': version,
+            'start': start,
+            'uids': [],
+            'started': False,
+        }
+    if uid not in b['uids']:
+        b['uids'].append(uid)
+    return True
+
+
+async def _ota_broadcast_run():
+    """Hub loop: transmit the pending broadcast campaign once its start time has come."""
+    b = _ota_bcast
+    if b is None or b['started'] or time.time() < b['start']:
+        return False
+    b['started'] = True
+    files = _read_local_firmware_files()
+    if not b['uids'] or not files or b['version'] != str(getattr(settings, 'FIRMWARE_VERSION', '') or '').strip():
+        return False
+    session = b['session']
+    chunk_len = max(96, _safe_int(getattr(settings, 'LORA_OTA_CHUNK_SIZE', 180), 180))
+    await debug_print(f"LoRa OTA broadcast {session} to {len(b['uids'])} remote(s)", 'OTA')
+    meta = {
+        'session': session,
+        'version': b['version'],
+        'count': len(files),
+        'files': [{'name': f.get('name'), 'sha256': f.get('sha256')} for f in files],
+    }
+    ok = await _send_chunked('LORA_OTA_META', _ub.b2a_base64(ujson.dumps(meta).encode()).rstrip(b'\n').decode(),
+                             target_uid='*', chunk_len=chunk_len)
+    await asyncio.sleep(0.3)
+    for f in files:
+        if not ok:
+            break
+        try:
+            ok = await _send_ota_file_stream('*', f, session, b['version'], chunk_len,
+                                             step_uid=max(b['uids'], key=len))
+        except Exception as e:
+            await log_error(f"lora ota broadcast file={f.get('name')}: {e}")
+            ok = False
+        await asyncio.sleep(0.25)
+    if not ok:
+        await debug_print(f'LoRa OTA broadcast {session} cut short; remotes repair at check-in', 'OTA')
+    end_b64 = _ub.b2a_base64(ujson.dumps({'session': session}).encode()).rstrip(b'\n').decode()
+    await _send_chunked('LORA_OTA_END', end_b64, target_uid='*', chunk_len=chunk_len)
+    return ok
+
+
+def _ota_stream_step(uid, size, chunk_len):
+    """Raw bytes per LORA_OTA_DATA chunk so the secured frame fits LORA_MAX_PACKET_SIZE."""
+    max_size = _safe_int(getattr(settings, 'LORA_MAX_PACKET_SIZE', 240), 240)
+    n = len(str(max(1, size)))
+    head = len('TYPE:LORA_OTA_DATA_CHUNK,UID:%s,CHUNK:%s/%s,DATA:' % (uid, '9' * n, '9' * n))
+    # |CNT:n|HMAC:<hex>|CRC:XXXX envelope (see _secure_message)
+    env = 32 + 2 * _safe_int(getattr(settings, 'LORA_HMAC_TRUNCATE', 16), 16)
+    b64 = min(chunk_len, max_size - head - env)
+    return max(12, b64 // 4 * 3)
+
+
+async def _send_ota_file_stream(uid, f, session, version, chunk_len, have=None, step_uid=None):
+    """Stream one firmware file from flash: a LORA_OTA_FILE header, then LORA_OTA_DATA chunks.
+
+    Each chunk is one slice read from the file (base64 of step raw bytes, so it decodes on its
+    own); FEC parity follows every LORA_FEC_GROUP['LORA_OTA_DATA'] chunks. Only the current
+    FEC group is held in memory. have: the remote's partial-file report (step, total, chunk
+    bitmap); chunks it already holds are skipped, and so is the parity of complete groups.
+    step_uid: size chunks for this uid's frames instead (a broadcast is repaired per remote).
+    """
+    size = _safe_int(f.get('size'), 0)
+    step = _ota_stream_step(step_uid or uid, size, chunk_len)
+    bitmap = None
+    if isinstance(have, dict):
+        try:
+            h_step = _safe_int(have.get('step'), 0)
+            h_total = _safe_int(have.get('total'), 0)
+            bitmap = _ub.unhexlify(str(have.get('map') or ''))
+            if h_step > 0 and h_total == (size + h_step - 1) // h_step and len(bitmap) * 8 >= h_total:
+                step = h_step
+            else:
+                bitmap = None
+        except Exception:
+            bitmap = None
+    total = max(1, (size + step - 1) // step)
+    fec_k = _fec_k('LORA_OTA_DATA') if total > 1 else 0
+    head = {
+        'session': session,
+        'version': version,
+        'name': f.get('name'),
+        'sha256': f.get('sha256'),
+        'size': size,
+        'step': step,
+        'chunks': total,
+        'fec': fec_k,
+    }
+    if bitmap is not None or uid == '*':
+        # A broadcast header goes out twice; 'resume' makes the repeat keep the open file.
+        head['resume'] = 1
+    head_b64 = _ub.b2a_base64(ujson.dumps(head).encode()).rstrip(b'\n').decode()
+    for _ in range(2 if uid == '*' else 1):
+        if not await _send_chunked('LORA_OTA_FILE', head_b64, target_uid=uid, chunk_len=chunk_len):
+            return False
+        await asyncio.sleep(0.25)
+    group = []
+    group_sent = False
+    with open(f.get('path'), 'rb') as rf:
+        for i in range(total):
+            piece = rf.read(step)
+            if bitmap is None or not _ota_bit(bitmap, i):
+                msg = 'TYPE:LORA_OTA_DATA_CHUNK,UID:%s,CHUNK:%d/%d,DATA:%s' % (
+                    uid, i, total, _ub.b2a_base64(piece).rstrip(b'\n').decode())
+                secured = await _secure_message(msg, remote_uid=uid)
+                if not await _safe_send(secured.encode(), prio='low'):
+                    return False
+                group_sent = True
+                await asyncio.sleep(random.uniform(0.08, 0.25))
+            if fec_k:
+                group.append(piece)
+                if len(group) == fec_k or i == total - 1:
+                    if group_sent:
+                        last_len = size - (total - 1) * step
+                        parity = await _fec_parity_frame('LORA_OTA_DATA', uid, i // fec_k, fec_k, total, last_len, group, False)
+                        await _safe_send(parity, prio='low')
+                        await asyncio.sleep(random.uniform(0.08, 0.25))
+                    group = []
+                    group_sent = False
+    return True
+
+
 async def _send_lora_ota_job(remote_uid):
     """Send staged LoRa OTA package to a specific remote using chunked TYPE frames."""
     uid = str(remote_uid or '')
     job = _remote_lora_ota_jobs.get(uid)
-    if not isinstance(job, dict) or job.get('sent'):
+    if not isinstance(job, dict) or job.get('sent') or job.get('bcast'):
         return False
 
     files = job.get('files') or []
@@ -419,6 +605,10 @@ async def _send_lora_ota_job(remote_uid):
 
     session = str(job.get('session') or '')
     version = str(job.get('version') or '')
+    stream = bool(job.get('stream'))
+    resume = job.get('resume') if isinstance(job.get('resume'), dict) else {}
+    done = resume.get('done') if isinstance(resume.get('done'), dict) else {}
+    partial = resume.get('partial') if isinstance(resume.get('partial'), dict) else {}
     retries = max(1, _safe_int(getattr(settings, 'LORA_OTA_MAX_RETRIES', 3), 3))
     chunk_len = max(96, _safe_int(getattr(settings, 'LORA_OTA_CHUNK_SIZE', 180), 180))
 
@@ -429,23 +619,45 @@ async def _send_lora_ota_job(remote_uid):
         'files': [{'name': f.get('name'), 'sha256': f.get('sha256')} for f in files],
     }
     meta_b64 = _ub.b2a_base64(ujson.dumps(meta).encode()).rstrip(b'\n').decode()
-    await _send_chunked('LORA_OTA_META', meta_b64, target_uid=uid, chunk_len=chunk_len)
+    if not await _send_chunked('LORA_OTA_META', meta_b64, target_uid=uid, chunk_len=chunk_len):
+        await debug_print(f'LoRa OTA to {uid} deferred (airtime budget)', 'OTA')
+        return False
     await asyncio.sleep(0.3)
+    if resume:
+        await debug_print(f'LoRa OTA to {uid} resumed: {len(done)} file(s) done, {len(partial)} partial', 'OTA')
 
     for f in files:
-        payload = {
-            'session': session,
-            'version': version,
-            'name': f.get('name'),
-            'sha256': f.get('sha256'),
-            'data_b64': f.get('data_b64'),
-        }
-        payload_b64 = _ub.b2a_base64(ujson.dumps(payload).encode()).rstrip(b'\n').decode()
-
+        if stream and done.get(f.get('name')) == f.get('sha256'):
+            continue
+        have = partial.get(f.get('name'))
+        if not isinstance(have, dict) or have.get('sha256') != f.get('sha256'):
+            have = None
         sent_ok = False
         for _ in range(retries):
             try:
-                await _send_chunked('LORA_OTA_FILE', payload_b64, target_uid=uid, chunk_len=chunk_len)
+                if stream:
+                    ok = await _send_ota_file_stream(uid, f, session, version, chunk_len, have)
+                    have = None
+                else:
+                    # Remote without LORA_OTA_STREAM: whole file as one payload, one file at a time.
+                    with open(f.get('path'), 'rb') as rf:
+                        blob_b64 = _ub.b2a_base64(rf.read()).rstrip(b'\n').decode()
+                    payload = {
+                        'session': session,
+                        'version': version,
+                        'name': f.get('name'),
+                        'sha256': f.get('sha256'),
+                        'data_b64': blob_b64,
+                    }
+                    blob_b64 = None
+                    payload_b64 = _ub.b2a_base64(ujson.dumps(payload).encode()).rstrip(b'\n').decode()
+                    payload = None
+                    ok = await _send_chunked('LORA_OTA_FILE', payload_b64, target_uid=uid, chunk_len=chunk_len)
+                    payload_b64 = None
+                    gc.collect()
+                if not ok:
+                    await debug_print(f'LoRa OTA to {uid} deferred (airtime budget)', 'OTA')
+                    return False
                 sent_ok = True
                 break
             except Exception:
@@ -461,7 +673,8 @@ async def _send_lora_ota_job(remote_uid):
         'count': len(files),
     }
     apply_b64 = _ub.b2a_base64(ujson.dumps(apply_msg).encode()).rstrip(b'\n').decode()
-    await _send_chunked('LORA_OTA_APPLY', apply_b64, target_uid=uid, chunk_len=chunk_len)
+    if not await _send_chunked('LORA_OTA_APPLY', apply_b64, target_uid=uid, chunk_len=chunk_len):
+        return False
     job['sent'] = True
     return True
 
@@ -472,6 +685,8 @@ def _reset_remote_ota_rx():
     _remote_ota_rx['version'] = None
     _remote_ota_rx['files'] = {}
     _remote_ota_rx['received'] = {}
+    _remote_ota_rx['partial'] = {}
+    _remote_ota_rx['stream'] = None
 
 
 def _ensure_dir(path):
@@ -533,10 +748,14 @@ async def _remote_handle_lora_ota_payload(msg_type, payload):
             h = str(row.get('sha256') or '').strip().lower()
             if n and h:
                 expected[n] = h
-        _remote_ota_rx['session'] = session
+        if not _remote_ota_restore(session):
+            # A new session replaces whatever an unfinished one left on flash.
+            _remote_ota_discard()
+            _reset_remote_ota_rx()
+            _remote_ota_rx['session'] = session
         _remote_ota_rx['version'] = str(payload.get('version') or '')
         _remote_ota_rx['files'] = expected
-        _remote_ota_rx['received'] = {}
+        _remote_ota_resume_save()
         return True
 
     if msg_type == 'LORA_OTA_FILE':
@@ -546,6 +765,8 @@ async def _remote_handle_lora_ota_payload(msg_type, payload):
         name = str(payload.get('name') or '').strip()
         expected_sha = str(payload.get('sha256') or '').strip().lower()
         blob_b64 = payload.get('data_b64')
+        if name and expected_sha and not blob_b64 and payload.get('chunks'):
+            return _remote_ota_stream_open(session, name, expected_sha, payload)
         if not name or not expected_sha or not blob_b64:
             return False
         raw = _ub.a2b_base64(str(blob_b64).encode())
@@ -561,6 +782,8 @@ async def _remote_handle_lora_ota_payload(msg_type, payload):
             'sha256': expected_sha,
             'staged_path': staged_path,
         }
+        _remote_ota_rx['partial'].pop(name, None)
+        _remote_ota_resume_save()
         return True
 
     if msg_type == 'LORA_OTA_APPLY':
@@ -596,6 +819,10 @@ async def _remote_handle_lora_ota_payload(msg_type, payload):
         _ensure_dir(pending_file)
         with open(pending_file, 'w') as pf:
             pf.write(str(manifest.get('version') or 'lora-ota'))
+        try:
+            os.remove(_remote_ota_resume_path())
+        except Exception:
+            pass
 
         await debug_print('Remote LoRa OTA staged; rebooting to apply.', 'OTA')
         await asyncio.sleep(0.4)
@@ -611,13 +838,298 @@ async def _remote_handle_lora_ota_payload(msg_type, payload):
     return False
 
 
+# Resumable OTA reception: a streamed file is pre-sized on flash and each chunk is written at
+# idx * step, so chunks may arrive in any order and over several sessions. A bitmap per file
+# records which chunks are on flash; the running SHA-256 covers the contiguous prefix and
+# advances over chunks already written as gaps fill. Session, expected files, finished files
+# and the partial files' bitmaps are kept in _remote_ota_resume_path() (saved every
+# LORA_OTA_RESUME_SAVE_EVERY chunks, per file and when the OTA window closes), summarized in
+# HELLO (|OTA:<session>:<done>/<files>) and sent as OTA_RESUME in the next check-in burst, so
+# the hub only sends what is still missing. A power cut loses at most the last few bitmap
+# updates; those chunks are sent again.
+
+def _ota_bit(m, i):
+    return m[i >> 3] & (1 << (i & 7))
+
+
+def _remote_ota_resume_path():
+    return _remote_ota_stage_root() + '/resume.json'
+
+
+def _remote_ota_resume_save():
+    path = _remote_ota_resume_path()
+    session = _remote_ota_rx.get('session')
+    if not session:
+        return
+    partial = {}
+    for n, s in (_remote_ota_rx.get('partial') or {}).items():
+        partial[n] = {
+            'sha256': s['sha256'],
+            'path': s['path'],
+            'size': s['size'],
+            'step': s['step'],
+            'total': s['total'],
+            'fec': s['fec'],
+            'map': _ub.hexlify(s['map']).decode(),
+        }
+        s['dirty'] = 0
+    try:
+        from config_persist import write_json_atomic
+        write_json_atomic(path, {
+            'session': session,
+            'version': _remote_ota_rx.get('version'),
+            'files': _remote_ota_rx.get('files') or {},
+            'received': _remote_ota_rx.get('received') or {},
+            'partial': partial,
+        })
+    except Exception:
+        pass
+
+
+def _remote_ota_resume_state():
+    """The persisted resume state (flushed from RAM first), or None."""
+    if _remote_ota_rx.get('session'):
+        _remote_ota_resume_save()
+    try:
+        with open(_remote_ota_resume_path(), 'r') as f:
+            state = ujson.load(f)
+        return state if isinstance(state, dict) and state.get('session') else None
+    except Exception:
+        return None
+
+
+def _remote_ota_restore(session):
+    """Continue session from the resume file if it is the one persisted; True when loaded."""
+    session = str(session or '')
+    if not session:
+        return False
+    if _remote_ota_rx.get('session') == session:
+        return True
+    state = _remote_ota_resume_state()
+    if not state or str(state.get('session')) != session:
+        return False
+    _reset_remote_ota_rx()
+    _remote_ota_rx['session'] = session
+    _remote_ota_rx['version'] = str(state.get('version') or '')
+    _remote_ota_rx['files'] = state.get('files') or {}
+    _remote_ota_rx['received'] = state.get('received') or {}
+    for n, p in (state.get('partial') or {}).items():
+        try:
+            _remote_ota_rx['partial'][n] = {
+                'name': n,
+                'sha256': p['sha256'],
+                'path': p['path'],
+                'size': _safe_int(p.get('size'), 0),
+                'step': _safe_int(p.get('step'), 0),
+                'total': _safe_int(p.get('total'), 0),
+                'fec': _safe_int(p.get('fec'), 0),
+                'map': bytearray(_ub.unhexlify(p['map'])),
+                'hashed': 0,
+                'h': None,
+                'dirty': 0,
+            }
+        except Exception:
+            continue
+    return True
+
+
+def _remote_ota_discard():
+    """Remove the staged files and resume file of the previous session."""
+    paths = []
+    state = _remote_ota_resume_state()
+    for src in (_remote_ota_rx, state or {}):
+        for row in (src.get('received') or {}).values():
+            if isinstance(row, dict):
+                paths.append(row.get('staged_path'))
+        for p in (src.get('partial') or {}).values():
+            if isinstance(p, dict):
+                paths.append(p.get('path'))
+    paths.append(_remote_ota_resume_path())
+    for p in paths:
+        try:
+            os.remove(p)
+        except Exception:
+            pass
+
+
+def _remote_ota_hello_suffix():
+    """HELLO extension announcing an unfinished OTA session: |OTA:<session>:<done>/<files>."""
+    try:
+        state = _remote_ota_resume_state()
+        if not state:
+            return ''
+        return '|OTA:%s:%d/%d' % (state['session'], len(state.get('received') or {}), len(state.get('files') or {}))
+    except Exception:
+        return ''
+
+
+def _remote_ota_resume_payload():
+    """OTA_RESUME burst payload: finished files and the chunk bitmaps of partial ones."""
+    state = _remote_ota_resume_state()
+    if not state:
+        return None
+    done = {}
+    for n, row in (state.get('received') or {}).items():
+        if isinstance(row, dict):
+            done[n] = row.get('sha256')
+    partial = {}
+    for n, p in (state.get('partial') or {}).items():
+        if isinstance(p, dict):
+            partial[n] = {'sha256': p.get('sha256'), 'step': p.get('step'), 'total': p.get('total'), 'map': p.get('map')}
+    return {'session': state['session'], 'version': state.get('version'), 'done': done, 'partial': partial}
+
+
+def _remote_ota_stream_open(session, name, expected_sha, head):
+    """LORA_OTA_FILE header of a streamed file: continue the partial file, or pre-size a new one."""
+    step = _safe_int(head.get('step'), 0)
+    total = _safe_int(head.get('chunks'), 0)
+    size = _safe_int(head.get('size'), 0)
+    s = _remote_ota_rx['partial'].get(name)
+    if not (head.get('resume') and s and s['sha256'] == expected_sha and s['step'] == step and s['total'] == total):
+        staged_path = _remote_ota_stage_path(session, name)
+        _ensure_dir(staged_path)
+        zero = bytes(512)
+        with open(staged_path, 'wb') as wf:
+            left = size
+            while left > 0:
+                n = min(512, left)
+                wf.write(zero if n == 512 else zero[:n])
+                left -= n
+        s = {
+            'name': name,
+            'sha256': expected_sha,
+            'path': staged_path,
+            'size': size,
+            'step': step,
+            'total': total,
+            'fec': _safe_int(head.get('fec'), 0),
+            'map': bytearray((total + 7) // 8),
+            'hashed': 0,
+            'h': uhashlib.sha256(),
+            'dirty': 0,
+        }
+        _remote_ota_rx['partial'][name] = s
+        _remote_ota_rx['received'].pop(name, None)
+        _remote_ota_resume_save()
+    _remote_ota_rx['stream'] = name
+    return True
+
+
+async def _remote_ota_stream_fail(s, why):
+    await log_error(f'remote ota {why} {s.get("name")}')
+    _remote_ota_rx['partial'].pop(s['name'], None)
+    if _remote_ota_rx.get('stream') == s['name']:
+        _remote_ota_rx['stream'] = None
+    try:
+        os.remove(s.get('path'))
+    except Exception:
+        pass
+    _remote_ota_resume_save()
+    return False
+
+
+async def _remote_ota_stream_put(s, idx, raw):
+    """Write chunk idx at its offset, mark it in the bitmap and advance the hash."""
+    if idx < 0 or idx >= s['total'] or _ota_bit(s['map'], idx):
+        return True
+    with open(s['path'], 'r+b') as wf:
+        wf.seek(idx * s['step'])
+        wf.write(raw)
+    s['map'][idx >> 3] |= 1 << (idx & 7)
+    s['dirty'] += 1
+    # Hash the chunks on flash that now follow the hashed prefix (after a resume the prefix is
+    # hashed again from flash first).
+    if s['h'] is None:
+        s['h'] = uhashlib.sha256()
+        s['hashed'] = 0
+    i = s['hashed']
+    if i < s['total'] and _ota_bit(s['map'], i):
+        with open(s['path'], 'rb') as rf:
+            rf.seek(i * s['step'])
+            while i < s['total'] and _ota_bit(s['map'], i):
+                s['h'].update(rf.read(s['step']))
+                i += 1
+        s['hashed'] = i
+    if i < s['total']:
+        if s['dirty'] >= max(1, _safe_int(getattr(settings, 'LORA_OTA_RESUME_SAVE_EVERY', 16), 16)):
+            _remote_ota_resume_save()
+        return True
+    got_sha = _ub.hexlify(s['h'].digest()).decode().lower()
+    if got_sha != s['sha256']:
+        return await _remote_ota_stream_fail(s, 'sha mismatch')
+    _remote_ota_rx['received'][s['name']] = {
+        'sha256': s['sha256'],
+        'staged_path': s['path'],
+    }
+    _remote_ota_rx['partial'].pop(s['name'], None)
+    if _remote_ota_rx.get('stream') == s['name']:
+        _remote_ota_rx['stream'] = None
+    _remote_ota_resume_save()
+    await debug_print(f"Remote: OTA file {s['name']} staged ({s['size']} B)", 'OTA')
+    return True
+
+
+async def _remote_ota_stream_rx(msg_type, chunk_info, data_b64, msg_str):
+    """LORA_OTA_DATA chunk or parity for the file announced by the last LORA_OTA_FILE header."""
+    s = _remote_ota_rx['partial'].get(_remote_ota_rx.get('stream') or '')
+    if not isinstance(s, dict):
+        return False
+    if msg_type.endswith('_PARITY'):
+        fec = _parse_fec_field(msg_str)
+        if not fec or not s['fec']:
+            return True
+        g, k, total, last_len = fec
+        if total != s['total']:
+            return True
+        start = g * k
+        end = min(total, start + k)
+        # The group's chunks are read back from flash, not kept in RAM.
+        chunks = {}
+        with open(s['path'], 'rb') as rf:
+            for i in range(start, end):
+                if _ota_bit(s['map'], i):
+                    rf.seek(i * s['step'])
+                    chunks[i] = rf.read(s['step'])
+        if len(chunks) != end - start - 1:
+            return True
+        rec = _fec_recover(chunks, g, k, total, last_len, _ub.a2b_base64(str(data_b64).encode()))
+        chunks = None
+        if rec is None:
+            return True
+        await debug_print(f"FEC recovered LORA_OTA_DATA chunk {rec[0]}/{total}", "REMOTE_NODE")
+        return await _remote_ota_stream_put(s, rec[0], rec[1])
+    try:
+        cn, total = map(int, str(chunk_info or '0/0').split('/'))
+    except Exception:
+        return False
+    if total != s['total']:
+        return False
+    return await _remote_ota_stream_put(s, cn, _ub.a2b_base64(str(data_b64).encode()))
+
+
 async def _remote_handle_lora_ota_wire_message(msg_str):
     msg_type, uid, chunk_info, data_b64 = _remote_parse_type_message(msg_str)
     my_uid = str(getattr(settings, 'UNIT_ID', '') or '')
-    if not msg_type or uid != my_uid:
+    bcast = _remote_ota_bcast.get('session')
+    if not msg_type or not (uid == my_uid or (uid == '*' and bcast)):
         return False
     if not msg_type.startswith('LORA_OTA_'):
         return False
+    if uid == '*' and msg_type.startswith('LORA_OTA_DATA') and _remote_ota_rx.get('session') != bcast:
+        return False
+    if msg_type.startswith('LORA_OTA_DATA'):
+        return await _remote_ota_stream_rx(msg_type, chunk_info, data_b64, msg_str)
+
+    if msg_type.endswith('_PARITY'):
+        fec = _parse_fec_field(msg_str)
+        slot = _remote_ota_rx['chunks'].get(msg_type[:-7])
+        rec = _fec_recover_b64(slot['parts'], fec, data_b64) if fec and slot else None
+        if rec is None:
+            return True
+        await debug_print(f"FEC recovered {msg_type[:-7]} chunk {rec[0]}/{fec[2]}", "REMOTE_NODE")
+        msg_type = msg_type[:-7] + '_CHUNK'
+        chunk_info = '%d/%d' % (rec[0], fec[2])
+        data_b64 = rec[1]
 
     base_type = msg_type[:-6] if msg_type.endswith('_CHUNK') else msg_type
     if msg_type.endswith('_CHUNK'):
@@ -639,9 +1151,15 @@ async def _remote_handle_lora_ota_wire_message(msg_str):
         except Exception:
             pass
         payload = _remote_decode_json_b64(assembled_b64)
-        return await _remote_handle_lora_ota_payload(base_type, payload)
-
-    payload = _remote_decode_json_b64(data_b64)
+    else:
+        payload = _remote_decode_json_b64(data_b64)
+    if uid == '*' and (not isinstance(payload, dict) or str(payload.get('session') or '') != bcast):
+        # Broadcast for a campaign this remote was not enrolled in.
+        return False
+    if base_type == 'LORA_OTA_END':
+        _remote_ota_bcast['ended'] = True
+        _remote_ota_resume_save()
+        return True
     return await _remote_handle_lora_ota_payload(base_type, payload)
 
 async def display_message(msg, duration=1.5):
@@ -748,17 +1266,269 @@ async def hard_reset_lora():
     await asyncio.sleep_ms(500)
     await debug_print("Hard reset sequence complete", "LORA")
 
+def _rx_irq_active():
+    return _rx_flag is not None and lora is not None and hasattr(lora, 'recvInto')
+
+
+def _attach_rx_irq():
+    """Route DIO1 to the RX ring; returns False when the RX_DONE poll path is used instead."""
+    global _rx_flag, _rx_ready, _rx_ring, _rx_lens, _rx_head, _rx_count, _rx_pump_started
+    if not bool(getattr(settings, 'LORA_IRQ_RX', True)) or lora is None or not hasattr(lora, 'setRxFlag'):
+        _rx_flag = None
+        return False
+    try:
+        if _rx_ready is None:
+            _rx_ready = asyncio.Event()
+        flag = _rx_flag or asyncio.ThreadSafeFlag()
+        if _rx_ring is None:
+            slots = max(2, _safe_int(getattr(settings, 'LORA_RX_RING_SLOTS', 8), 8))
+            _rx_ring = [bytearray(256) for _ in range(slots)]
+            _rx_lens = [0] * slots
+        _rx_head = 0
+        _rx_count = 0
+        lora.setRxFlag(flag)
+        _rx_flag = flag
+        if not _rx_pump_started:
+            _rx_pump_started = True
+            asyncio.create_task(_rx_pump())
+        return True
+    except Exception:
+        _rx_flag = None
+        return False
+
+
+async def _rx_pump():
+    """Copy each received frame into the ring when DIO1 fires."""
+    global _rx_head, _rx_count
+    while True:
+        flag = _rx_flag
+        if flag is None:
+            await asyncio.sleep_ms(200)
+            continue
+        await flag.wait()
+        radio = lora
+        if radio is None or not hasattr(radio, 'recvInto'):
+            continue
+        try:
+            # DIO1 also rises on TX_DONE; only RX_DONE has a frame to read.
+            if not (radio._events() & radio.RX_DONE):
+                continue
+            slots = len(_rx_ring)
+            if _rx_count >= slots:
+                _rx_head = (_rx_head + 1) % slots
+                _rx_count -= 1
+                _rx_stats['dropped'] += 1
+            idx = (_rx_head + _rx_count) % slots
+            n, err = radio.recvInto(_rx_ring[idx])
+            if err == 0 and n:
+                _rx_lens[idx] = n
+                _rx_count += 1
+                _rx_stats['frames'] += 1
+                _rx_ready.set()
+            else:
+                _rx_stats['errors'] += 1
+        except Exception:
+            _rx_stats['errors'] += 1
+
+
+def _rx_pop():
+    global _rx_head, _rx_count
+    if not _rx_count:
+        return None
+    idx = _rx_head
+    msg = bytes(memoryview(_rx_ring[idx])[:_rx_lens[idx]])
+    _rx_head = (idx + 1) % len(_rx_ring)
+    _rx_count -= 1
+    return msg
+
+
+async def lora_recv(timeout_ms=0):
+    """Return the next received frame as (msg, err); (None, -1) if none arrived in timeout_ms.
+
+    With the DIO1 ring active frames come from the ring and the wait is on the IRQ, otherwise
+    RX_DONE is polled every 25 ms as before.
+    """
+    if _rx_irq_active():
+        msg = _rx_pop()
+        if msg is None and timeout_ms > 0:
+            _rx_ready.clear()
+            try:
+                await asyncio.wait_for(_rx_ready.wait(), timeout_ms / 1000)
+            except asyncio.TimeoutError:
+                # A latched RX_DONE without a rising edge (e.g. raised while re-arming) is
+                # handed to the pump rather than left to block the radio.
+                try:
+                    if lora._events() & lora.RX_DONE:
+                        _rx_flag.set()
+                except Exception:
+                    pass
+            msg = _rx_pop()
+        return (msg, 0) if msg is not None else (None, -1)
+    waited = 0
+    while True:
+        radio = lora
+        try:
+            if radio is not None and hasattr(radio, '_events') and (radio._events() & radio.RX_DONE):
+                try:
+                    return radio.recv()
+                except TypeError:
+                    return radio.recv(0)
+        except Exception:
+            return None, -1
+        if waited >= timeout_ms:
+            return None, -1
+        await asyncio.sleep_ms(25)
+        waited += 25
+
+
+def get_rx_stats():
+    out = dict(_rx_stats)
+    out['irq'] = _rx_irq_active()
+    out['queued'] = _rx_count
+    return out
+
+
 async def ensure_lora_listening():
     global lora
     if lora is None or not hasattr(lora, 'recv'):
         return False
     try:
+        if _rx_irq_active():
+            # Never discard a frame the pump has not read yet; otherwise just re-arm RX.
+            if lora._events() & lora.RX_DONE:
+                _rx_flag.set()
+            else:
+                lora.startReceive()
+            return True
         lora.recv(0, False, 0)
         return True
     except Exception:
         lora = None
         return False
 
+
+# ---------------------------------------------------------------------------
+# Adaptive data rate (LORA_ADR_*)
+# ---------------------------------------------------------------------------
+# HELLO and READY always go out on the configured SF/BW. The hub smooths each remote's HELLO
+# SNR (st['adr_snr']) and offers the first LORA_ADR_RATES entry that is faster than SF/BW and
+# still clears that SF's demodulation floor by LORA_ADR_MARGIN_DB; a wider channel costs
+# 10*log10(bw/BW) dB of SNR. The remote switches after READY and back when its session ends.
+# The hub switches after sending READY and only hears that rate until the final ACK, or until
+# LORA_ADR_HOLD_S passes without a frame; such a session adds 3 dB of margin for that remote
+# (up to 3 times), and each completed one takes 3 dB off again. A remote always follows an
+# offer, so LORA_ADR_ENABLED on the hub alone decides whether rates change.
+_ADR_SNR_FLOOR = {5: -2.5, 6: -5.0, 7: -7.5, 8: -10.0, 9: -12.5, 10: -15.0, 11: -17.5, 12: -20.0}
+_lora_rate = None
+_adr_session = None
+_dr_offer = None
+
+
+def _default_rate():
+    return int(getattr(settings, 'SF', 10)), float(getattr(settings, 'BW', 125.0))
+
+
+async def _lora_set_rate(sf=None, bw=None):
+    """Retune the modem to sf/bw (no arguments: back to SF/BW) and re-arm RX."""
+    global _lora_rate
+    if lora is None or not hasattr(lora, 'setSpreadingFactor'):
+        return False
+    rate = _default_rate() if sf is None else (int(sf), float(bw))
+    try:
+        if hasattr(lora, 'standby'):
+            lora.standby()
+        ok = lora.setSpreadingFactor(rate[0]) == 0 and lora.setBandwidth(rate[1]) == 0
+    except Exception as e:
+        await debug_print('LoRa rate change to SF%d/%g failed: %s' % (rate[0], rate[1], e), 'WARN')
+        ok = False
+    if ok:
+        _lora_rate = None if rate == _default_rate() else rate
+    elif sf is not None:
+        return await _lora_set_rate() and False
+    await ensure_lora_listening()
+    return ok
+
+
+def _adr_note_link(st):
+    """Hub: fold the SNR of the HELLO just received into the remote's smoothed link estimate."""
+    try:
+        snr = float(lora.getSNR())
+    except Exception:
+        return
+    prev = st.get('adr_snr')
+    st['adr_snr'] = snr if prev is None else round(0.7 * prev + 0.3 * snr, 2)
+    st['snr'] = snr
+
+
+def _adr_pick(st):
+    """(sf, bw) to offer a remote for its data phase, or None to stay on SF/BW."""
+    if not bool(getattr(settings, 'LORA_ADR_ENABLED', True)) or st.get('adr_snr') is None:
+        return None
+    snr = min(st['adr_snr'], st.get('snr', st['adr_snr']))
+    sf0, bw0 = _default_rate()
+    margin = float(getattr(settings, 'LORA_ADR_MARGIN_DB', 8)) + 3.0 * min(3, _safe_int(st.get('adr_fail'), 0))
+    for rate in getattr(settings, 'LORA_ADR_RATES', ()) or ():
+        try:
+            sf, bw = int(rate[0]), float(rate[1])
+        except Exception:
+            continue
+        if (1 << sf) / bw >= (1 << sf0) / bw0:
+            continue
+        if snr - 10.0 * math.log(bw / bw0) / math.log(10) - margin >= _ADR_SNR_FLOOR.get(sf, 0.0):
+            return sf, bw
+    return None
+
+
+def _ready_dr_suffix(st):
+    rate = _adr_pick(st)
+    return ':DR:%d:%g' % rate if rate else ''
+
+
+def _dr_from_parts(parts):
+    try:
+        if 'DR' in parts:
+            i = parts.index('DR')
+            return int(parts[i + 1]), float(parts[i + 2])
+    except Exception:
+        pass
+    return None
+
+
+async def _adr_begin(remote_uid, ready):
+    """Hub: after READY went out, listen on the rate it offered until the session ends."""
+    global _adr_session
+    rate = _dr_from_parts(ready.split(':'))
+    if rate is None:
+        return
+    if await _lora_set_rate(*rate):
+        _adr_session = [remote_uid, time.time() + _safe_int(getattr(settings, 'LORA_ADR_HOLD_S', 20), 20)]
+        await debug_print('ADR: %s data phase on SF%d/%g' % (remote_uid, rate[0], rate[1]), 'BASE_NODE')
+
+
+async def _adr_end(remote_uid, ok=True):
+    """Hub: the session on the offered rate finished (ok) or went silent; back to SF/BW."""
+    global _adr_session
+    if _adr_session is None or _adr_session[0] != remote_uid:
+        return
+    _adr_session = None
+    st = getattr(settings, 'REMOTE_NODE_INFO', {}).get(remote_uid)
+    if isinstance(st, dict):
+        fails = _safe_int(st.get('adr_fail'), 0)
+        st['adr_fail'] = max(0, fails - 1) if ok else min(3, fails + 1)
+    await _lora_set_rate()
+
+
+def _adr_touch(remote_uid):
+    """An authenticated frame from remote_uid arrived; only the ADR session's own remote extends its hold."""
+    if _adr_session is not None and remote_uid and _adr_session[0] == str(remote_uid):
+        _adr_session[1] = time.time() + _safe_int(getattr(settings, 'LORA_ADR_HOLD_S', 20), 20)
+
+
+async def _adr_expire():
+    if _adr_session is not None and time.time() > _adr_session[1]:
+        await debug_print('ADR: %s went silent on the offered rate; back to SF/BW' % _adr_session[0], 'WARN')
+        await _adr_end(_adr_session[0], ok=False)
+
 async def init_lora():
     global lora
     await debug_print("LoRa bulletproof init sequence (v2.01.6)", "LORA")
@@ -789,6 +1559,8 @@ async def init_lora():
             await debug_print(f'begin() attempt {attempt+1}: status {status}', 'LORA')
             if status == 0:
                 lora.setBlockingCallback(False)
+                if _attach_rx_irq():
+                    await debug_print("LoRa RX: DIO1 interrupt mode", "LORA")
                 await ensure_lora_listening()
                 await debug_print("LoRa initialized successfully", "LORA")
                 await display_message("LoRa OK", 1.5)
@@ -807,6 +1579,7 @@ async def init_lora():
     await free_pins()
     lora = None
     if machine and hasattr(machine, 'reset'):
+        flush_remote_node_info(force=True)
         await asyncio.sleep(1)
         machine.reset()
     return False
@@ -817,21 +1590,72 @@ command_handlers = {
 
 REMOTE_NODE_INFO_FILE = getattr(settings, 'REMOTE_NODE_INFO_FILE', settings.LOG_DIR + '/remote_node_info.json')
 
+# REMOTE_NODE_INFO is written behind: save_remote_node_info() only marks it dirty and
+# flush_remote_node_info() rewrites the file (atomically) at most every
+# LORA_NODE_INFO_FLUSH_S seconds from the LoRa loop, or right away when forced (uid index
+# assignment, reboot/OTA apply). Burst/session keys are never written.
+_RNI_TRANSIENT = ('types', 'data', 'chunks', 'last_rx', 'chunk_total', 'batch_id', 'chunk_first_ts',
+                  'last_chunk_ts', 'session_active', 'saw_end', 'nack_rounds', 'fec_parity')
+_rni_dirty = set()
+_rni_flushed_ts = 0
+_rni_stats = {'marked': 0, 'flushes': 0, 'errors': 0}
+
+
 def load_remote_node_info():
-    try:
-        with open(REMOTE_NODE_INFO_FILE, 'r') as f:
-            settings.REMOTE_NODE_INFO = ujson.load(f)
-    except Exception:
-        settings.REMOTE_NODE_INFO = {}
+    info = None
+    for path in (REMOTE_NODE_INFO_FILE, REMOTE_NODE_INFO_FILE + '.tmp'):
+        try:
+            with open(path, 'r') as f:
+                info = ujson.load(f)
+            break
+        except Exception:
+            pass
+    settings.REMOTE_NODE_INFO = info if isinstance(info, dict) else {}
 
 load_remote_node_info()
 
-def save_remote_node_info():
+def save_remote_node_info(uid=None, force=False):
+    """Mark REMOTE_NODE_INFO (uid's entry, or all of it) for the next write-behind flush."""
+    _rni_dirty.add(str(uid) if uid is not None else '*')
+    _rni_stats['marked'] += 1
+    if force:
+        flush_remote_node_info(force=True)
+
+
+def flush_remote_node_info(force=False):
+    """Write REMOTE_NODE_INFO if it changed and the flush interval passed (or force)."""
+    global _rni_flushed_ts
+    if force:
+        _save_counters()
+    if not _rni_dirty:
+        return False
+    now = time.time()
+    if not force and now - _rni_flushed_ts < _safe_int(getattr(settings, 'LORA_NODE_INFO_FLUSH_S', 120), 120):
+        return False
+    out = {}
     try:
-        with open(REMOTE_NODE_INFO_FILE, 'w') as f:
-            ujson.dump(settings.REMOTE_NODE_INFO, f)
+        for uid, node in (getattr(settings, 'REMOTE_NODE_INFO', None) or {}).items():
+            if isinstance(node, dict):
+                out[uid] = {k: v for k, v in node.items() if k not in _RNI_TRANSIENT and not isinstance(v, set)}
+        from config_persist import write_json_atomic
+        ok = write_json_atomic(REMOTE_NODE_INFO_FILE, out)
     except Exception:
-        pass
+        ok = False
+    _rni_flushed_ts = now
+    if ok:
+        _rni_dirty.clear()
+        _rni_stats['flushes'] += 1
+    else:
+        _rni_stats['errors'] += 1
+    return ok
+
+
+def get_node_info_stats():
+    """Write-behind counters for diagnostics (marks vs. actual flash rewrites)."""
+    out = dict(_rni_stats)
+    out['dirty'] = len(_rni_dirty)
+    out['last_flush_ts'] = int(_rni_flushed_ts)
+    return out
 
 async def proxy_register_for_remote(remote_uid, remote_machine_id):
     if not register_with_wp:
@@ -885,8 +1709,8 @@ async def process_remote_burst(uid, st):
     ack_delay = None
     ack_msg = None
 
-    if 'TS' in st['types']:
-        data = st['data']['TS']
+    if 'TS' in st.types:
+        data = st.data['TS']
         remote_ts = data.get('remote_ts')
         remote_company = data.get('remote_company')
         remote_site = data.get('remote_site')
@@ -909,10 +1733,32 @@ async def process_remote_burst(uid, st):
                 'MACHINE_ID': remote_machine_id,
                 'last_temp_f': temp_f,
             })
-            save_remote_node_info()
+            save_remote_node_info(uid)
 
-    if uid:
-        pending_cmd = None
+    # Stage any OTA job before the ACK so the ACK announces this check-in's session.
+    remote_ota_stream = False
+    if 'SETTINGS' in st.types:
+        settings_dict = st.data['SETTINGS']
+        stage_remote_files(uid, {'settings.py': ujson.dumps(settings_dict).encode()})
+        try:
+            remote_fw_version = str(settings_dict.get('FIRMWARE_VERSION') or '').strip()
+            remote_ota_stream = bool(settings_dict.get('LORA_OTA_STREAM'))
+        except Exception:
+            remote_fw_version = None
+
+    try:
+        ota_session_id = _stage_remote_lora_ota_job(uid, remote_fw_version, stream=remote_ota_stream,
+                                                    resume=st.data.get('OTA_RESUME'))
+        if ota_session_id:
+            await debug_print(
+                f"LoRa OTA staged for {uid}: {remote_fw_version} -> {getattr(settings, 'FIRMWARE_VERSION', '')}",
+                "OTA"
+            )
+    except Exception as ota_stage_e:
+        await log_error(f"LoRa OTA stage error for {uid}: {ota_stage_e}")
+
+    if uid:
+        pending_cmd = None
         try:
             pending_cmd = await _fetch_remote_pending_command(uid, remote_machine_id)
         except Exception as cmd_fetch_e:
@@ -928,6 +1774,8 @@ async def process_remote_burst(uid, st):
             ota_session_hint = _remote_lora_ota_jobs.get(uid)
             if isinstance(ota_session_hint, dict) and ota_session_hint.get('session'):
                 ack_msg += f":OTA:{ota_session_hint.get('session')}:VER:{getattr(settings, 'FIRMWARE_VERSION', '')}"
+                if ota_session_hint.get('bcast') and _ota_bcast is not None:
+                    ack_msg += ':AT:%d' % max(1, int(_ota_bcast['start'] - time.time()))
         except Exception:
             pass
 
@@ -936,11 +1784,11 @@ async def process_remote_burst(uid, st):
             settings.REMOTE_NODE_INFO[uid] = {}
         settings.REMOTE_NODE_INFO[uid]['next_expected'] = now + ack_delay
         settings.REMOTE_NODE_INFO[uid]['missed_syncs'] = 0
-        save_remote_node_info()
+        save_remote_node_info(uid)
 
         try:
             ack_msg = await _secure_message(ack_msg, remote_uid=uid)
-            await _safe_send(ack_msg.encode(), remote_uid=uid)
+            await _safe_send(ack_msg.encode(), remote_uid=uid, prio='high')
             await debug_print(f"Sent ACK with next delay {ack_delay}s to {uid}", "BASE_NODE")
             try:
                 from oled import display_message
@@ -973,26 +1821,8 @@ async def process_remote_burst(uid, st):
             await findLowestHumid(humid_val)
             await findHighestHumid(humid_val)
 
-    if 'SETTINGS' in st['types']:
-        settings_dict = st['data']['SETTINGS']
-        stage_remote_files(uid, {'settings.py': ujson.dumps(settings_dict).encode()})
-        try:
-            remote_fw_version = str(settings_dict.get('FIRMWARE_VERSION') or '').strip()
-        except Exception:
-            remote_fw_version = None
-
-    try:
-        ota_session_id = _stage_remote_lora_ota_job(uid, remote_fw_version)
-        if ota_session_id:
-            await debug_print(
-                f"LoRa OTA staged for {uid}: {remote_fw_version} -> {getattr(settings, 'FIRMWARE_VERSION', '')}",
-                "OTA"
-            )
-    except Exception as ota_stage_e:
-        await log_error(f"LoRa OTA stage error for {uid}: {ota_stage_e}")
-
-    if 'SDATA' in st['types']:
-        sdata_dict = st['data']['SDATA']
+    if 'SDATA' in st.types:
+        sdata_dict = st.data['SDATA']
         stage_remote_field_data(uid, [sdata_dict])
 
     if ota_session_id:
@@ -1002,26 +1832,31 @@ async def process_remote_burst(uid, st):
             await log_error(f"LoRa OTA send error to {uid}: {ota_send_e}")
 
     # Proxy HTTP calls AFTER ACK
-    if 'TS' in st['types'] and remote_machine_id:
+    if 'TS' in st.types and remote_machine_id:
         await proxy_register_for_remote(uid, remote_machine_id)
 
-    # Cleanup ONLY temporary burst tracking keys - KEEP persistent info (next_expected, missed_syncs, COMPANY, etc.)
-    if uid in settings.REMOTE_NODE_INFO:
-        for temp_key in ('types', 'data', 'chunks', 'last_rx'):
-            settings.REMOTE_NODE_INFO[uid].pop(temp_key, None)
-        save_remote_node_info()
+    # Burst consumed; persistent info (next_expected, missed_syncs, COMPANY, etc.) lives in REMOTE_NODE_INFO.
+    st.clear_burst()
 
 
-async def process_remote_field_data(uid, st):
+async def process_remote_field_data(uid, st, send_ack=True):
     """
     Process a fully assembled FIELD_DATA payload from a remote node,
-    stage the records, and send an ACK with the next sync delay.
+    stage the records, and send an ACK with the next sync delay
+    (send_ack=False when the caller acknowledges the session itself).
     """
     try:
-        payload = st.get('data', {}).get('FIELD_DATA')
+        payload = st.data.get('FIELD_DATA')
+        try:
+            import payload_codec
+            payload_codec.decode_batch(payload)
+        except Exception:
+            pass
 
         defaults = {}
         batch_id = None
+        # Store-and-forward remotes batch several samples and check in only every n-th slot.
+        every = max(1, _safe_int(payload.get('every'), 1)) if isinstance(payload, dict) else 1
         if isinstance(payload, dict) and 'data' in payload:
             records = payload.get('data')
             batch_id = payload.get('batch_id')
@@ -1057,37 +1892,41 @@ async def process_remote_field_data(uid, st):
                 now = time.time()
                 if uid not in settings.REMOTE_NODE_INFO:
                     settings.REMOTE_NODE_INFO[uid] = {}
-                settings.REMOTE_NODE_INFO[uid]['next_expected'] = now + next_delay
+                cycle = lora_slots.cycle_s() if getattr(settings, 'LORA_TDMA_ENABLED', True) else next_delay
+                settings.REMOTE_NODE_INFO[uid]['next_expected'] = now + next_delay + (every - 1) * cycle
                 settings.REMOTE_NODE_INFO[uid]['missed_syncs'] = 0
+                settings.REMOTE_NODE_INFO[uid]['every'] = every
+                lora_slots.set_every(uid, every)
                 try:
-                    save_remote_node_info()
+                    save_remote_node_info(uid)
                 except Exception:
                     pass
 
                 # Send ACK immediately so the remote can decide whether to sleep.
-                try:
-                    ack_msg = f"ACK:{uid}:NEXT:{next_delay}"
-                    if batch_id:
-                        ack_msg += f":BID:{batch_id}"
-                    ack_msg = await _secure_message(ack_msg, remote_uid=uid)
-                    await _safe_send(ack_msg.encode(), remote_uid=uid)
-                    if batch_id:
-                        await debug_print(
-                            f"Sent FIELD_DATA ACK to {uid} next={next_delay}s bid={batch_id}",
-                            "BASE_NODE"
-                        )
-                    else:
-                        await debug_print(
-                            f"Sent FIELD_DATA ACK with next delay {next_delay}s to {uid}",
-                            "BASE_NODE"
-                        )
+                if send_ack:
                     try:
-                        from oled import display_message
-                        await display_message("ACK Sent", 0.8)
-                    except Exception:
-                        pass
-                except Exception as ack_e:
-                    await log_error(f"FIELD_DATA ACK send error to {uid}: {ack_e}")
+                        ack_msg = f"ACK:{uid}:NEXT:{next_delay}"
+                        if batch_id:
+                            ack_msg += f":BID:{batch_id}"
+                        ack_msg = await _secure_message(ack_msg, remote_uid=uid)
+                        await _safe_send(ack_msg.encode(), remote_uid=uid, prio='high')
+                        if batch_id:
+                            await debug_print(
+                                f"Sent FIELD_DATA ACK to {uid} next={next_delay}s bid={batch_id}",
+                                "BASE_NODE"
+                            )
+                        else:
+                            await debug_print(
+                                f"Sent FIELD_DATA ACK with next delay {next_delay}s to {uid}",
+                                "BASE_NODE"
+                            )
+                        try:
+                            from oled import display_message
+                            await display_message("ACK Sent", 0.8)
+                        except Exception:
+                            pass
+                    except Exception as ack_e:
+                        await log_error(f"FIELD_DATA ACK send error to {uid}: {ack_e}")
 
                 # Stage after ACK so the radio window is not blocked by local IO.
                 try:
@@ -1102,18 +1941,13 @@ async def process_remote_field_data(uid, st):
     finally:
         # Clean up state for this burst
         try:
-            if 'FIELD_DATA' in st.get('types', set()):
-                st['types'].discard('FIELD_DATA')
-            if isinstance(st.get('data'), dict):
-                st['data'].pop('FIELD_DATA', None)
-            if isinstance(st.get('chunks'), dict):
-                st['chunks'].pop('FIELD_DATA', None)
+            st.consume('FIELD_DATA')
         except Exception:
             pass
 
 async def process_remote_state_files(uid, st):
     try:
-        payload = st.get('data', {}).get('STATE_FILES')
+        payload = st.data.get('STATE_FILES')
         if isinstance(payload, dict):
             file_map = payload.get('files') if isinstance(payload.get('files'), dict) else payload
             files = {}
@@ -1131,12 +1965,7 @@ async def process_remote_state_files(uid, st):
     except Exception as e:
         await log_error(f"Remote state file processor error for {uid}: {e}")
     finally:
-        if 'STATE_FILES' in st.get('types', set()):
-            st['types'].discard('STATE_FILES')
-        if isinstance(st.get('data'), dict):
-            st['data'].pop('STATE_FILES', None)
-        if isinstance(st.get('chunks'), dict):
-            st['chunks'].pop('STATE_FILES', None)
+        st.consume('STATE_FILES')
 
 
 async def _send_final_ack(remote_uid, batch_id=None, reason='', remote_machine_id=None):
@@ -1162,7 +1991,7 @@ async def _send_final_ack(remote_uid, batch_id=None, reason='', remote_machine_i
             await log_error(f"Final ACK command piggyback error for {remote_uid}: {cmd_e}")
 
         ack_msg = await _secure_message(ack_msg, remote_uid=remote_uid)
-        await _safe_send(ack_msg.encode(), remote_uid=remote_uid)
+        await _safe_send(ack_msg.encode(), remote_uid=remote_uid, prio='high')
         if reason:
             await debug_print(
                 f"FINAL ACK sent to {remote_uid} (next={next_delay}s, reason={reason})",
@@ -1183,7 +2012,7 @@ async def _send_final_ack(remote_uid, batch_id=None, reason='', remote_machine_i
             st['next_expected'] = now + int(next_delay)
             st['last_sync_ts'] = now
             st['missed_syncs'] = 0
-            save_remote_node_info()
+            save_remote_node_info(remote_uid)
             await debug_print(
                 f"Registered {remote_uid} next_sync in {next_delay}s",
                 "BASE_NODE"
@@ -1200,36 +2029,93 @@ async def _send_final_ack(remote_uid, batch_id=None, reason='', remote_machine_i
 async def _maybe_force_ack_on_silence(remote_uid, st):
     try:
         silent_need = float(getattr(settings, 'LORA_SESSION_SILENCE_S', 5))
-        last = float(st.get('last_chunk_ts') or 0)
+        last = float(st.last_chunk_ts or 0)
         if last <= 0:
             return
         if (time.time() - last) < silent_need:
             return
-        if not st.get('session_active'):
+        if not st.active:
             return
 
-        chunks = (st.get('chunks') or {}).get('FIELD_DATA') or {}
-        if not chunks and not st.get('saw_end'):
+        if 'FIELD_DATA' not in st.assembled:
+            if st.have('FIELD_DATA'):
+                # Partial burst: no ACK, the remote keeps it journaled.
+                await debug_print(f"Silence: dropping partial FIELD_DATA from {remote_uid} ({st.have('FIELD_DATA')}/{st.total('FIELD_DATA')})", "WARN")
+                st.close('FIELD_DATA')
             return
 
-        next_delay = await _send_final_ack(remote_uid, batch_id=st.get('batch_id'), reason='silence')
+        next_delay = await _send_final_ack(remote_uid, batch_id=st.batch_id, reason='silence')
         await debug_print(
             f"Silence ACK to {remote_uid} ok={bool(next_delay)}",
             "BASE_NODE"
         )
-        st['session_active'] = False
-        try:
-            st.get('chunks', {}).pop('FIELD_DATA', None)
-        except Exception:
-            pass
-        st.pop('chunk_first_ts', None)
-        st.pop('last_chunk_ts', None)
-        st.pop('chunk_total', None)
-        st.pop('batch_id', None)
-        st.pop('saw_end', None)
+        st.close('FIELD_DATA')
     except Exception as e:
         await log_error(f"Silence ACK handler error for {remote_uid}: {e}")
 
+def _chunk_bitmap(indices, total):
+    """Hex bitmap with bit i (LSB-first within each byte) set for every chunk index listed."""
+    bm = bytearray((max(1, total) + 7) // 8)
+    for i in indices:
+        if 0 <= i < total:
+            bm[i >> 3] |= 1 << (i & 7)
+    return _ub.hexlify(bm).decode()
+
+
+def _bitmap_chunks(bitmap_hex, total):
+    bm = _ub.unhexlify(bitmap_hex)
+    return [i for i in range(min(total, len(bm) * 8)) if bm[i >> 3] & (1 << (i & 7))]
+
+
+async def _maybe_send_nack(remote_uid, sess, msg_type, total, batch_id=None, nack_ok=False):
+    """Answer END with a missing-chunk bitmap; True when a NACK went out (session stays open)."""
+    if not nack_ok or total <= 0:
+        return False
+    rounds = sess.nack_rounds
+    if rounds >= _safe_int(getattr(settings, 'LORA_NACK_MAX_ROUNDS', 2), 2):
+        return False
+    missing = sess.missing(msg_type, total)
+    if not missing:
+        return False
+    sess.nack_rounds = rounds + 1
+    await _send_nack(remote_uid, missing, total, batch_id, rounds + 1)
+    return True
+
+
+async def _send_nack(remote_uid, missing, total, batch_id, round_no):
+    nack = 'NACK:%s:MISS:%s' % (remote_uid, _chunk_bitmap(missing, total))
+    if batch_id:
+        nack += ':BID:%s' % batch_id
+    try:
+        secured = await _secure_message(nack, remote_uid=remote_uid)
+        ok = await _safe_send(secured.encode() if isinstance(secured, str) else secured, remote_uid=remote_uid, prio='high')
+    except Exception as e:
+        ok = False
+        await debug_print('NACK send error: %s' % e, 'ERROR')
+    await debug_print('NACK to %s missing %d/%d (round %d) ok=%s' % (remote_uid, len(missing), total, round_no, ok), 'BASE_NODE')
+    try:
+        await ensure_lora_listening()
+    except Exception:
+        pass
+
+
+async def _refuse_incomplete(remote_uid, sess, msg_type, total, batch_id=None, nack_ok=False):
+    """END for a burst that could not be assembled after the NACK rounds: never ACK it.
+
+    An ACK makes the remote advance its journal cursor, so the batch would be lost. A remote
+    that takes NACKs gets one more (past its LORA_NACK_MAX_ROUNDS it gives up); one that does
+    not times out waiting for the ACK. Either way the batch stays journaled for its next
+    session. The partial chunks are dropped here.
+    """
+    if nack_ok and total > 0:
+        missing = sess.missing(msg_type, total) or list(range(total))
+        await _send_nack(remote_uid, missing, total, batch_id, sess.nack_rounds + 1)
+    await debug_print('%s from %s incomplete (%d/%d chunks); not acknowledged' % (
+        msg_type, remote_uid, sess.have(msg_type), total), 'WARN')
+    sess.close(msg_type)
+    await _adr_end(remote_uid, ok=False)
+
+
 async def base_packet_processor():
     global last_lora_activity_ts
     while True:
@@ -1242,21 +2128,24 @@ async def base_packet_processor():
             current_time = time.time()
             handled_field_data = False
 
-            if uid not in settings.REMOTE_NODE_INFO:
-                settings.REMOTE_NODE_INFO[uid] = {'types': set(), 'last_rx': current_time, 'data': {}, 'chunks': {}}
-            st = settings.REMOTE_NODE_INFO[uid]
+            st = lora_session.get(uid)
 
             orig_type = packet_type[:-6] if packet_type.endswith('_CHUNK') else packet_type
             if packet_type == 'HELLO':
                 remote_uid = str(parsed_data or uid or '').strip()
+                hello_ext = ''
                 try:
-                    remote_uid = remote_uid.split(':', 1)[-1].strip().split('|')[0].strip()
+                    remote_uid, hello_ext = (remote_uid.split('|', 1) + [''])[:2]
+                    remote_uid = remote_uid.split(':', 1)[-1].strip()
                 except Exception:
                     pass
                 if not remote_uid:
                     remote_uid = str(uid or 'unknown').strip()
 
                 await debug_print(f"HELLO from {remote_uid}", "BASE_NODE")
+                if hello_ext.startswith('OTA:'):
+                    # Unfinished OTA session on the remote: OTA:<session>:<files done>/<files>.
+                    await debug_print(f"{remote_uid} has a partial OTA ({hello_ext[4:]}); resuming after its burst", "OTA")
 
                 if not hasattr(settings, 'REMOTE_NODE_INFO') or settings.REMOTE_NODE_INFO is None:
                     settings.REMOTE_NODE_INFO = {}
@@ -1266,14 +2155,11 @@ async def base_packet_processor():
 
                 now = time.time()
                 st['last_hello_ts'] = now
-                st['last_rx'] = now
-                st['session_active'] = True
-                st['saw_end'] = False
-                st['chunks'] = {'FIELD_DATA': {}}
                 st['base_uid'] = str(getattr(settings, 'UNIT_ID', '') or '')
-                st['chunk_first_ts'] = now
-                st['last_chunk_ts'] = now
                 st['missed_syncs'] = 0
+                sess = lora_session.get(remote_uid)
+                sess.begin(now)
+                sess.last_chunk_ts = now
                 try:
                     if not hasattr(settings, 'LORA_PEER_COUNTERS') or settings.LORA_PEER_COUNTERS is None:
                         settings.LORA_PEER_COUNTERS = {}
@@ -1281,16 +2167,16 @@ async def base_packet_processor():
                 except Exception:
                     pass
                 try:
-                    save_remote_node_info()
+                    save_remote_node_info(remote_uid)
                 except Exception:
                     pass
 
                 try:
                     chunk_sz = int(getattr(settings, 'LORA_CHUNK_SIZE', 100) or 100)
                     base_uid = str(getattr(settings, 'UNIT_ID', '') or '')
-                    ready = f"READY:{remote_uid}:BASE:{base_uid}:CHUNKSZ:{chunk_sz}"
+                    ready = f"READY:{remote_uid}:BASE:{base_uid}:CHUNKSZ:{chunk_sz}" + _ready_binary_suffix(remote_uid)
                     ready = await _secure_message(ready, remote_uid=remote_uid)
-                    ok = await _safe_send(ready.encode(), remote_uid=remote_uid)
+                    ok = await _safe_send(ready.encode(), remote_uid=remote_uid, prio='high')
                     await debug_print(
                         f"READY sent to {remote_uid} ok={ok} chunk={chunk_sz}",
                         "BASE_NODE"
@@ -1308,7 +2194,7 @@ async def base_packet_processor():
                     await log_error(f"READY send FAILED for {remote_uid}: {e}")
 
                 lora_rx_queue.task_done()
-                await _maybe_force_ack_on_silence(remote_uid, st)
+                await _maybe_force_ack_on_silence(remote_uid, sess)
                 gc.collect()
                 continue
 
@@ -1321,8 +2207,17 @@ async def base_packet_processor():
                     f"END from {remote_uid} total={total}",
                     "BASE_NODE"
                 )
-                st['saw_end'] = True
-                st['batch_id'] = batch_id
+                sess = lora_session.get(remote_uid) if remote_uid else st
+                if await _maybe_send_nack(remote_uid, sess, 'FIELD_DATA', total, batch_id, end_info.get('nack')):
+                    sess.last_chunk_ts = time.time()
+                    lora_rx_queue.task_done()
+                    continue
+                if total > 0 and 'FIELD_DATA' not in sess.assembled:
+                    await _refuse_incomplete(remote_uid, sess, 'FIELD_DATA', total, batch_id, end_info.get('nack'))
+                    lora_rx_queue.task_done()
+                    continue
+                sess.saw_end = True
+                sess.batch_id = batch_id
                 next_delay = await _send_final_ack(remote_uid, batch_id=batch_id, reason='end')
                 await debug_print(
                     f"FINAL ACK to {remote_uid} ok={bool(next_delay)} next={int(next_delay or 0)}",
@@ -1333,65 +2228,66 @@ async def base_packet_processor():
                 except Exception:
                     pass
 
-                if remote_uid in settings.REMOTE_NODE_INFO:
-                    rst = settings.REMOTE_NODE_INFO[remote_uid]
-                    rst.get('chunks', {}).pop('FIELD_DATA', None)
-                    rst.pop('chunk_first_ts', None)
-                    rst.pop('last_chunk_ts', None)
-                    rst.pop('chunk_total', None)
-                    rst.pop('batch_id', None)
-                    rst.pop('session_active', None)
-                    rst.pop('saw_end', None)
+                sess.close('FIELD_DATA')
 
                 lora_rx_queue.task_done()
                 gc.collect()
                 continue
 
+            if packet_type.endswith('_PARITY'):
+                # Rebuild the one chunk of the group still missing, then store it like a received one.
+                orig_type = packet_type[:-7]
+                fec = packet.get('fec')
+                rec = None
+                try:
+                    if fec:
+                        rec = _fec_recover_parts(st.chunk_map(orig_type), fec, parsed_data)
+                except Exception as e:
+                    await log_error(f"FEC recovery error for {uid}: {e}")
+                st.last_rx = current_time
+                if rec is None:
+                    lora_rx_queue.task_done()
+                    continue
+                await debug_print(f"FEC recovered {orig_type} chunk {rec[0]}/{fec[2]} from {uid}", "BASE_NODE")
+                packet_type = orig_type + '_CHUNK'
+                parsed_data = rec[1]
+                packet['chunk_info'] = '%d/%d' % (rec[0], fec[2])
+                packet['fec_recovered'] = True
+
             if packet_type.endswith('_CHUNK'):
-                if 'chunks' not in st:
-                    st['chunks'] = {}
-                if orig_type not in st['chunks']:
-                    st['chunks'][orig_type] = {}
                 try:
                     cn, total = map(int, packet.get('chunk_info', '0/0').split('/'))
 
                     # New burst detection: remote restarted chunking from 0, clear stale partials.
-                    if cn == 0 and st.get('chunks', {}).get(orig_type):
-                        st['chunks'][orig_type] = {}
-                        st['chunk_first_ts'] = time.time()
+                    if cn == 0 and st.have(orig_type) and not packet.get('fec_recovered'):
+                        st.drop(orig_type)
                         await debug_print(f"New burst detected for {uid} - cleared old chunks", "BASE_NODE")
 
-                    if orig_type not in st.get('chunks', {}):
-                        st.setdefault('chunks', {})[orig_type] = {}
-                        st['chunk_first_ts'] = time.time()
-
-                    if not st['chunks'][orig_type]:
-                        st['chunk_first_ts'] = time.time()
-                    st['last_chunk_ts'] = time.time()
-                    st['chunk_total'] = total
                     bid = packet.get('batch_id')
                     if bid:
-                        st['batch_id'] = bid
-                    st['chunks'][orig_type][cn] = parsed_data
+                        st.batch_id = bid
+                    if not st.put_chunk(orig_type, cn, total, parsed_data, current_time):
+                        await debug_print(f"Dropped CHUNK {cn}/{total} for {orig_type} from {uid} (session limit)", "WARN")
                     last_lora_activity_ts = time.time()
-                    st['last_rx'] = current_time
 
-                    have = len(st['chunks'][orig_type])
+                    have = st.have(orig_type)
                     await debug_print(
                         f"Stored CHUNK {cn}/{total} for {orig_type} from {uid} (have {have}/{total})",
                         "BASE_NODE"
                     )
 
-                    if have == total and all(k in st['chunks'][orig_type] for k in range(total)):
-                        assembled_b64 = ''.join(st['chunks'][orig_type][j] for j in range(total))
-                        json_data = _ub.a2b_base64(assembled_b64.encode()).decode()
+                    if st.complete(orig_type):
+                        pieces = st.pieces(orig_type)
+                        if isinstance(pieces[0], bytes):
+                            # Binary frames carry the raw JSON bytes.
+                            json_data = b''.join(pieces).decode()
+                        else:
+                            json_data = _ub.a2b_base64(''.join(pieces).encode()).decode()
                         parsed_dict = ujson.loads(json_data)
-                        st['data'][orig_type] = parsed_dict
-                        st['types'].add(orig_type)
-                        del st['chunks'][orig_type]
-                        st.pop('chunk_first_ts', None)
-                        st.pop('chunk_total', None)
-                        st.pop('last_chunk_ts', None)
+                        st.data[orig_type] = parsed_dict
+                        st.types.add(orig_type)
+                        st.assembled.add(orig_type)
+                        st.drop(orig_type)
                         await debug_print(f"FULLY ASSEMBLED {orig_type} ({total} chunks) for {uid}", "BASE_NODE")
                         if orig_type == 'FIELD_DATA':
                             await process_remote_field_data(uid, st)
@@ -1400,12 +2296,12 @@ async def base_packet_processor():
                     await log_error(f"Chunk parse error for {uid}: {e}")
 
             else:
-                st['types'].add(packet_type)
-                st['data'][packet_type] = parsed_data
-                st['last_rx'] = current_time
+                st.types.add(packet_type)
+                st.data[packet_type] = parsed_data
+                st.last_rx = current_time
 
             # Only process FIELD_DATA after it is fully assembled (or non-chunk payload).
-            if orig_type == 'FIELD_DATA' and ('FIELD_DATA' in st.get('types', set())) and not handled_field_data:
+            if orig_type == 'FIELD_DATA' and 'FIELD_DATA' in st.types and not handled_field_data:
                 await process_remote_field_data(uid, st)
             elif orig_type == 'CMD_RESULT':
                 await process_remote_command_result(uid, st)
@@ -1413,15 +2309,14 @@ async def base_packet_processor():
                 await process_remote_state_files(uid, st)
             else:
                 # FULL BURST PROCESSING: only after ALL three expected types are present (or silence timeout)
-                full_burst = all(t in st['types'] for t in ('TS', 'SETTINGS', 'SDATA'))
-                if full_burst or (current_time - st['last_rx'] > 12):
+                full_burst = all(t in st.types for t in ('TS', 'SETTINGS', 'SDATA'))
+                if full_burst or (current_time - st.last_rx > 12):
                     await process_remote_burst(uid, st)
 
-            # Cleanup old partial bursts (prevent memory leak) - safe even if keys were popped in process_remote_burst
-            chunks_dict = st.get('chunks', {})
-            for t in list(chunks_dict):
-                if current_time - st.get('last_rx', 0) > 60:
-                    del chunks_dict[t]
+            # Cleanup old partial bursts (prevent memory leak) - safe even after process_remote_burst
+            for t in list(st.parts):
+                if current_time - st.last_rx > 60:
+                    st.drop(t)
                     await debug_print(f"Discarded partial {t} chunks for {uid} (timeout)", "BASE_NODE")
 
             await _maybe_force_ack_on_silence(uid, st)
@@ -1437,15 +2332,12 @@ async def check_incomplete_bursts():
     while True:
         try:
             now = time.time()
-            info = getattr(settings, 'REMOTE_NODE_INFO', {})
-            for uid, st in list(info.items()):
-                if not isinstance(st, dict):
-                    continue
-                field_chunks = (st.get('chunks') or {}).get('FIELD_DATA')
-                if not isinstance(field_chunks, dict) or not field_chunks:
+            for st in lora_session.sessions():
+                uid = st.uid
+                if not st.have('FIELD_DATA'):
                     continue
 
-                last_ts = float(st.get('last_chunk_ts') or 0)
+                last_ts = float(st.last_chunk_ts or 0)
                 if last_ts == 0:
                     continue
 
@@ -1453,23 +2345,36 @@ async def check_incomplete_bursts():
 
                 silence_limit = float(getattr(settings, 'LORA_SESSION_SILENCE_S', 4) or 4)
 
-                # Force ACK after short session silence.
+                # After short session silence (END lost): ACK a complete burst, drop a partial one.
                 if silent >= silence_limit:
-                    have = len(field_chunks)
-                    total = int(st.get('chunk_total') or 0)
-                    batch_id = st.get('batch_id')
+                    have = st.have('FIELD_DATA')
+                    total = st.total('FIELD_DATA')
+                    batch_id = st.batch_id
+                    payload = None
+                    try:
+                        payload = _assemble_simple_chunks(st)
+                    except Exception:
+                        payload = None
+                    if payload is None:
+                        # Never ACK a partial burst: the remote would advance past undelivered data.
+                        await debug_print(
+                            f"Dropping partial FIELD_DATA {uid} after {silent:.0f}s silence "
+                            f"(have {have}/{total}); not acknowledged", "WARN"
+                        )
+                        st.close('FIELD_DATA')
+                        continue
                     await debug_print(
                         f"FORCING ACK {uid} after {silent:.0f}s silence "
                         f"(have {have}/{total})", "BASE_NODE"
                     )
+                    try:
+                        await process_remote_field_data(uid, st, send_ack=False)
+                    except Exception as e:
+                        await debug_print(f"field process skip: {e}", "WARN")
                     await _send_final_ack(uid, batch_id=batch_id, reason='checker')
 
                     # Clear so we don't keep firing
-                    st.get('chunks', {}).pop('FIELD_DATA', None)
-                    st.pop('chunk_first_ts', None)
-                    st.pop('last_chunk_ts', None)
-                    st.pop('chunk_total', None)
-                    st.pop('batch_id', None)
+                    st.close('FIELD_DATA')
         except Exception as e:
             await log_error(f"check_incomplete_bursts: {e}")
         await asyncio.sleep(2)
@@ -1500,9 +2405,8 @@ async def handle_simple_session_hub(clear):
         if not hasattr(settings, 'REMOTE_NODE_INFO') or settings.REMOTE_NODE_INFO is None:
             settings.REMOTE_NODE_INFO = {}
         st = settings.REMOTE_NODE_INFO.setdefault(remote_uid, {})
-        st['session_active'] = True
-        st['chunks'] = []
-        st['chunk_total'] = None
+        lora_session.get(remote_uid).begin()
+        _adr_note_link(st)
         try:
             import utime as _t
             st['last_hello_ts'] = _t.time()
@@ -1511,15 +2415,17 @@ async def handle_simple_session_hub(clear):
 
         chunk_sz = int(getattr(settings, 'LORA_CHUNK_SIZE', 80))
         base_uid = str(getattr(settings, 'UNIT_ID', '') or '')
-        ready = 'READY:%s:BASE:%s:CHUNKSZ:%d' % (remote_uid, base_uid, chunk_sz)
+        ready = 'READY:%s:BASE:%s:CHUNKSZ:%d' % (remote_uid, base_uid, chunk_sz) + _ready_binary_suffix(remote_uid) + _ready_dr_suffix(st)
         try:
             secured = await _secure_message(ready, remote_uid=remote_uid)
             data = secured.encode() if isinstance(secured, str) else secured
-            ok = await _safe_send(data, remote_uid=remote_uid)
+            ok = await _safe_send(data, remote_uid=remote_uid, prio='high')
         except Exception as e:
             ok = False
             await debug_print('READY send error: %s' % e, 'ERROR')
         await debug_print('READY sent to %s ok=%s' % (remote_uid, ok), 'BASE_NODE')
+        if ok:
+            await _adr_begin(remote_uid, ready)
         try:
             await ensure_lora_listening()
         except Exception:
@@ -1530,6 +2436,7 @@ async def handle_simple_session_hub(clear):
         uid = ''
         idx = -1
         total = 0
+        data = ''
         try:
             for part in clear.replace(',', ' ').split():
                 if part.startswith('UID:'):
@@ -1538,20 +2445,31 @@ async def handle_simple_session_hub(clear):
                     frac = part[6:].strip()
                     a, b = frac.split('/')
                     idx, total = int(a), int(b)
+            if ',DATA:' in clear:
+                data = clear.split(',DATA:', 1)[1].split('|', 1)[0].strip()
         except Exception:
             pass
         if uid:
-            st = getattr(settings, 'REMOTE_NODE_INFO', {}).setdefault(uid, {})
-            st['session_active'] = True
-            st['chunk_total'] = total
-            ch = st.setdefault('chunks', [])
-            if idx >= 0:
-                while len(ch) <= idx:
-                    ch.append(None)
-                ch[idx] = clear
+            sess = lora_session.get(uid)
+            sess.active = True
+            if data and not sess.put_chunk('FIELD_DATA', idx, total, data):
+                await debug_print('Chunk %s %s/%s dropped (session limit)' % (uid, idx, total), 'WARN')
             await debug_print('Chunk %s %s/%s' % (uid, idx, total), 'BASE_NODE')
         return True
 
+    if 'FIELD_DATA_PARITY' in clear:
+        uid = ''
+        data = ''
+        for part in clear.split(','):
+            if part.startswith('UID:'):
+                uid = part[4:].strip()
+            elif part.startswith('DATA:'):
+                data = part[5:].split('|', 1)[0].strip()
+        fec = _parse_fec_field(clear)
+        if uid and fec and data:
+            await _session_fec(uid, 'FIELD_DATA', fec, data)
+        return True
+
     if clear.startswith('END:'):
         parts = clear.split(':')
         remote_uid = parts[1].strip() if len(parts) > 1 else 'unknown'
@@ -1563,10 +2481,26 @@ async def handle_simple_session_hub(clear):
             total = 0
         await debug_print('END from %s total=%s' % (remote_uid, total), 'BASE_NODE')
 
+        sess = lora_session.get(remote_uid)
+        bid = parts[parts.index('BID') + 1] if 'BID' in parts[3:-1] else None
+        if await _maybe_send_nack(remote_uid, sess, 'FIELD_DATA', total, bid, 'NK' in parts[3:]):
+            return True
+
+        payload = None
         try:
-            st = getattr(settings, 'REMOTE_NODE_INFO', {}).get(remote_uid, {})
-            if st.get('chunks') and callable(globals().get('process_remote_field_data')):
-                await process_remote_field_data(remote_uid, st)
+            payload = _assemble_simple_chunks(sess, total)
+        except Exception as e:
+            await debug_print('field assemble failed: %s' % e, 'WARN')
+        if payload is None:
+            await _refuse_incomplete(remote_uid, sess, 'FIELD_DATA', total, bid, 'NK' in parts[3:])
+            try:
+                await ensure_lora_listening()
+            except Exception:
+                pass
+            return True
+        try:
+            # The ACK below closes the session; no separate FIELD_DATA ACK.
+            await process_remote_field_data(remote_uid, sess, send_ack=False)
         except Exception as e:
             await debug_print('field process skip: %s' % e, 'WARN')
 
@@ -1582,15 +2516,14 @@ async def handle_simple_session_hub(clear):
         try:
             secured = await _secure_message(ack, remote_uid=remote_uid)
             data = secured.encode() if isinstance(secured, str) else secured
-            ok = await _safe_send(data, remote_uid=remote_uid)
+            ok = await _safe_send(data, remote_uid=remote_uid, prio='high')
         except Exception as e:
             ok = False
             await debug_print('ACK send error: %s' % e, 'ERROR')
         await debug_print('FINAL ACK to %s ok=%s next=%d' % (remote_uid, ok, next_delay), 'BASE_NODE')
+        await _adr_end(remote_uid)
 
-        st = getattr(settings, 'REMOTE_NODE_INFO', {}).get(remote_uid, {})
-        st['session_active'] = False
-        st['chunks'] = []
+        sess.close('FIELD_DATA')
         try:
             await ensure_lora_listening()
         except Exception:
@@ -1601,6 +2534,10 @@ async def handle_simple_session_hub(clear):
 
 async def handle_incoming_packet(msg):
     global last_rx_ts, last_lora_activity_ts
+    if is_binary_frame(msg):
+        if _is_lora_hub_node():
+            await _handle_binary_frame(msg)
+        return
     msg_str = msg.rstrip(b'\x00').decode()
 
     uid_hint = None
@@ -1625,6 +2562,7 @@ async def handle_incoming_packet(msg):
     if not msg_str:
         await debug_print("Dropped inbound packet: secure decode failed", "WARN")
         return
+    _adr_touch(uid_hint)
 
     if bool(getattr(settings, 'LORA_SIMPLE_SESSION_ONLY', True)):
         if str(getattr(settings, 'NODE_TYPE', '')).lower() in ('base', 'wifi'):
@@ -1667,6 +2605,7 @@ async def handle_incoming_packet(msg):
     packet_type = 'UNKNOWN'
     parsed_data = None
     chunk_str = None
+    fec = None
 
     if msg_str.startswith('T:'):
         packet_type = 'TS'
@@ -1715,10 +2654,11 @@ async def handle_incoming_packet(msg):
     elif msg_str.startswith('HELLO:'):
         packet_type = 'HELLO'
         try:
-            remote_uid = msg_str.split(':', 1)[1].strip()
+            parsed_data = msg_str.split(':', 1)[1].strip()
+            remote_uid = parsed_data.split('|')[0].strip()
         except Exception:
             remote_uid = None
-        parsed_data = remote_uid
+            parsed_data = None
 
     elif msg_str.startswith('END:'):
         packet_type = 'END'
@@ -1729,7 +2669,7 @@ async def handle_incoming_packet(msg):
             batch_id = None
             if len(parts) >= 5 and parts[3] == 'BID':
                 batch_id = parts[4]
-            parsed_data = {'uid': remote_uid, 'total': declared_total, 'batch_id': batch_id}
+            parsed_data = {'uid': remote_uid, 'total': declared_total, 'batch_id': batch_id, 'nack': 'NK' in parts[3:]}
         except Exception:
             remote_uid = None
             parsed_data = None
@@ -1754,7 +2694,10 @@ async def handle_incoming_packet(msg):
                 batch_id = p[4:]
         if msg_type and remote_uid:
             packet_type = msg_type
-            if msg_type.endswith('_CHUNK'):
+            if msg_type.endswith('_PARITY'):
+                parsed_data = data_b64
+                fec = _parse_fec_field(msg_str)
+            elif msg_type.endswith('_CHUNK'):
                 parsed_data = data_b64
             else:
                 try:
@@ -1777,7 +2720,7 @@ async def handle_incoming_packet(msg):
                 node['next_expected'] = now + heartbeat_window
                 info[remote_uid] = node
                 settings.REMOTE_NODE_INFO = info
-                save_remote_node_info()
+                save_remote_node_info(remote_uid)
                 await debug_print(f"Heartbeat received from {remote_uid}", "BASE_NODE")
         except Exception as e:
             await log_error(f"Heartbeat parse error: {e}")
@@ -1790,6 +2733,7 @@ async def handle_incoming_packet(msg):
             'data': parsed_data,
             'chunk_info': chunk_str if packet_type.endswith('_CHUNK') else None,
             'batch_id': batch_id if packet_type.endswith('_CHUNK') else None,
+            'fec': fec,
         }
         await lora_rx_queue.put(packet)
 
@@ -1798,46 +2742,20 @@ async def handle_incoming_packet(msg):
 # ---------------------------------------------------------------------------
 
 def _load_counters():
-    """Load persisted counters from disk."""
+    """Load persisted counters (snapshot + journal, TX resumed past its reservation)."""
     global tx_counter, remote_counters
     try:
         path = getattr(settings, 'LORA_COUNTERS_FILE', '/logs/lora_counters.json')
-        with open(path, 'r') as f:
-            data = ujson.load(f)
-        if isinstance(data, dict):
-            tx_counter = int(data.get('tx_counter', 0))
-            rc = data.get('remote_counters', {})
-            if isinstance(rc, dict):
-                remote_counters = {}
-                for uid, vals in rc.items():
-                    if isinstance(vals, dict):
-                        remote_counters[uid] = {
-                            'tx': int(vals.get('tx', 0)),
-                            'rx': int(vals.get('rx', 0))
-                        }
-                settings.LORA_PEER_COUNTERS = remote_counters
+        tx_counter, remote_counters = lora_counters.load(path)
+        settings.LORA_PEER_COUNTERS = remote_counters
     except Exception:
         pass
 
 
 def _save_counters():
-    """Persist counters to disk."""
+    """Fold the counter journal into the snapshot file now (reboot, shutdown)."""
     try:
-        path = getattr(settings, 'LORA_COUNTERS_FILE', '/logs/lora_counters.json')
-        peer_map = getattr(settings, 'LORA_PEER_COUNTERS', None)
-        if isinstance(peer_map, dict):
-            for uid, vals in peer_map.items():
-                if isinstance(vals, dict):
-                    remote_counters[uid] = {
-                        'tx': int(vals.get('tx', 0)),
-                        'rx': int(vals.get('rx', 0))
-                    }
-        data = {
-            'tx_counter': tx_counter,
-            'remote_counters': remote_counters
-        }
-        with open(path, 'w') as f:
-            ujson.dump(data, f)
+        lora_counters.compact(tx_counter)
     except Exception:
         pass
 
@@ -1845,19 +2763,38 @@ def _save_counters():
 _load_counters()
 
 
-def hmac_sha256(key, msg):
-    BLOCK_SIZE = 64
-    if isinstance(key, str):
-        key = key.encode()
-    if isinstance(msg, str):
-        msg = msg.encode()
-    if len(key) > BLOCK_SIZE:
-        key = uhashlib.sha256(key).digest()
-    key = key + b'\x00' * (BLOCK_SIZE - len(key))
-    opad = bytes((x ^ 0x5C) for x in key)
-    ipad = bytes((x ^ 0x36) for x in key)
-    inner = uhashlib.sha256(ipad + msg).digest()
-    return uhashlib.sha256(opad + inner).digest()
+def _next_tx_counter(uid):
+    """Advance and return the TX counter used for uid's envelopes."""
+    if not hasattr(settings, 'LORA_PEER_COUNTERS') or settings.LORA_PEER_COUNTERS is None:
+        settings.LORA_PEER_COUNTERS = {}
+    peer = settings.LORA_PEER_COUNTERS.setdefault(str(uid), {'tx': 0, 'rx': 0})
+    peer['tx'] = int(peer.get('tx', 0)) + 1
+    counter = int(peer['tx'])
+    remote_counters[str(uid)] = {'tx': counter, 'rx': int(peer.get('rx', 0))}
+    lora_counters.note_tx(uid, counter)
+    return counter
+
+
+async def _accept_rx_counter(remote_uid, cnt, reset=False):
+    """Replay window check for an authenticated frame; advances the peer's RX counter."""
+    uid = str(remote_uid or 'unknown')
+    if not hasattr(settings, 'LORA_PEER_COUNTERS') or settings.LORA_PEER_COUNTERS is None:
+        settings.LORA_PEER_COUNTERS = {}
+    peer = settings.LORA_PEER_COUNTERS.setdefault(uid, {'tx': 0, 'rx': 0})
+    last_rx = int(peer.get('rx', 0))
+    window = int(getattr(settings, 'LORA_REPLAY_WINDOW', 8))
+
+    if reset:
+        peer['rx'] = cnt
+    elif cnt + window <= last_rx:
+        await _sec_log('Replay attack detected (cnt %d <= last_rx %d)' % (cnt, last_rx))
+        return False
+    elif cnt > last_rx:
+        peer['rx'] = cnt
+
+    remote_counters[uid] = {'tx': int(peer.get('tx', 0)), 'rx': int(peer.get('rx', 0))}
+    lora_counters.note_rx(uid, int(peer['rx']), reset)
+    return True
 
 
 async def _secure_message(msg_str, remote_uid=None):
@@ -1878,13 +2815,7 @@ async def _secure_message(msg_str, remote_uid=None):
                 return '%s|CRC:%s' % (msg_str, _format_crc(c))
             return msg_str
 
-        uid = remote_uid or getattr(settings, 'UNIT_ID', 'local')
-        if not hasattr(settings, 'LORA_PEER_COUNTERS') or settings.LORA_PEER_COUNTERS is None:
-            settings.LORA_PEER_COUNTERS = {}
-        peer = settings.LORA_PEER_COUNTERS.setdefault(str(uid), {'tx': 0, 'rx': 0})
-        peer['tx'] = int(peer.get('tx', 0)) + 1
-        counter = int(peer['tx'])
-        remote_counters[str(uid)] = {'tx': int(peer['tx']), 'rx': int(peer.get('rx', 0))}
+        counter = _next_tx_counter(remote_uid or getattr(settings, 'UNIT_ID', 'local'))
 
         parts = [msg_str, 'CNT:%d' % counter]
 
@@ -1893,12 +2824,7 @@ async def _secure_message(msg_str, remote_uid=None):
             trunc = int(getattr(settings, 'LORA_HMAC_TRUNCATE', 16))
             material = ('%s|%d' % (msg_str, counter)).encode()
             try:
-                digest = hmac_sha256(secret.encode(), material)
-                if isinstance(digest, bytes):
-                    hx = ''.join('{:02x}'.format(b) for b in digest)
-                else:
-                    hx = str(digest)
-                parts.append('HMAC:%s' % hx[:trunc])
+                parts.append('HMAC:%s' % tag_hex(hmac_sha256(secret, material), trunc))
             except Exception as e:
                 await _sec_log('HMAC build failed: %s' % e)
 
@@ -1906,8 +2832,6 @@ async def _secure_message(msg_str, remote_uid=None):
             c = crc16_ccitt(msg_str.encode() if not isinstance(msg_str, bytes) else msg_str)
             parts.append('CRC:' + _format_crc(c))
 
-        if counter % 5 == 0:
-            _save_counters()
         return '|'.join(parts)
     except Exception as e:
         await _sec_log('secure_message error: %s' % e)
@@ -1922,120 +2846,504 @@ async def crc_selftest():
     await debug_print('CRC selftest %s %s (wire=CRC:%s)' % (ok, detail, wire), 'LORA')
 
 
-async def _unsecure_message(msg_str, remote_uid=None):
-    """
-    Parse pipe envelope. Return cleartext msg or None on hard failure.
-    """
-    try:
-        if isinstance(msg_str, bytes):
-            msg_str = msg_str.rstrip(b'\x00').decode()
-        raw = str(msg_str).strip()
-        if not raw:
-            return None
+async def _unsecure_message(msg_str, remote_uid=None):
+    """
+    Parse pipe envelope. Return cleartext msg or None on hard failure.
+    """
+    try:
+        if isinstance(msg_str, bytes):
+            msg_str = msg_str.rstrip(b'\x00').decode()
+        raw = str(msg_str).strip()
+        if not raw:
+            return None
+
+        if '|' not in raw:
+            if raw.startswith('HELLO:') or raw.startswith('READY:') or raw.startswith('ACK:') or raw.startswith('END:') or raw.startswith('FWD:') or raw.startswith('TYPE:'):
+                return raw
+            if getattr(settings, 'LORA_HMAC_REJECT_UNSIGNED', True) and getattr(settings, 'LORA_HMAC_ENABLED', True):
+                await _sec_log('Invalid secure format (no CNT/HMAC)')
+                return None
+            return raw
+
+        parts = raw.split('|')
+        body = parts[0]
+        cnt = None
+        hmac_hex = None
+        crc_raw = None
+
+        for p in parts[1:]:
+            pu = p.strip()
+            if pu.upper().startswith('CRC:'):
+                crc_raw = pu[4:]
+            elif pu.upper().startswith('CNT:'):
+                try:
+                    cnt = int(pu[4:].strip())
+                except Exception:
+                    cnt = None
+            elif pu.upper().startswith('HMAC:'):
+                hmac_hex = pu[5:].strip()
+
+        hmac_enabled = bool(getattr(settings, 'LORA_HMAC_ENABLED', True))
+
+        if hmac_enabled and hmac_hex is None:
+            if getattr(settings, 'LORA_HMAC_REJECT_UNSIGNED', True):
+                await _sec_log('Invalid secure format (no CNT/HMAC)')
+                return None
+            return body
+
+        # When HMAC is disabled, accept plain body and (optionally) validate CRC.
+        if not hmac_enabled:
+            if crc_raw is not None and (bool(getattr(settings, 'LORA_CRC_ENABLED', False)) or bool(getattr(settings, 'CRC_ON', False))):
+                ok_crc, detail = verify_app_crc(body, crc_raw)
+                if not ok_crc:
+                    if getattr(settings, 'LORA_SESSION_SOFT_CRC', True):
+                        b = body.strip()
+                        if b.startswith('HELLO:') or b.startswith('READY:') or b.startswith('ACK:') or b.startswith('END:') or b.startswith('FWD:'):
+                            await _sec_log('CRC soft-accept session frame: %s' % b[:32])
+                            return body
+                    await _sec_log(detail)
+                    return None
+            return body
+
+        if (getattr(settings, 'LORA_CRC_ENABLED', True) or getattr(settings, 'CRC_ON', True)) and crc_raw is not None:
+            ok_crc, detail = verify_app_crc(body, crc_raw)
+            if not ok_crc:
+                if getattr(settings, 'LORA_SESSION_SOFT_CRC', True):
+                    b = body.strip()
+                    if b.startswith('HELLO:') or b.startswith('READY:') or b.startswith('ACK:') or b.startswith('END:') or b.startswith('FWD:'):
+                        await _sec_log('CRC soft-accept session frame: %s' % b[:32])
+                        return body
+                await _sec_log(detail)
+                return None
+
+        if hmac_enabled and hmac_hex is not None:
+            secret = str(getattr(settings, 'LORA_HMAC_SECRET', '') or '')
+            trunc = int(getattr(settings, 'LORA_HMAC_TRUNCATE', 16))
+            if cnt is None:
+                await _sec_log('Invalid secure format (no CNT/HMAC)')
+                return None
+            material = ('%s|%d' % (body, cnt)).encode()
+            try:
+                if not tag_ok(hmac_sha256(secret, material), hmac_hex, trunc):
+                    await _sec_log('HMAC verification failed')
+                    return None
+            except Exception as e:
+                await _sec_log('HMAC verify error: %s' % e)
+                return None
+
+        if hmac_enabled and cnt is not None and getattr(settings, 'LORA_HMAC_REPLAY_PROTECT', True):
+            if remote_uid is None and body.startswith('TYPE:') and ',UID:*,' in body:
+                # Broadcast OTA frames count on the hub's '*' stream, not the unicast one.
+                remote_uid = '*'
+            if not await _accept_rx_counter(remote_uid, cnt, reset=body.startswith('HELLO:') or body.startswith('FWD:')):
+                return None
+
+        return body
+    except Exception as e:
+        await _sec_log('unsecure_message error: %s' % e)
+        return None
+
+
+# ---------------------------------------------------------------------------
+# Binary chunk frames (LORA_BINARY_FRAMES)
+# ---------------------------------------------------------------------------
+# Replaces 'TYPE:<T>_CHUNK,UID:..,CHUNK:i/n,BID:..,DATA:<base64>|CNT:n|HMAC:<hex>|CRC:XXXX':
+#
+#   0xB1 | type+flags | varint uid index | varint seq | varint total | varint counter
+#        [| varint len | batch id] | payload bytes [| raw HMAC] [| CRC16]
+#
+# The HMAC (LORA_HMAC_TRUNCATE hex digits -> half as many raw bytes) covers every byte before
+# it; without HMAC a CRC16 is appended when LORA_CRC_ENABLED/CRC_ON. Text frames never start
+# with 0xB1, so both formats share the air. The base assigns each remote a small uid index and
+# advertises 'BIN:1:IDX:<n>' in READY; a remote only switches to binary chunks after such a
+# READY, so remotes and bases without binary support keep exchanging text frames.
+# Parity frames (LORA_FEC_GROUP) set _BF_PARITY; their seq is the group number.
+_BF_MAGIC = 0xB1
+_BF_BID = 0x80
+_BF_MAC = 0x40
+_BF_CRC = 0x20
+_BF_PARITY = 0x10
+_BF_TYPE_MASK = 0x0F
+_BF_TYPES = ('FIELD_DATA', 'STATE_FILES', 'SETTINGS', 'SDATA', 'CMD_RESULT')
+_bf_uid_idx = None
+
+
+def _put_varint(buf, n):
+    n = int(n)
+    while n >= 0x80:
+        buf.append((n & 0x7F) | 0x80)
+        n >>= 7
+    buf.append(n)
+
+
+def _get_varint(data, pos):
+    n = 0
+    shift = 0
+    while True:
+        b = data[pos]
+        pos += 1
+        n |= (b & 0x7F) << shift
+        if not b & 0x80:
+            return n, pos
+        shift += 7
+        if shift > 28:
+            raise ValueError('varint too long')
+
+
+def _bf_mac(material):
+    secret = str(getattr(settings, 'LORA_HMAC_SECRET', '') or '')
+    n = max(4, int(getattr(settings, 'LORA_HMAC_TRUNCATE', 16)) // 2)
+    return hmac_sha256(secret, material)[:n]
+
+
+def is_binary_frame(msg):
+    return bool(msg) and msg[0] == _BF_MAGIC
+
+
+def binary_frame_overhead(batch_id=None, fec=False):
+    """Worst-case header + tag bytes around the payload of one frame (fec: room for parity frames)."""
+    n = 2 + 3 + 2 + 2 + 5
+    if fec:
+        n += 1 + 3
+    if batch_id:
+        n += 1 + len(str(batch_id))
+    if bool(getattr(settings, 'LORA_HMAC_ENABLED', True)):
+        n += max(4, int(getattr(settings, 'LORA_HMAC_TRUNCATE', 16)) // 2)
+    else:
+        n += 2
+    return n
+
+
+def encode_binary_frame(msg_type, uid_idx, seq, total, counter, payload, batch_id=None, parity=False):
+    """Build one binary chunk frame; msg_type must be listed in _BF_TYPES."""
+    flags = _BF_TYPES.index(msg_type) + 1
+    if parity:
+        flags |= _BF_PARITY
+    mac = bool(getattr(settings, 'LORA_HMAC_ENABLED', True))
+    crc = (not mac) and bool(getattr(settings, 'LORA_CRC_ENABLED', False) or getattr(settings, 'CRC_ON', False))
+    if batch_id:
+        flags |= _BF_BID
+    if mac:
+        flags |= _BF_MAC
+    elif crc:
+        flags |= _BF_CRC
+    buf = bytearray((_BF_MAGIC, flags))
+    _put_varint(buf, uid_idx)
+    _put_varint(buf, seq)
+    _put_varint(buf, total)
+    _put_varint(buf, counter)
+    if batch_id:
+        bid = str(batch_id).encode()
+        _put_varint(buf, len(bid))
+        buf.extend(bid)
+    buf.extend(payload)
+    if mac:
+        buf.extend(_bf_mac(buf))
+    elif crc:
+        c = crc16_ccitt(buf)
+        buf.append((c >> 8) & 0xFF)
+        buf.append(c & 0xFF)
+    return bytes(buf)
+
+
+def decode_binary_frame(frame):
+    """Parse a binary chunk frame.
+
+    Returns a dict with type, idx, seq, total, cnt, bid, data, parity and signed (True when an
+    HMAC was present and verified), or None when the frame is malformed or fails its HMAC/CRC.
+    """
+    try:
+        if not is_binary_frame(frame) or len(frame) < 6:
+            return None
+        flags = frame[1]
+        t = flags & _BF_TYPE_MASK
+        if t < 1 or t > len(_BF_TYPES):
+            return None
+        end = len(frame)
+        signed = False
+        if flags & _BF_MAC:
+            n = max(4, int(getattr(settings, 'LORA_HMAC_TRUNCATE', 16)) // 2)
+            end -= n
+            if end < 2 or not digest_eq(_bf_mac(frame[:end]), frame[end:]):
+                return None
+            signed = True
+        elif flags & _BF_CRC:
+            end -= 2
+            if end < 2 or crc16_ccitt(frame[:end]) != ((frame[end] << 8) | frame[end + 1]):
+                return None
+        idx, pos = _get_varint(frame, 2)
+        seq, pos = _get_varint(frame, pos)
+        total, pos = _get_varint(frame, pos)
+        cnt, pos = _get_varint(frame, pos)
+        bid = None
+        if flags & _BF_BID:
+            n, pos = _get_varint(frame, pos)
+            bid = bytes(frame[pos:pos + n]).decode()
+            pos += n
+        if pos > end:
+            return None
+        return {
+            'type': _BF_TYPES[t - 1],
+            'idx': idx,
+            'seq': seq,
+            'total': total,
+            'cnt': cnt,
+            'bid': bid,
+            'data': bytes(frame[pos:end]),
+            'parity': bool(flags & _BF_PARITY),
+            'signed': signed,
+        }
+    except Exception:
+        return None
+
+
+def _lora_uid_index(remote_uid):
+    """Base: the small integer a remote puts in its binary frames instead of its UID."""
+    info = getattr(settings, 'REMOTE_NODE_INFO', None)
+    if not isinstance(info, dict):
+        settings.REMOTE_NODE_INFO = info = {}
+    st = info.setdefault(str(remote_uid), {})
+    idx = st.get('lora_idx')
+    if isinstance(idx, int) and idx > 0:
+        return idx
+    used = [n.get('lora_idx') for n in info.values() if isinstance(n, dict)]
+    idx = 1
+    while idx in used:
+        idx += 1
+    st['lora_idx'] = idx
+    try:
+        # Binary frames from this remote are only accepted while the hub remembers the index.
+        save_remote_node_info(remote_uid, force=True)
+    except Exception:
+        pass
+    return idx
+
+
+def _lora_uid_from_index(idx):
+    info = getattr(settings, 'REMOTE_NODE_INFO', None) or {}
+    for uid in info:
+        node = info[uid]
+        if isinstance(node, dict) and node.get('lora_idx') == idx:
+            return uid
+    return None
+
+
+def _ready_binary_suffix(remote_uid):
+    """READY fields that offer binary chunk frames to remote_uid ('' when disabled)."""
+    if not bool(getattr(settings, 'LORA_BINARY_FRAMES', True)):
+        return ''
+    try:
+        return ':BIN:1:IDX:%d' % _lora_uid_index(remote_uid)
+    except Exception:
+        return ''
+
+
+def _note_ready_binary(parts):
+    """Remote: remember the uid index when READY offered binary frames, else fall back to text."""
+    global _bf_uid_idx
+    _bf_uid_idx = None
+    if not bool(getattr(settings, 'LORA_BINARY_FRAMES', True)):
+        return
+    try:
+        if 'BIN' in parts and 'IDX' in parts and parts[parts.index('BIN') + 1] == '1':
+            _bf_uid_idx = int(parts[parts.index('IDX') + 1])
+    except Exception:
+        _bf_uid_idx = None
+
+
+async def _handle_binary_frame(msg):
+    """Base: authenticate a binary chunk frame and hand it on like its text equivalent."""
+    global last_rx_ts, last_lora_activity_ts
+    fr = decode_binary_frame(msg)
+    if fr is None:
+        await _sec_log('Binary frame rejected (malformed or bad HMAC/CRC)')
+        return
+    uid = _lora_uid_from_index(fr['idx'])
+    if not uid:
+        await debug_print('Binary frame from unknown uid index %d' % fr['idx'], 'WARN')
+        return
+    hmac_enabled = bool(getattr(settings, 'LORA_HMAC_ENABLED', True))
+    if hmac_enabled and not fr['signed'] and getattr(settings, 'LORA_HMAC_REJECT_UNSIGNED', True):
+        await _sec_log('Unsigned binary frame from %s' % uid)
+        return
+    if fr['signed'] and getattr(settings, 'LORA_HMAC_REPLAY_PROTECT', True):
+        if not await _accept_rx_counter(uid, fr['cnt']):
+            return
+    _adr_touch(uid)
+
+    last_rx_ts = time.time()
+    last_lora_activity_ts = last_rx_ts
+    sdata.lora_SigStr = lora.getRSSI() if lora and hasattr(lora, 'getRSSI') else -60
+    sdata.lora_snr = lora.getSNR() if lora and hasattr(lora, 'getSNR') else 0
+    sdata.LORA_CONNECTED = True
+
+    msg_type = fr['type'] + '_CHUNK'
+    data = fr['data']
+    fec = None
+    if fr['parity']:
+        # Parity payload: varint k | varint last_len | XOR of the group's chunk payloads.
+        try:
+            k, pos = _get_varint(data, 0)
+            last_len, pos = _get_varint(data, pos)
+        except Exception:
+            return
+        fec = (fr['seq'], k, fr['total'], last_len)
+        data = data[pos:]
+        msg_type = fr['type'] + '_PARITY'
+    if bool(getattr(settings, 'LORA_SIMPLE_SESSION_ONLY', True)) and str(getattr(settings, 'NODE_TYPE', '')).lower() in ('base', 'wifi'):
+        if fr['type'] == 'FIELD_DATA':
+            sess = lora_session.get(uid)
+            sess.active = True
+            if fec:
+                await _session_fec(uid, 'FIELD_DATA', fec, data)
+                return
+            if not sess.put_chunk('FIELD_DATA', fr['seq'], fr['total'], fr['data']):
+                await debug_print('Chunk %s %s/%s dropped (session limit)' % (uid, fr['seq'], fr['total']), 'WARN')
+            await debug_print('Chunk %s %s/%s (%d B bin)' % (uid, fr['seq'], fr['total'], len(msg)), 'BASE_NODE')
+        return
+
+    await lora_rx_queue.put({
+        'uid': uid,
+        'type': msg_type,
+        'data': data,
+        'chunk_info': '%d/%d' % (fr['seq'], fr['total']),
+        'batch_id': fr['bid'],
+        'fec': fec,
+    })
+
 
-        if '|' not in raw:
-            if raw.startswith('HELLO:') or raw.startswith('READY:') or raw.startswith('ACK:') or raw.startswith('END:') or raw.startswith('FWD:') or raw.startswith('TYPE:'):
-                return raw
-            if getattr(settings, 'LORA_HMAC_REJECT_UNSIGNED', True) and getattr(settings, 'LORA_HMAC_ENABLED', True):
-                await _sec_log('Invalid secure format (no CNT/HMAC)')
-                return None
-            return raw
+def _assemble_simple_chunks(sess, total=0):
+    """Simple-session hub: join FIELD_DATA chunks (binary payloads or text DATA: fields)."""
+    if not sess.complete('FIELD_DATA') or sess.total('FIELD_DATA') < total:
+        return None
+    ch = sess.pieces('FIELD_DATA')
+    if all(isinstance(c, bytes) for c in ch):
+        raw = b''.join(ch)
+    elif all(isinstance(c, str) for c in ch):
+        raw = _ub.a2b_base64(''.join(ch).encode())
+    else:
+        return None
+    payload = ujson.loads(raw)
+    sess.data['FIELD_DATA'] = payload
+    sess.assembled.add('FIELD_DATA')
+    return payload
 
-        parts = raw.split('|')
-        body = parts[0]
-        cnt = None
-        hmac_hex = None
-        crc_raw = None
 
-        for p in parts[1:]:
-            pu = p.strip()
-            if pu.upper().startswith('CRC:'):
-                crc_raw = pu[4:]
-            elif pu.upper().startswith('CNT:'):
-                try:
-                    cnt = int(pu[4:].strip())
-                except Exception:
-                    cnt = None
-            elif pu.upper().startswith('HMAC:'):
-                hmac_hex = pu[5:].strip()
+# ---------------------------------------------------------------------------
+# FEC parity chunks (LORA_FEC_GROUP)
+# ---------------------------------------------------------------------------
+# After every group of k data chunks the sender adds one parity chunk: the XOR of the group's
+# raw chunk payloads, zero-padded to the longest. A receiver that lost exactly one chunk of a
+# group rebuilds it from the parity and the other k-1; two or more losses in one group still
+# fall back to NACK/retry. Every chunk but the last has the same length, so the parity only
+# needs to carry the last chunk's length.
+#
+#   text:   TYPE:<T>_PARITY,UID:<uid>,FEC:<group>:<k>:<total>:<last_len>,DATA:<base64>
+#   binary: chunk frame with _BF_PARITY, seq=group, payload varint k | varint last_len | xor
+#
+# Text data chunks are cut on 4-character boundaries while FEC is on, so each chunk decodes on
+# its own and the XOR runs over decoded bytes (the parity is then no longer than a chunk).
+
+def _fec_k(msg_type):
+    groups = getattr(settings, 'LORA_FEC_GROUP', None)
+    if not isinstance(groups, dict):
+        return 0
+    return max(0, _safe_int(groups.get(msg_type, 0), 0))
+
+
+def _fec_parity(parts):
+    n = 0
+    for p in parts:
+        n = max(n, len(p))
+    acc = bytearray(n)
+    for p in parts:
+        for i in range(len(p)):
+            acc[i] ^= p[i]
+    return bytes(acc)
 
-        hmac_enabled = bool(getattr(settings, 'LORA_HMAC_ENABLED', True))
 
-        if hmac_enabled and hmac_hex is None:
-            if getattr(settings, 'LORA_HMAC_REJECT_UNSIGNED', True):
-                await _sec_log('Invalid secure format (no CNT/HMAC)')
+def _fec_recover(chunks, group, k, total, last_len, parity):
+    """(index, raw bytes) of the single chunk missing from a group, else None.
+
+    chunks maps chunk index -> raw payload bytes.
+    """
+    start = group * k
+    end = min(total, start + k)
+    missing = [i for i in range(start, end) if i not in chunks]
+    if len(missing) != 1:
+        return None
+    m = missing[0]
+    acc = bytearray(parity)
+    for i in range(start, end):
+        if i != m:
+            d = chunks[i]
+            for j in range(min(len(d), len(acc))):
+                acc[j] ^= d[j]
+    return m, bytes(acc[:last_len] if m == total - 1 else acc)
+
+
+def _parse_fec_field(msg_str):
+    """(group, k, total, last_len) from a text parity chunk's FEC: field, or None."""
+    for p in str(msg_str).split(','):
+        if p.startswith('FEC:'):
+            try:
+                g, k, total, last_len = [int(x) for x in p[4:].split(':')]
+                return g, k, total, last_len
+            except Exception:
                 return None
-            return body
+    return None
 
-        # When HMAC is disabled, accept plain body and (optionally) validate CRC.
-        if not hmac_enabled:
-            if crc_raw is not None and (bool(getattr(settings, 'LORA_CRC_ENABLED', False)) or bool(getattr(settings, 'CRC_ON', False))):
-                ok_crc, detail = verify_app_crc(body, crc_raw)
-                if not ok_crc:
-                    if getattr(settings, 'LORA_SESSION_SOFT_CRC', True):
-                        b = body.strip()
-                        if b.startswith('HELLO:') or b.startswith('READY:') or b.startswith('ACK:') or b.startswith('END:') or b.startswith('FWD:'):
-                            await _sec_log('CRC soft-accept session frame: %s' % b[:32])
-                            return body
-                    await _sec_log(detail)
-                    return None
-            return body
 
-        if (getattr(settings, 'LORA_CRC_ENABLED', True) or getattr(settings, 'CRC_ON', True)) and crc_raw is not None:
-            ok_crc, detail = verify_app_crc(body, crc_raw)
-            if not ok_crc:
-                if getattr(settings, 'LORA_SESSION_SOFT_CRC', True):
-                    b = body.strip()
-                    if b.startswith('HELLO:') or b.startswith('READY:') or b.startswith('ACK:') or b.startswith('END:') or b.startswith('FWD:'):
-                        await _sec_log('CRC soft-accept session frame: %s' % b[:32])
-                        return body
-                await _sec_log(detail)
-                return None
+def _fec_recover_b64(parts, fec, parity_b64):
+    """Text variant of _fec_recover: parts maps index -> base64 chunk; returns (index, base64)."""
+    g, k, total, last_len = fec
+    raw = {}
+    for i in range(g * k, min(total, g * k + k)):
+        if i in parts:
+            raw[i] = _ub.a2b_base64(str(parts[i]).encode())
+    rec = _fec_recover(raw, g, k, total, last_len, _ub.a2b_base64(str(parity_b64).encode()))
+    if rec is None:
+        return None
+    return rec[0], _ub.b2a_base64(rec[1]).rstrip(b'\n').decode()
 
-        if hmac_enabled and hmac_hex is not None:
-            secret = str(getattr(settings, 'LORA_HMAC_SECRET', '') or '')
-            trunc = int(getattr(settings, 'LORA_HMAC_TRUNCATE', 16))
-            if cnt is None:
-                await _sec_log('Invalid secure format (no CNT/HMAC)')
-                return None
-            material = ('%s|%d' % (body, cnt)).encode()
-            try:
-                digest = hmac_sha256(secret.encode(), material)
-                if isinstance(digest, bytes):
-                    calc = ''.join('{:02x}'.format(b) for b in digest)[:trunc]
-                else:
-                    calc = str(digest)[:trunc]
-                if calc.lower() != str(hmac_hex)[:trunc].lower():
-                    await _sec_log('HMAC verification failed')
-                    return None
-            except Exception as e:
-                await _sec_log('HMAC verify error: %s' % e)
-                return None
 
-        if hmac_enabled and cnt is not None and getattr(settings, 'LORA_HMAC_REPLAY_PROTECT', True):
-            uid = str(remote_uid or 'unknown')
-            if not hasattr(settings, 'LORA_PEER_COUNTERS') or settings.LORA_PEER_COUNTERS is None:
-                settings.LORA_PEER_COUNTERS = {}
-            peer = settings.LORA_PEER_COUNTERS.setdefault(uid, {'tx': 0, 'rx': 0})
-            last_rx = int(peer.get('rx', 0))
-            window = int(getattr(settings, 'LORA_REPLAY_WINDOW', 8))
-
-            if body.startswith('HELLO:') or body.startswith('FWD:'):
-                peer['rx'] = cnt
-            elif cnt + window <= last_rx:
-                await _sec_log('Replay attack detected (cnt %d <= last_rx %d)' % (cnt, last_rx))
-                return None
-            elif cnt > last_rx:
-                peer['rx'] = cnt
+def _fec_recover_parts(parts, fec, parity):
+    """Recover from a received parity: raw bytes for binary chunks, base64 text otherwise."""
+    if isinstance(parity, bytes):
+        return _fec_recover(parts, fec[0], fec[1], fec[2], fec[3], parity)
+    return _fec_recover_b64(parts, fec, parity)
 
-            remote_counters[uid] = {'tx': int(peer.get('tx', 0)), 'rx': int(peer.get('rx', 0))}
-            if cnt % 5 == 0:
-                _save_counters()
 
-        return body
+async def _session_fec(uid, msg_type, fec, parity):
+    """Simple-session hub: rebuild the chunk a parity group is missing straight into the session."""
+    sess = lora_session.get(uid)
+    try:
+        rec = _fec_recover_parts(sess.chunk_map(msg_type), fec, parity)
     except Exception as e:
-        await _sec_log('unsecure_message error: %s' % e)
-        return None
+        await debug_print('FEC recovery skip: %s' % e, 'WARN')
+        return
+    if rec is None:
+        await debug_print('Parity %s group %d' % (uid, fec[0]), 'BASE_NODE')
+    elif sess.put_chunk(msg_type, rec[0], fec[2], rec[1]):
+        await debug_print('FEC recovered %s chunk %d/%d from %s' % (msg_type, rec[0], fec[2], uid), 'BASE_NODE')
+
+
+async def _fec_parity_frame(msg_type, target, group, k, total, last_len, raws, binary):
+    """Encoded parity chunk for one group of raw chunk payloads, ready for _safe_send."""
+    parity = _fec_parity(raws)
+    if binary:
+        payload = bytearray()
+        _put_varint(payload, k)
+        _put_varint(payload, last_len)
+        payload.extend(parity)
+        return encode_binary_frame(msg_type, _bf_uid_idx, group, total, _next_tx_counter(target), payload, parity=True)
+    msg = 'TYPE:%s_PARITY,UID:%s,FEC:%d:%d:%d:%d,DATA:%s' % (
+        msg_type, target, group, k, total, last_len, _ub.b2a_base64(parity).rstrip(b'\n').decode())
+    if _is_lora_hub_node():
+        secured = await _secure_message(msg, remote_uid=target)
+    else:
+        secured = await _secure_message(msg)
+    return secured.encode()
 
 async def _send_with_retry(data, retries=6):
     global lora
@@ -2059,6 +3367,7 @@ async def _send_with_retry(data, retries=6):
                     await debug_print("CAD still busy after 3 tries - sending anyway", "LORA")
 
             lora.send(data)
+            _airtime_charge(len(data))
             if await _wait_tx_done():
                 await ensure_lora_listening()
                 return
@@ -2079,9 +3388,57 @@ async def _send_with_retry(data, retries=6):
         await log_error(f"TX recovery failed: {e}")
 
 
-async def _safe_send(data: bytes, remote_uid=None):
+def _toa_ms(nbytes):
+    """Time on air of an nbytes frame at the current rate."""
+    try:
+        return lora.getTimeOnAir(nbytes) / 1000.0
+    except Exception:
+        sf, bw = _lora_rate or _default_rate()
+        return lora_airtime.time_on_air_ms(nbytes, sf, bw, _safe_int(getattr(settings, 'CR', 5), 5),
+                                           _safe_int(getattr(settings, 'PREAMBLE_LEN', 12), 12),
+                                           bool(getattr(settings, 'CRC_ON', True)))
+
+
+def _airtime_charge(nbytes):
+    try:
+        lora_airtime.charge(getattr(settings, 'FREQ', 915.0), _toa_ms(nbytes))
+    except Exception:
+        pass
+
+
+async def _airtime_gate(nbytes, prio):
+    """Wait until the duty-cycle budget allows the frame; False when it cannot go in time."""
+    freq = getattr(settings, 'FREQ', 915.0)
+    toa = _toa_ms(nbytes)
+    # The peer only listens for a few seconds; bulk traffic that cannot go soon is left for
+    # its next check-in (an unsent OTA job is staged again then).
+    if prio == 'high':
+        limit = 5
+    elif prio == 'low':
+        limit = _safe_int(getattr(settings, 'LORA_DUTY_MAX_DEFER_S', 10), 10)
+    else:
+        limit = 30
+    waited = 0.0
+    while True:
+        wait = lora_airtime.check(freq, toa, prio)
+        if wait == 0:
+            return True
+        if wait < 0 or waited + wait > limit:
+            lora_airtime.note_refused()
+            await debug_print('Duty cycle: %s frame (%.0f ms) refused, budget exhausted' % (prio, toa), 'WARN')
+            return False
+        if not waited:
+            lora_airtime.note_deferred()
+            await debug_print('Duty cycle: deferring %s frame %.1fs' % (prio, wait), 'LORA')
+        step = min(wait, 5.0)
+        await asyncio.sleep(step)
+        waited += step
+
+
+async def _safe_send(data: bytes, remote_uid=None, prio='normal'):
     """
-    Enforce maximum packet size before transmitting.
+    Enforce maximum packet size and the duty-cycle budget before transmitting.
+    prio: 'high' (READY/NACK/ACK), 'normal', or 'low' (OTA, bulk dumps; deferred first).
     Returns True on success, False on failure.
     """
     max_size = int(getattr(settings, 'LORA_MAX_PACKET_SIZE', 240))
@@ -2090,6 +3447,9 @@ async def _safe_send(data: bytes, remote_uid=None):
         await log_error(f"Payload too large: {len(data)} (max {max_size})")
         return False
 
+    if not await _airtime_gate(len(data), prio):
+        return False
+
     try:
         await _send_with_retry(data)
         return True
@@ -2120,6 +3480,11 @@ async def _wait_tx_done(timeout=5):
     return False
 
 def calculate_next_delay(node_id):
+    if bool(getattr(settings, 'LORA_TDMA_ENABLED', True)) and _is_lora_hub_node():
+        try:
+            return _tdma_next_delay(str(node_id))
+        except Exception:
+            pass
     sync_rate = getattr(settings, 'LORA_SYNC_RATE', 300)
     sync_window = getattr(settings, 'LORA_NEXT_SYNC', 600)
     stagger_seed = 0
@@ -2129,6 +3494,53 @@ def calculate_next_delay(node_id):
     delay = sync_rate + stagger_seed + jitter
     return max(60, delay)
 
+
+def _tdma_next_delay(uid):
+    """Hub: NEXT for uid from the lora_slots window table (session time measured from HELLO)."""
+    info = getattr(settings, 'REMOTE_NODE_INFO', None) or {}
+    if not lora_slots.loaded():
+        lora_slots.restore(dict((u, info[u]['slot']) for u in info if isinstance(info[u], dict) and info[u].get('slot')))
+        for u in info:
+            if isinstance(info[u], dict) and _safe_int(info[u].get('every'), 1) > 1:
+                lora_slots.set_every(u, _safe_int(info[u].get('every'), 1))
+    st = info.get(uid)
+    if isinstance(st, dict) and st.get('last_hello_ts'):
+        lora_slots.note_session(uid, st['last_hello_ts'])
+    delay = lora_slots.next_delay(uid)
+    if isinstance(st, dict):
+        st['slot'] = lora_slots.slot_of(uid)
+    return delay
+
+
+def get_airtime_stats():
+    """Time-on-air totals and per-sub-band duty-cycle budget for diagnostics."""
+    try:
+        return lora_airtime.stats()
+    except Exception:
+        return {}
+
+
+def get_counter_stats():
+    """Replay-counter journal report (appends, compactions, counters skipped on boot)."""
+    try:
+        return lora_counters.stats()
+    except Exception:
+        return {}
+
+
+def get_session_stats():
+    """Hub session table report (open sessions, bytes held, LRU evictions) for diagnostics."""
+    try:
+        return lora_session.stats()
+    except Exception:
+        return {}
+
+
+def get_slot_stats():
+    out = lora_slots.stats()
+    out['enabled'] = bool(getattr(settings, 'LORA_TDMA_ENABLED', True))
+    return out
+
 async def _send_chunked(msg_type, full_b64, target_uid=None, chunk_len=None):
     max_size = int(getattr(settings, 'LORA_MAX_PACKET_SIZE', 240))
     max_b64_chunk_len = _safe_int(chunk_len, 0)
@@ -2137,9 +3549,38 @@ async def _send_chunked(msg_type, full_b64, target_uid=None, chunk_len=None):
         max_b64_chunk_len = max(48, configured)
 
     target = str(target_uid or getattr(settings, 'UNIT_ID', ''))
+    prio = 'low' if msg_type in getattr(settings, 'LORA_LOW_PRIORITY_TYPES', ()) else 'normal'
+    if msg_type in _BF_TYPES and _bf_uid_idx is not None and not _is_lora_hub_node():
+        raw = _ub.a2b_base64(full_b64.encode() if isinstance(full_b64, str) else full_b64)
+        fec_k = _fec_k(msg_type)
+        step = max(16, min(max_b64_chunk_len, max_size - binary_frame_overhead(fec=bool(fec_k))))
+        num_chunks = max(1, (len(raw) + step - 1) // step)
+        if num_chunks < 2:
+            fec_k = 0
+        for i in range(num_chunks):
+            frame = encode_binary_frame(msg_type, _bf_uid_idx, i, num_chunks, _next_tx_counter(target), raw[i * step:(i + 1) * step])
+            if not await _safe_send(frame, prio=prio) and prio == 'low':
+                return False
+            if num_chunks > 1:
+                await asyncio.sleep(random.uniform(0.08, 0.25))
+            if fec_k and (i % fec_k == fec_k - 1 or i == num_chunks - 1):
+                g = i // fec_k
+                raws = [raw[j * step:(j + 1) * step] for j in range(g * fec_k, i + 1)]
+                last_len = len(raw) - (num_chunks - 1) * step
+                parity = await _fec_parity_frame(msg_type, target, g, fec_k, num_chunks, last_len, raws, True)
+                # step already leaves room for the parity header; skip rather than fail if it still does not fit.
+                if len(parity) <= max_size:
+                    await _safe_send(parity, prio=prio)
+                    await asyncio.sleep(random.uniform(0.08, 0.25))
+        if num_chunks > 1:
+            await asyncio.sleep(0.5)
+        return True
     b64_len = len(full_b64)
+    fec_k = _fec_k(msg_type)
 
     for split_try in range(5):
+        if fec_k:
+            max_b64_chunk_len = max(48, max_b64_chunk_len - max_b64_chunk_len % 4)
         if b64_len <= max_b64_chunk_len:
             num_chunks = 1
         else:
@@ -2170,16 +3611,29 @@ async def _send_chunked(msg_type, full_b64, target_uid=None, chunk_len=None):
                 oversized = True
                 break
 
-            await _safe_send(secured_bytes)
+            if not await _safe_send(secured_bytes, prio=prio) and prio == 'low':
+                # Out of duty-cycle budget for bulk traffic; the caller retries in a later session.
+                return False
             if num_chunks > 1:
                 await asyncio.sleep(random.uniform(0.08, 0.25))
 
+            if fec_k and num_chunks > 1 and (i % fec_k == fec_k - 1 or i == num_chunks - 1):
+                g = i // fec_k
+                step = max_b64_chunk_len
+                raws = [_ub.a2b_base64(full_b64[j * step:(j + 1) * step].encode()) for j in range(g * fec_k, i + 1)]
+                last_len = len(_ub.a2b_base64(full_b64[(num_chunks - 1) * step:].encode()))
+                parity = await _fec_parity_frame(msg_type, target, g, fec_k, num_chunks, last_len, raws, False)
+                if len(parity) <= max_size:
+                    await _safe_send(parity, prio=prio)
+                    await asyncio.sleep(random.uniform(0.08, 0.25))
+
         if not oversized:
             if num_chunks > 1:
                 await asyncio.sleep(0.5)
-            return
+            return True
 
     await log_error(f"Unable to fit chunked payload under max packet size for {msg_type}")
+    return False
 
 
 async def send_remote_field_data_batch(payload):
@@ -2245,19 +3699,9 @@ async def wait_for_next_sync_ack(timeout_s=None, expected_batch_id=None):
                 await asyncio.sleep_ms(100)
                 continue
 
-            # Try to receive a packet
+            # Wait for the next frame (DIO1 ring, or RX_DONE polling without it)
             try:
-                # Prefer non-blocking style receive if available
-                if hasattr(lora, 'recv'):
-                    msg, err = lora.recv(0)
-                else:
-                    msg, err = None, -1
-            except TypeError:
-                # Some drivers don't accept the timeout argument
-                try:
-                    msg, err = lora.recv()
-                except Exception:
-                    msg, err = None, -1
+                msg, err = await lora_recv(_safe_int(getattr(settings, 'LORA_RX_WAIT_MS', 250), 250))
             except Exception:
                 msg, err = None, -1
 
@@ -2298,14 +3742,27 @@ async def wait_for_next_sync_ack(timeout_s=None, expected_batch_id=None):
         except Exception:
             pass
 
-        await asyncio.sleep_ms(80)
+        # lora_recv already waited for the frame; just yield before the next wait.
+        await asyncio.sleep_ms(0)
 
     await debug_print("ACK wait timed out", "REMOTE_NODE")
     return None
 
 
+def _note_link_quality():
+    """Remote: keep RSSI/SNR of the hub frame just received (the deep-sleep path has no other RX)."""
+    try:
+        if lora is not None and hasattr(lora, 'getRSSI'):
+            sdata.lora_SigStr = lora.getRSSI()
+        if lora is not None and hasattr(lora, 'getSNR'):
+            sdata.lora_snr = lora.getSNR()
+    except Exception:
+        pass
+
+
 async def send_hello_and_wait_ready(use_fwd=False):
     """Simple mode remote greeting: direct HELLO -> wait for READY."""
+    global _dr_offer
     if str(getattr(settings, 'NODE_TYPE', 'base')).lower() != 'remote':
         return None
 
@@ -2322,7 +3779,7 @@ async def send_hello_and_wait_ready(use_fwd=False):
     except Exception:
         pass
     await debug_print("=== SIMPLE SESSION START ===", "REMOTE_NODE")
-    hello = 'HELLO:%s' % uid
+    hello = 'HELLO:%s' % uid + _remote_ota_hello_suffix()
 
     sent_any = False
     retries = int(getattr(settings, 'LORA_HELLO_RETRIES', 3))
@@ -2353,18 +3810,14 @@ async def send_hello_and_wait_ready(use_fwd=False):
                 await asyncio.sleep_ms(100)
                 continue
 
-            try:
-                lora.recv(0, False, 0)
-            except Exception:
-                pass
-
-            msg, err = lora.recv(0) if hasattr(lora, 'recv') else (None, -1)
+            msg, err = await lora_recv(_safe_int(getattr(settings, 'LORA_RX_WAIT_MS', 250), 250))
             if err == 0 and msg:
                 raw = msg.rstrip(b'\x00').decode()
                 clear = await _unsecure_message(raw)
                 if not clear:
                     continue
                 if clear.startswith("READY:") and uid in clear:
+                    _note_link_quality()
                     await debug_print(f"READY received: {clear}", "REMOTE_NODE")
 
                     parts = str(clear).split(':')
@@ -2377,6 +3830,8 @@ async def send_hello_and_wait_ready(use_fwd=False):
                             chunk_sz = int(parts[parts.index('CHUNKSZ') + 1])
                     except Exception:
                         pass
+                    _note_ready_binary(parts)
+                    _dr_offer = _dr_from_parts(parts)
                     try:
                         settings.PAIRED_BASE_UID = base_uid
                         settings.LORA_CHUNK_SIZE = chunk_sz
@@ -2385,7 +3840,7 @@ async def send_hello_and_wait_ready(use_fwd=False):
                     except Exception:
                         pass
                     await debug_print(
-                        f"Paired with base {base_uid}, chunk_size={chunk_sz}",
+                        f"Paired with base {base_uid}, chunk_size={chunk_sz}, binary={_bf_uid_idx is not None}",
                         "REMOTE_NODE"
                     )
                     await debug_print("=== SIMPLE SESSION READY ===", "REMOTE_NODE")
@@ -2400,6 +3855,15 @@ async def send_hello_and_wait_ready(use_fwd=False):
 
 async def send_field_data_controlled(payload):
     """Remote controlled simple session: HELLO -> READY -> chunks -> END -> FINAL ACK."""
+    try:
+        return await _field_data_session(payload)
+    finally:
+        # A READY rate offer only covers this session.
+        if _lora_rate is not None:
+            await _lora_set_rate()
+
+
+async def _field_data_session(payload):
     if str(getattr(settings, 'NODE_TYPE', 'base')).lower() != 'remote':
         return None
 
@@ -2434,6 +3898,11 @@ async def send_field_data_controlled(payload):
         await debug_print("=== SIMPLE SESSION FAILED ===", "REMOTE_NODE")
         return None
 
+    if _dr_offer and await _lora_set_rate(*_dr_offer):
+        await debug_print(f"Data phase on SF{_dr_offer[0]}/{_dr_offer[1]:g}", "REMOTE_NODE")
+        # Let the hub finish retuning before the first chunk.
+        await asyncio.sleep_ms(150)
+
     chunk_size = _safe_int(getattr(settings, 'LORA_CHUNK_SIZE', 100), 100)
     try:
         parts = str(ready_msg).split(':')
@@ -2443,34 +3912,63 @@ async def send_field_data_controlled(payload):
     except Exception:
         pass
 
+    batch_id = None
+    try:
+        if isinstance(payload, dict):
+            batch_id = payload.get('batch_id')
+    except Exception:
+        batch_id = None
+
+    binary = _bf_uid_idx is not None
+    fec_k = _fec_k('FIELD_DATA')
     try:
         raw_json = ujson.dumps(payload)
-        full_b64 = _ub.b2a_base64(raw_json.encode()).rstrip(b'\n').decode()
+        if binary:
+            # Raw JSON bytes per frame; CHUNKSZ is then a byte count, capped to the packet size.
+            body = raw_json.encode()
+            max_size = int(getattr(settings, 'LORA_MAX_PACKET_SIZE', 240))
+            chunk_size = max(16, min(chunk_size, max_size - binary_frame_overhead(batch_id, fec=bool(fec_k))))
+        else:
+            body = _ub.b2a_base64(raw_json.encode()).rstrip(b'\n').decode()
+            if fec_k:
+                # Parity is computed over decoded bytes, so each text chunk must decode alone.
+                chunk_size = max(48, chunk_size - chunk_size % 4)
     except Exception as e:
         await debug_print(f"Payload encode failed: {e}", "ERROR")
         await debug_print("=== SIMPLE SESSION FAILED ===", "REMOTE_NODE")
         return None
 
-    total = (len(full_b64) + chunk_size - 1) // chunk_size if full_b64 else 1
-    await debug_print(f"Payload {len(raw_json)} bytes -> {total} chunk(s)", "REMOTE_NODE")
-
-    batch_id = None
-    try:
-        if isinstance(payload, dict):
-            batch_id = payload.get('batch_id')
-    except Exception:
-        batch_id = None
+    total = (len(body) + chunk_size - 1) // chunk_size if body else 1
+    await debug_print(f"Payload {len(raw_json)} bytes -> {total} {'binary' if binary else 'text'} chunk(s)", "REMOTE_NODE")
 
-    for i in range(total):
+    async def _send_chunk(i):
         start = i * chunk_size
-        part = full_b64[start:start + chunk_size]
-        if batch_id:
-            chunk_msg = f"TYPE:FIELD_DATA_CHUNK,UID:{uid},CHUNK:{i}/{total},BID:{batch_id},DATA:{part}"
+        part = body[start:start + chunk_size]
+        if binary:
+            frame = encode_binary_frame('FIELD_DATA', _bf_uid_idx, i, total, _next_tx_counter(uid), part, batch_id)
         else:
-            chunk_msg = f"TYPE:FIELD_DATA_CHUNK,UID:{uid},CHUNK:{i}/{total},DATA:{part}"
+            if batch_id:
+                chunk_msg = f"TYPE:FIELD_DATA_CHUNK,UID:{uid},CHUNK:{i}/{total},BID:{batch_id},DATA:{part}"
+            else:
+                chunk_msg = f"TYPE:FIELD_DATA_CHUNK,UID:{uid},CHUNK:{i}/{total},DATA:{part}"
+            frame = (await _secure_message(chunk_msg)).encode()
+        return await _safe_send(frame)
+
+    if total < 2:
+        fec_k = 0
+
+    def _raw_chunk(i):
+        part = body[i * chunk_size:(i + 1) * chunk_size]
+        return part if binary else _ub.a2b_base64(part.encode())
+
+    async def _send_parity(g):
+        raws = [_raw_chunk(j) for j in range(g * fec_k, min(total, g * fec_k + fec_k))]
+        frame = await _fec_parity_frame('FIELD_DATA', uid, g, fec_k, total, len(_raw_chunk(total - 1)), raws, binary)
+        return await _safe_send(frame)
+
+    for i in range(total):
         try:
-            secured = await _secure_message(chunk_msg)
-            ok = await _safe_send(secured.encode())
+            ok = await _send_chunk(i)
             await debug_print(f"Chunk {i}/{total} sent (ok={ok})", "REMOTE_NODE")
             if not ok:
                 await debug_print(f"Chunk {i} TX failed", "ERROR")
@@ -2481,11 +3979,23 @@ async def send_field_data_controlled(payload):
             await debug_print("=== SIMPLE SESSION FAILED ===", "REMOTE_NODE")
             return None
         await asyncio.sleep_ms(300)
+        if fec_k and (i % fec_k == fec_k - 1 or i == total - 1):
+            try:
+                ok = await _send_parity(i // fec_k)
+                await debug_print(f"Parity {i // fec_k} sent (ok={ok})", "REMOTE_NODE")
+            except Exception as e:
+                await debug_print(f"Parity {i // fec_k} send exception: {e}", "WARN")
+            await asyncio.sleep_ms(300)
 
     if batch_id:
         end_msg = f"END:{uid}:{total}:BID:{batch_id}"
     else:
         end_msg = f"END:{uid}:{total}"
+    max_nack_rounds = _safe_int(getattr(settings, 'LORA_NACK_MAX_ROUNDS', 2), 2)
+    if max_nack_rounds > 0:
+        # Tells the hub this remote resends chunks listed in a NACK.
+        end_msg += ':NK:1'
+    nack_rounds = 0
 
     try:
         secured = await _secure_message(end_msg)
@@ -2505,13 +4015,32 @@ async def send_field_data_controlled(payload):
         try:
             if lora is None:
                 break
-            try:
-                msg, err = lora.recv(0)
-            except TypeError:
-                msg, err = lora.recv()
+            msg, err = await lora_recv(_safe_int(getattr(settings, 'LORA_RX_WAIT_MS', 250), 250))
             if err == 0 and msg:
                 raw = msg.rstrip(b'\x00').decode()
                 clear = await _unsecure_message(raw)
+                if clear and clear.startswith('NACK:'):
+                    # NACK:<uid>:MISS:<bitmap>[:BID:<bid>] - resend only the listed chunks.
+                    parts = clear.split(':')
+                    if len(parts) < 4 or parts[1] != uid or parts[2] != 'MISS':
+                        continue
+                    if batch_id and 'BID' in parts[4:-1] and parts[parts.index('BID') + 1] != str(batch_id):
+                        continue
+                    missing = _bitmap_chunks(parts[3], total)
+                    if nack_rounds >= max_nack_rounds:
+                        await debug_print(f"NACK for {len(missing)} chunk(s) after {nack_rounds} round(s); giving up", "WARN")
+                        await debug_print("=== SIMPLE SESSION FAILED ===", "REMOTE_NODE")
+                        return None
+                    nack_rounds += 1
+                    await debug_print(f"NACK: resending {len(missing)}/{total} chunk(s) (round {nack_rounds})", "REMOTE_NODE")
+                    for i in missing:
+                        if not await _send_chunk(i):
+                            await debug_print(f"Chunk {i} resend failed", "WARN")
+                        await asyncio.sleep_ms(300)
+                    secured = await _secure_message(end_msg)
+                    await _safe_send(secured.encode())
+                    end_ts = time.time() + ack_timeout
+                    continue
                 if clear and clear.startswith('ACK:'):
                     parts = clear.split(':')
                     if len(parts) >= 4 and parts[1] == uid and parts[2] == 'NEXT':
@@ -2540,6 +4069,7 @@ async def send_field_data_controlled(payload):
                             delay = max(10, int(parts[3]))
                         except Exception:
                             delay = None
+                        _note_link_quality()
                         await debug_print(f"FINAL ACK received: {clear}", "REMOTE_NODE")
                         await debug_print("=== SIMPLE SESSION SUCCESS ===", "REMOTE_NODE")
                         return delay
@@ -2571,7 +4101,7 @@ async def _fetch_remote_pending_command(remote_unit_id, remote_machine_id=None):
             req_mod = getattr(_wp, 'requests', None)
         if not req_mod:
             try:
-                import urequests as req_mod
+                import http_client as req_mod
             except Exception:
                 req_mod = None
         if not wp_url or not req_mod:
@@ -2586,9 +4116,9 @@ async def _fetch_remote_pending_command(remote_unit_id, remote_machine_id=None):
         resp = None
         try:
             try:
-                resp = req_mod.post(wp_url.rstrip('/') + '/wp-json/tmon/v1/device/commands', json=body, headers=headers, timeout=8)
+                resp = await req_mod.post(wp_url.rstrip('/') + '/wp-json/tmon/v1/device/commands', json=body, headers=headers, timeout=8)
             except TypeError:
-                resp = req_mod.post(wp_url.rstrip('/') + '/wp-json/tmon/v1/device/commands', json=body, headers=headers)
+                resp = await req_mod.post(wp_url.rstrip('/') + '/wp-json/tmon/v1/device/commands', json=body, headers=headers)
             status = int(getattr(resp, 'status_code', 0) or 0)
             if status not in (200, 201):
                 return None
@@ -2753,7 +4283,7 @@ async def _proxy_remote_command_result(remote_uid, payload):
             req_mod = getattr(_wp, 'requests', None)
         if not req_mod:
             try:
-                import urequests as req_mod
+                import http_client as req_mod
             except Exception:
                 req_mod = None
         if not wp_url or not req_mod:
@@ -2780,9 +4310,9 @@ async def _proxy_remote_command_result(remote_uid, payload):
             resp = None
             try:
                 try:
-                    resp = req_mod.post(wp_url.rstrip('/') + ep, json=body, headers=headers, timeout=8)
+                    resp = await req_mod.post(wp_url.rstrip('/') + ep, json=body, headers=headers, timeout=8)
                 except TypeError:
-                    resp = req_mod.post(wp_url.rstrip('/') + ep, json=body, headers=headers)
+                    resp = await req_mod.post(wp_url.rstrip('/') + ep, json=body, headers=headers)
                 status = int(getattr(resp, 'status_code', 0) or 0)
                 if status in (200, 201, 202):
                     return
@@ -2800,18 +4330,13 @@ async def _proxy_remote_command_result(remote_uid, payload):
 
 async def process_remote_command_result(uid, st):
     try:
-        payload = st.get('data', {}).get('CMD_RESULT')
+        payload = st.data.get('CMD_RESULT')
         if isinstance(payload, dict):
             await _proxy_remote_command_result(uid, payload)
     except Exception as e:
         await log_error(f"Remote command result processor error for {uid}: {e}")
     finally:
-        if 'CMD_RESULT' in st.get('types', set()):
-            st['types'].discard('CMD_RESULT')
-        if isinstance(st.get('data'), dict):
-            st['data'].pop('CMD_RESULT', None)
-        if isinstance(st.get('chunks'), dict):
-            st['chunks'].pop('CMD_RESULT', None)
+        st.consume('CMD_RESULT')
 
 
 async def _send_lora_heartbeat():
@@ -2887,9 +4412,11 @@ async def check_missed_syncs():
         threshold = getattr(settings, 'LORA_MISSED_SYNC_THRESHOLD', 3)
         heartbeat_timeout = getattr(settings, 'LORA_HEARTBEAT_INTERVAL_S', 120) * 2
         next_sync_window = getattr(settings, 'LORA_NEXT_SYNC', 100) * 2
+        changed = False
         for node_id, info in getattr(settings, 'REMOTE_NODE_INFO', {}).items():
             next_expected = info.get('next_expected')
-            last_seen = info.get('last_heartbeat_ts') or info.get('last_rx') or 0
+            sess = lora_session.get(node_id, create=False)
+            last_seen = info.get('last_heartbeat_ts') or (sess.last_rx if sess else 0) or info.get('last_hello_ts') or 0
             missed = info.get('missed_syncs', 0)
             should_increment = False
             if next_expected and now > next_expected + next_sync_window:
@@ -2899,11 +4426,14 @@ async def check_missed_syncs():
 
             if should_increment:
                 info['missed_syncs'] = missed + 1
+                changed = True
                 if info['missed_syncs'] > threshold:
                     await debug_print(f"Excessive missed syncs/heartbeats from {node_id}", "WARN")
             elif missed > 0:
                 info['missed_syncs'] = 0
-        save_remote_node_info()
+                changed = True
+        if changed:
+            save_remote_node_info()
         await asyncio.sleep(300)
 
 async def handle_ota_job(job):
@@ -2935,110 +4465,45 @@ async def handle_ota_job(job):
             await debug_print('handle_ota_job: firmware_updater missing', 'ERROR')
             return
 
-        # Start a background worker to perform the blocking download
-        result_file = settings.LOG_DIR.rstrip('/') + f'/ota_job_{job_id or "temp"}.result.json'
-
-        def _ota_worker():
+        # The download runs on the event loop (http_client streams it), bounded by the job timeout.
+        timeout = int(getattr(settings, 'OTA_JOB_TIMEOUT_S', 1800))
+        try:
+            j = await asyncio.wait_for(fw.download_and_apply_firmware(url, version_hint=version_hint, expected_sha=expected_sha, manifest_url=manifest_url), timeout)
+        except asyncio.TimeoutError:
+            j = None
+        except Exception as e:
+            j = {'ok': False, 'error': str(e)}
+        if isinstance(j, dict) and j.get('ok'):
+            pending_file = getattr(settings, 'OTA_PENDING_FILE', None) or (settings.LOG_DIR.rstrip('/') + '/ota_pending.flag')
+            job_end_ts = time.time()
+            duration = job_end_ts - job_start_ts
             try:
-                res = fw.download_and_apply_firmware(url, version_hint=version_hint, expected_sha=expected_sha, manifest_url=manifest_url)
-            except Exception as e:
-                res = {'ok': False, 'error': str(e)}
-            res['worker_end_ts'] = time.time()
+                with open(pending_file, 'w') as pf:
+                    pf.write(str(version_hint or j.get('sha256') or job_id or 'downloaded'))
+            except Exception:
+                pass
+            await debug_print(f'OTA job {job_id} downloaded OK -> {j.get("path")} (duration: {duration:.1f}s)', 'OTA')
             try:
-                import ujson as _uj
+                await display_message('OTA Downloaded', 3)
             except Exception:
-                import json as _uj
+                pass
             try:
-                with open(result_file, 'w') as rf:
-                    rf.write(_uj.dumps(res))
+                if send_ota_job_status:
+                    await send_ota_job_status(job_id, 'downloaded', {'path': j.get('path'), 'sha256': j.get('sha256'), 'started_at': job_start_ts, 'completed_at': job_end_ts, 'duration_s': duration})
             except Exception:
                 pass
-
-        # Try to offload to a thread if available, else run in-process (blocking fallback)
-        try:
-            if _thread:
-                try:
-                    _thread.start_new_thread(_ota_worker, ())
-                except Exception:
-                    # fallback to CPython threading module
-                    if threading:
-                        try:
-                            t = threading.Thread(target=_ota_worker, daemon=True)
-                            t.start()
-                        except Exception:
-                            _ota_worker()
-                    else:
-                        _ota_worker()
-            else:
-                # No _thread; try CPython threading module
-                if threading:
-                    try:
-                        t = threading.Thread(target=_ota_worker, daemon=True)
-                        t.start()
-                    except Exception:
-                        _ota_worker()
-                else:
-                    # No threading available; perform blocking call but still report status
-                    _ota_worker()
-        except Exception as e:
-            await debug_print(f'OTA worker start failed: {e}', 'ERROR')
             return
-
-        # Poll for result (non-blocking) with timeout
-        timeout = int(getattr(settings, 'OTA_JOB_TIMEOUT_S', 1800))
-        poll_interval = 2
-        waited = 0
-        while waited < timeout:
+        if isinstance(j, dict):
+            err = j.get('error') or 'unknown'
+            job_end_ts = time.time()
+            duration = job_end_ts - job_start_ts
+            await debug_print(f'OTA job {job_id} failed: {err}', 'ERROR')
             try:
-                if os.path.exists(result_file):
-                    try:
-                        with open(result_file, 'r') as rf:
-                            try:
-                                j = __import__('ujson').loads(rf.read())
-                            except Exception:
-                                import json as _json
-                                j = _json.loads(rf.read())
-                    except Exception:
-                        j = None
-                    try:
-                        os.remove(result_file)
-                    except Exception:
-                        pass
-                    if isinstance(j, dict) and j.get('ok'):
-                        pending_file = getattr(settings, 'OTA_PENDING_FILE', None) or (settings.LOG_DIR.rstrip('/') + '/ota_pending.flag')
-                        job_end_ts = time.time()
-                        duration = job_end_ts - job_start_ts
-                        try:
-                            with open(pending_file, 'w') as pf:
-                                pf.write(str(version_hint or j.get('sha256') or job_id or 'downloaded'))
-                        except Exception:
-                            pass
-                        await debug_print(f'OTA job {job_id} downloaded OK -> {j.get("path")} (duration: {duration:.1f}s)', 'OTA')
-                        try:
-                            await display_message('OTA Downloaded', 3)
-                        except Exception:
-                            pass
-                        try:
-                            if send_ota_job_status:
-                                await send_ota_job_status(job_id, 'downloaded', {'path': j.get('path'), 'sha256': j.get('sha256'), 'started_at': job_start_ts, 'completed_at': job_end_ts, 'duration_s': duration})
-                        except Exception:
-                            pass
-                        return
-                    else:
-                        err = j.get('error') if isinstance(j, dict) else 'unknown'
-                        job_end_ts = time.time()
-                        duration = job_end_ts - job_start_ts
-                        await debug_print(f'OTA job {job_id} failed: {err}', 'ERROR')
-                        try:
-                            if send_ota_job_status:
-                                await send_ota_job_status(job_id, 'failed', {'error': err, 'started_at': job_start_ts, 'completed_at': job_end_ts, 'duration_s': duration})
-                        except Exception:
-                            pass
-                        return
+                if send_ota_job_status:
+                    await send_ota_job_status(job_id, 'failed', {'error': err, 'started_at': job_start_ts, 'completed_at': job_end_ts, 'duration_s': duration})
             except Exception:
                 pass
-            await asyncio.sleep(poll_interval)
-            waited += poll_interval
+            return
 
         # timeout
         job_end_ts = time.time()
@@ -3112,6 +4577,7 @@ async def connectLora():
         sync_rate = getattr(settings, 'LORA_SYNC_RATE', 300)
         response_timeout = 20   # shortened to reduce crosstalk window
         ota_wait_deadline = 0
+        ota_resume_at = 0
         awaiting_ota_session = None
     else:
         sync_rate = 10
@@ -3149,6 +4615,12 @@ async def connectLora():
                     await asyncio.sleep(8)
                     continue
 
+            if _adr_session is not None:
+                await _adr_expire()
+            if _rni_dirty:
+                flush_remote_node_info()
+            if _ota_bcast is not None and not _ota_bcast['started'] and current_time >= _ota_bcast['start']:
+                await _ota_broadcast_run()
             if _is_lora_hub_node() or str(getattr(settings, 'NODE_TYPE', '')).lower() == 'remote':
                 await ensure_lora_listening()
 
@@ -3202,6 +4674,13 @@ async def connectLora():
                     await ensure_lora_listening()
                     await asyncio.sleep(random.uniform(1.0, 2.0))
 
+                    ota_resume = _remote_ota_resume_payload()
+                    if ota_resume:
+                        # Chunk bitmaps of an unfinished OTA; the hub sends only what is missing.
+                        await _send_chunked("OTA_RESUME", _ub.b2a_base64(ujson.dumps(ota_resume).encode()).rstrip(b'\n').decode())
+                        ota_resume = None
+                        await ensure_lora_listening()
+
                     settings_dict = {k: getattr(settings, k) for k in dir(settings) if not k.startswith('__') and not callable(getattr(settings, k))}
                     settings_b64 = _ub.b2a_base64(ujson.dumps(settings_dict).encode()).rstrip(b'\n').decode()
                     await _send_chunked("SETTINGS", settings_b64)
@@ -3217,73 +4696,109 @@ async def connectLora():
                     retry_count = 0
 
                 elif state == STATE_WAIT_RESPONSE:
-                    if lora and hasattr(lora, '_events') and (lora._events() & lora.RX_DONE):
+                    msg, err = await lora_recv(0)
+                    if err == 0 and msg:
                         last_lora_activity_ts = time.time()
-                        msg, err = lora.recv()
-                        if err == 0 and msg:
-                            msg_str = msg.rstrip(b'\x00').decode()
-                            msg_str = await _unsecure_message(msg_str)
-                            if msg_str and msg_str.startswith('ACK:'):
-                                parts = msg_str.split(':')
-                                # STRICT UID CHECK - prevents accepting ACK meant for another remote
-                                if len(parts) >= 4 and parts[1] == settings.UNIT_ID and parts[2] == 'NEXT':
-                                    await debug_print("Remote: ACK received for this node", "REMOTE_NODE")
-                                    next_delay = int(parts[3])
-                                    ack_cmd = None
-                                    ack_ota_session = None
-                                    ack_ota_ver = None
-                                    if len(parts) >= 6:
-                                        i = 4
-                                        while i + 1 < len(parts):
-                                            if parts[i] == 'CMD':
-                                                ack_cmd = _decode_ack_command(parts[i + 1])
-                                            elif parts[i] == 'OTA':
-                                                ack_ota_session = parts[i + 1]
-                                            elif parts[i] == 'VER':
-                                                ack_ota_ver = parts[i + 1]
-                                            i += 2
-                                    if isinstance(ack_cmd, dict):
-                                        await debug_print("Remote: received command via ACK", "REMOTE_NODE")
-                                        await _apply_remote_command_from_ack(ack_cmd)
-                                    last_rx_ts = time.time()
-                                    sdata.lora_SigStr = lora.getRSSI() if hasattr(lora, 'getRSSI') else -60
-                                    sdata.lora_snr = lora.getSNR() if hasattr(lora, 'getSNR') else 0
-                                    sdata.LORA_CONNECTED = True
-                                    if ack_ota_session:
+                        msg_str = msg.rstrip(b'\x00').decode()
+                        msg_str = await _unsecure_message(msg_str)
+                        if msg_str and msg_str.startswith('ACK:'):
+                            parts = msg_str.split(':')
+                            # STRICT UID CHECK - prevents accepting ACK meant for another remote
+                            if len(parts) >= 4 and parts[1] == settings.UNIT_ID and parts[2] == 'NEXT':
+                                await debug_print("Remote: ACK received for this node", "REMOTE_NODE")
+                                next_delay = int(parts[3])
+                                ack_cmd = None
+                                ack_ota_session = None
+                                ack_ota_ver = None
+                                ack_ota_at = 0
+                                if len(parts) >= 6:
+                                    i = 4
+                                    while i + 1 < len(parts):
+                                        if parts[i] == 'CMD':
+                                            ack_cmd = _decode_ack_command(parts[i + 1])
+                                        elif parts[i] == 'OTA':
+                                            ack_ota_session = parts[i + 1]
+                                        elif parts[i] == 'VER':
+                                            ack_ota_ver = parts[i + 1]
+                                        elif parts[i] == 'AT':
+                                            ack_ota_at = _safe_int(parts[i + 1], 0)
+                                        i += 2
+                                if isinstance(ack_cmd, dict):
+                                    await debug_print("Remote: received command via ACK", "REMOTE_NODE")
+                                    await _apply_remote_command_from_ack(ack_cmd)
+                                last_rx_ts = time.time()
+                                sdata.lora_SigStr = lora.getRSSI() if hasattr(lora, 'getRSSI') else -60
+                                sdata.lora_snr = lora.getSNR() if hasattr(lora, 'getSNR') else 0
+                                sdata.LORA_CONNECTED = True
+                                if ack_ota_session:
+                                    if not _remote_ota_restore(ack_ota_session):
                                         _reset_remote_ota_rx()
-                                        awaiting_ota_session = ack_ota_session
-                                        ota_wait_deadline = time.time() + max(30, int(getattr(settings, 'REMOTE_ACK_WAIT_S', 8)) + 120)
-                                        await debug_print(
-                                            f"Remote: OTA window opened session={ack_ota_session} ver={ack_ota_ver}",
-                                            "OTA"
-                                        )
-                                        await ensure_lora_listening()
-                                        await asyncio.sleep(0.1)
-                                        continue
+                                    awaiting_ota_session = ack_ota_session
+                                    ota_wait_deadline = time.time() + max(30, int(getattr(settings, 'REMOTE_ACK_WAIT_S', 8)) + 120)
+                                    _remote_ota_bcast['session'] = None
+                                    if ack_ota_at > 0:
+                                        # Broadcast campaign: listen from its start until LORA_OTA_END
+                                        # or LORA_OTA_BCAST_IDLE_S without a frame, then back to the
+                                        # check-in schedule (repairs come with the next check-in).
+                                        _remote_ota_bcast['session'] = ack_ota_session
+                                        _remote_ota_bcast['ended'] = False
+                                        if _remote_ota_rx.get('session') != ack_ota_session:
+                                            # Join now, so a lost broadcast META does not lose the rest.
+                                            _remote_ota_rx['session'] = ack_ota_session
+                                            _remote_ota_rx['version'] = str(ack_ota_ver or '')
+                                            _remote_ota_resume_save()
+                                        ota_resume_at = time.time() + next_delay
+                                        await debug_print(f"Remote: OTA broadcast {ack_ota_session} in {ack_ota_at}s", "OTA")
+                                        await asyncio.sleep(max(0, ack_ota_at - 2))
+                                        ota_wait_deadline = time.time() + 2 + 2 * _safe_int(getattr(settings, 'LORA_OTA_BCAST_IDLE_S', 60), 60)
+                                    await debug_print(
+                                        f"Remote: OTA window opened session={ack_ota_session} ver={ack_ota_ver}",
+                                        "OTA"
+                                    )
                                     await ensure_lora_listening()
-                                    await asyncio.sleep(0.5)
-                                    state = STATE_IDLE
-                                    sleep_time = next_delay or (sync_rate + random.randint(-30, 30))
-                                    await asyncio.sleep(max(10, sleep_time))
+                                    await asyncio.sleep(0.1)
                                     continue
-                                else:
-                                    await debug_print("Ignored ACK for different UID", "REMOTE_NODE")
-                            elif msg_str and msg_str.startswith('TYPE:') and awaiting_ota_session:
+                                await ensure_lora_listening()
+                                await asyncio.sleep(0.5)
+                                state = STATE_IDLE
+                                sleep_time = next_delay or (sync_rate + random.randint(-30, 30))
+                                await asyncio.sleep(max(10, sleep_time))
+                                continue
+                            else:
+                                await debug_print("Ignored ACK for different UID", "REMOTE_NODE")
+                        elif msg_str and msg_str.startswith('TYPE:') and awaiting_ota_session:
+                            handled = False
+                            try:
+                                handled = await _remote_handle_lora_ota_wire_message(msg_str)
+                            except Exception as ota_rx_e:
+                                await log_error(f"remote ota rx error: {ota_rx_e}")
                                 handled = False
-                                try:
-                                    handled = await _remote_handle_lora_ota_wire_message(msg_str)
-                                except Exception as ota_rx_e:
-                                    await log_error(f"remote ota rx error: {ota_rx_e}")
-                                    handled = False
-                                if handled:
-                                    last_rx_ts = time.time()
-                                    await ensure_lora_listening()
-                                    await asyncio.sleep(0.05)
-                                    continue
+                            if handled:
+                                last_rx_ts = time.time()
+                                if _remote_ota_bcast.get('session'):
+                                    ota_wait_deadline = max(ota_wait_deadline, last_rx_ts + _safe_int(getattr(settings, 'LORA_OTA_BCAST_IDLE_S', 60), 60))
+                                await ensure_lora_listening()
+                                await asyncio.sleep(0.05)
+                                continue
                         await ensure_lora_listening()
 
+                    if awaiting_ota_session and _remote_ota_bcast.get('session') and (
+                            _remote_ota_bcast.get('ended') or (ota_wait_deadline and time.time() > ota_wait_deadline)):
+                        await debug_print("Remote: OTA broadcast window closed; gaps repaired at next check-in", "OTA")
+                        _remote_ota_resume_save()
+                        _remote_ota_bcast['session'] = None
+                        awaiting_ota_session = None
+                        ota_wait_deadline = 0
+                        state = STATE_IDLE
+                        # Back to the slot the ACK gave (whole cycles later if it has passed).
+                        while ota_resume_at < time.time() + 10:
+                            ota_resume_at += max(60, sync_rate)
+                        await asyncio.sleep(ota_resume_at - time.time())
+                        continue
+
                     if awaiting_ota_session and ota_wait_deadline and time.time() > ota_wait_deadline:
                         await debug_print("Remote: OTA window timeout; continuing normal schedule", "WARN")
+                        _remote_ota_resume_save()
                         awaiting_ota_session = None
                         ota_wait_deadline = 0
                         state = STATE_IDLE
@@ -3317,18 +4832,25 @@ async def connectLora():
                             continue
 
             else:  # BASE NODE
-                if lora and hasattr(lora, '_events') and (lora._events() & lora.RX_DONE):
-                    last_lora_activity_ts = current_time
-                    msg, err = lora.recv()
-                    if err == 0 and msg:
-                        # TEMP DIAGNOSTIC - log every raw packet the radio sees
-                        try:
-                            raw_preview = msg.rstrip(b'\x00')[:80]
-                            await debug_print(f"RAW RX ({len(msg)} bytes): {raw_preview!r}", "LORA_RX")
-                        except Exception as e:
-                            await debug_print(f"RAW RX log error: {e}", "LORA_RX")
-                        await handle_incoming_packet(msg)
-                    await ensure_lora_listening()
+                irq_rx = _rx_irq_active()
+                # With the DIO1 ring this blocks on the IRQ (up to LORA_RX_WAIT_MS) instead of
+                # the 25 ms poll, then drains every frame that queued up meanwhile.
+                msg, err = await lora_recv(_safe_int(getattr(settings, 'LORA_RX_WAIT_MS', 250), 250) if irq_rx else 0)
+                while err == 0 and msg:
+                    last_lora_activity_ts = time.time()
+                    # TEMP DIAGNOSTIC - log every raw packet the radio sees
+                    try:
+                        raw_preview = msg.rstrip(b'\x00')[:80]
+                        await debug_print(f"RAW RX ({len(msg)} bytes): {raw_preview!r}", "LORA_RX")
+                    except Exception as e:
+                        await debug_print(f"RAW RX log error: {e}", "LORA_RX")
+                    await handle_incoming_packet(msg)
+                    if not irq_rx:
+                        await ensure_lora_listening()
+                        break
+                    msg, err = await lora_recv(0)
+                if irq_rx:
+                    continue
 
             await asyncio.sleep_ms(25)
 
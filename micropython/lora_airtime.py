@@ -0,0 +1,163 @@
+# TMON LoRa airtime accounting and duty-cycle limiter (token bucket per sub-band).
+#
+# Every transmission is charged its time on air (the driver's getTimeOnAir when available,
+# else time_on_air_ms below, the same Semtech formula). Each regulatory sub-band in
+# LORA_DUTY_CYCLE_BANDS ((low_mhz, high_mhz, duty_pct), EU868 by default) has a bucket of
+# duty_pct % of LORA_DUTY_CYCLE_WINDOW_S seconds of airtime, refilled continuously at
+# duty_pct % of wall time. A frequency outside every band (e.g. US915) is only accounted.
+#
+# Priorities keep room for the frames a session cannot do without: 'low' (OTA, SETTINGS/SDATA
+# and state-file dumps) only goes while more than LORA_DUTY_LOW_RESERVE_PCT of the bucket is
+# left, 'normal' above LORA_DUTY_NORMAL_RESERVE_PCT, and 'high' (READY, NACK, ACKs) may use
+# the whole bucket. check() says how long a frame has to wait; lora.py defers or drops it.
+
+try:
+    import utime as time
+except Exception:
+    import time
+
+try:
+    import settings
+except Exception:
+    settings = None
+
+EU868_BANDS = (
+    (863.0, 868.0, 1.0),
+    (868.0, 868.6, 1.0),
+    (868.7, 869.2, 0.1),
+    (869.4, 869.65, 10.0),
+    (869.7, 870.0, 1.0),
+)
+
+# band name -> [tokens_ms, last_refill_ts, used_ms, frames]
+_buckets = {}
+_stats = {'frames': 0, 'airtime_ms': 0.0, 'deferred': 0, 'refused': 0}
+
+
+def _f(name, default):
+    try:
+        return float(getattr(settings, name, default))
+    except Exception:
+        return float(default)
+
+
+def time_on_air_ms(nbytes, sf, bw_khz, cr=5, preamble=8, crc=False, explicit=True):
+    """LoRa time on air in ms (cr is the coding-rate denominator, 5..8)."""
+    sf = int(sf)
+    sym_us = ((1000 * 10) << sf) / (float(bw_khz) * 10)
+    coeff1_x4, coeff2 = 17, 8
+    if sf in (5, 6):
+        coeff1_x4, coeff2 = 25, 0
+    div = 4 * sf
+    if sym_us >= 16000:
+        div = 4 * (sf - 2)
+    bits = 8 * nbytes + (16 if crc else 0) - 4 * sf + coeff2 + (20 if explicit else 0)
+    if bits < 0:
+        bits = 0
+    coded = (bits + div - 1) // div
+    nsym_x4 = (preamble + 8) * 4 + coeff1_x4 + coded * int(cr) * 4
+    return sym_us * nsym_x4 / 4 / 1000.0
+
+
+def band_of(freq_mhz):
+    """(name, duty_pct) of the regulated sub-band freq_mhz falls in, or None."""
+    if not bool(getattr(settings, 'LORA_DUTY_CYCLE_ENABLED', True)):
+        return None
+    try:
+        f = float(freq_mhz)
+        for lo, hi, pct in getattr(settings, 'LORA_DUTY_CYCLE_BANDS', EU868_BANDS) or ():
+            if lo <= f < hi:
+                return '%g-%g' % (lo, hi), float(pct)
+    except Exception:
+        pass
+    return None
+
+
+def _capacity(pct):
+    return pct / 100.0 * _f('LORA_DUTY_CYCLE_WINDOW_S', 3600) * 1000.0
+
+
+def _bucket(name, pct, now):
+    b = _buckets.get(name)
+    cap = _capacity(pct)
+    if b is None:
+        b = _buckets[name] = [cap, now, 0.0, 0]
+    elif now > b[1]:
+        b[0] = min(cap, b[0] + (now - b[1]) * pct * 10.0)
+        b[1] = now
+    return b
+
+
+def _reserve_ms(pct, prio):
+    if prio == 'low':
+        return _capacity(pct) * _f('LORA_DUTY_LOW_RESERVE_PCT', 50) / 100.0
+    if prio == 'high':
+        return 0.0
+    return _capacity(pct) * _f('LORA_DUTY_NORMAL_RESERVE_PCT', 10) / 100.0
+
+
+def check(freq_mhz, toa_ms, prio='normal', now=None):
+    """Seconds until a frame of toa_ms may go out at priority prio (0: now)."""
+    band = band_of(freq_mhz)
+    if band is None:
+        return 0
+    now = time.time() if now is None else now
+    b = _bucket(band[0], band[1], now)
+    need = toa_ms + _reserve_ms(band[1], prio)
+    if b[0] >= need:
+        return 0
+    if need > _capacity(band[1]):
+        # Can never fit (frame longer than the bucket minus its reserve).
+        return -1
+    return (need - b[0]) / (band[1] * 10.0)
+
+
+def charge(freq_mhz, toa_ms, now=None):
+    """Account one transmission of toa_ms."""
+    _stats['frames'] += 1
+    _stats['airtime_ms'] += toa_ms
+    band = band_of(freq_mhz)
+    name = band[0] if band else 'other'
+    now = time.time() if now is None else now
+    if band:
+        b = _bucket(name, band[1], now)
+    else:
+        b = _buckets.get(name)
+        if b is None:
+            b = _buckets[name] = [0.0, now, 0.0, 0]
+    if band:
+        b[0] -= toa_ms
+    b[2] += toa_ms
+    b[3] += 1
+
+
+def note_deferred():
+    _stats['deferred'] += 1
+
+
+def note_refused():
+    _stats['refused'] += 1
+
+
+def stats():
+    now = time.time()
+    out = dict(_stats)
+    out['airtime_ms'] = int(out['airtime_ms'])
+    bands = {}
+    for name in _buckets:
+        b = _buckets[name]
+        row = {'used_ms': int(b[2]), 'frames': b[3]}
+        band = None
+        for lo, hi, pct in getattr(settings, 'LORA_DUTY_CYCLE_BANDS', EU868_BANDS) or ():
+            if name == '%g-%g' % (lo, hi):
+                band = float(pct)
+        if band is not None:
+            _bucket(name, band, now)
+            cap = _capacity(band)
+            row['duty_pct'] = band
+            row['budget_ms'] = int(cap)
+            row['left_ms'] = int(b[0])
+            row['load_pct'] = round(100.0 * (cap - b[0]) / cap, 1) if cap else 0.0
+        bands[name] = row
+    out['bands'] = bands
+    return out
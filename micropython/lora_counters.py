@@ -0,0 +1,174 @@
+# TMON LoRa replay counters: append-only journal with reserve-ahead TX counters.
+#
+# Every signed envelope carries a per-peer counter (TX side) and every accepted one advances
+# the peer's RX high-water mark. Rewriting lora_counters.json every few frames wore the flash
+# and still lost up to four TX counters on power loss. Here the JSON file is a snapshot and
+# changes go to a small journal next to it (<file>.log, one "t <uid> <n>" / "r <uid> <n>" line
+# per change), folded back into the snapshot once it reaches LORA_COUNTER_LOG_MAX_LINES lines.
+#
+# TX counters are reserved ahead: the journal records tx + LORA_COUNTER_RESERVE, and nothing
+# is written again until the counter reaches that mark. After a reboot each peer continues
+# from its last reservation, skipping the unused rest, so a counter is never sent twice and
+# only one frame in LORA_COUNTER_RESERVE writes to flash. RX marks are journaled every
+# LORA_COUNTER_RESERVE frames and on every session reset (HELLO), so after power loss the
+# replay floor is at most that far behind.
+#
+# Journal lines are replayed in order on load; a torn last line is ignored.
+
+try:
+    import ujson as json
+except Exception:
+    import json
+
+try:
+    import uos as os
+except Exception:
+    import os
+
+try:
+    import settings
+except Exception:
+    settings = None
+
+# uid -> [tx, rx, tx_reserved, rx_logged]
+_peers = {}
+_path = None
+_lines = 0
+_stats = {'appends': 0, 'compactions': 0, 'skipped_on_boot': 0, 'errors': 0}
+
+
+def _cfg(name, default):
+    try:
+        return max(1, int(getattr(settings, name, default)))
+    except Exception:
+        return default
+
+
+def _peer(uid):
+    p = _peers.get(uid)
+    if p is None:
+        p = _peers[uid] = [0, 0, 0, 0]
+    return p
+
+
+def load(path):
+    """Read snapshot + journal; returns {uid: {'tx', 'rx'}} with TX moved to the reservations."""
+    global _path, _lines
+    _path = path
+    _peers.clear()
+    _lines = 0
+    tx_counter = 0
+    reserved = True
+    try:
+        with open(path, 'r') as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            tx_counter = int(data.get('tx_counter', 0))
+            # Snapshots from before the journal hold sent counters, not reservations.
+            reserved = bool(data.get('reserved'))
+            for uid, vals in (data.get('remote_counters') or {}).items():
+                if isinstance(vals, dict):
+                    p = _peer(str(uid))
+                    p[0] = p[2] = int(vals.get('tx', 0))
+                    p[1] = p[3] = int(vals.get('rx', 0))
+    except Exception:
+        pass
+    if not reserved:
+        for p in _peers.values():
+            if p[0]:
+                p[2] += _cfg('LORA_COUNTER_RESERVE', 32)
+    try:
+        with open(path + '.log', 'r') as f:
+            for line in f:
+                _lines += 1
+                parts = line.split()
+                if len(parts) != 3 or parts[0] not in ('t', 'r'):
+                    continue
+                try:
+                    n = int(parts[2])
+                except Exception:
+                    continue
+                p = _peer(parts[1])
+                if parts[0] == 't':
+                    p[2] = max(p[2], n)
+                else:
+                    p[1] = p[3] = n
+    except Exception:
+        pass
+    out = {}
+    for uid, p in _peers.items():
+        if p[2] > p[0]:
+            _stats['skipped_on_boot'] += p[2] - p[0]
+        p[0] = p[2]
+        out[uid] = {'tx': p[0], 'rx': p[1]}
+    return tx_counter, out
+
+
+def _append(kind, uid, n):
+    global _lines
+    if _path is None:
+        return
+    try:
+        with open(_path + '.log', 'a') as f:
+            f.write('%s %s %d\n' % (kind, uid, n))
+        _lines += 1
+        _stats['appends'] += 1
+    except Exception:
+        _stats['errors'] += 1
+        return
+    if _lines >= _cfg('LORA_COUNTER_LOG_MAX_LINES', 256):
+        compact()
+
+
+def note_tx(uid, tx):
+    """Counter tx was just used for uid; journal a new reservation when it reaches the last one."""
+    uid = str(uid)
+    p = _peer(uid)
+    p[0] = tx
+    if tx >= p[2]:
+        p[2] = tx + _cfg('LORA_COUNTER_RESERVE', 32)
+        _append('t', uid, p[2])
+
+
+def note_rx(uid, rx, reset=False):
+    """uid's RX high-water mark is now rx (reset: a new session restarted the count)."""
+    uid = str(uid)
+    p = _peer(uid)
+    p[1] = rx
+    if reset or rx < p[3] or rx - p[3] >= _cfg('LORA_COUNTER_RESERVE', 32):
+        p[3] = rx
+        _append('r', uid, rx)
+
+
+def compact(tx_counter=0):
+    """Fold the journal into the snapshot (written atomically) and start a fresh journal."""
+    global _lines
+    if _path is None:
+        return False
+    rc = {}
+    for uid, p in _peers.items():
+        rc[uid] = {'tx': max(p[0], p[2]), 'rx': p[1]}
+    try:
+        from config_persist import write_json_atomic
+        ok = write_json_atomic(_path, {'tx_counter': tx_counter, 'remote_counters': rc, 'reserved': True})
+    except Exception:
+        ok = False
+    if not ok:
+        _stats['errors'] += 1
+        return False
+    for p in _peers.values():
+        p[3] = p[1]
+    try:
+        os.remove(_path + '.log')
+    except Exception:
+        pass
+    _lines = 0
+    _stats['compactions'] += 1
+    return True
+
+
+def stats():
+    out = dict(_stats)
+    out['peers'] = len(_peers)
+    out['log_lines'] = _lines
+    return out
@@ -0,0 +1,99 @@
+# TMON LoRa HMAC helpers: cached HMAC-SHA256 key schedule and constant-time tag checks.
+#
+# Every LoRa envelope is signed and verified with the same LORA_HMAC_SECRET, so the padded
+# key and its ipad/opad blocks are derived once per secret and kept in a small cache. Where
+# the hash object supports copy() (CPython, some ports) the inner and outer SHA-256 states
+# are pre-fed with their pad block and cloned per message; otherwise (stock MicroPython
+# uhashlib) each message starts from the cached pad bytes, which still skips the per-frame
+# key padding and the two 64-byte generator expressions.
+#
+# Tags are compared as raw bytes in constant time (digest_eq). Text envelopes keep their
+# hex tag on the wire; tag_ok decodes it and compares against the raw digest.
+
+try:
+    import uhashlib as hashlib
+except Exception:
+    import hashlib
+
+try:
+    import ubinascii as binascii
+except Exception:
+    import binascii
+
+BLOCK_SIZE = 64
+_MAX_KEYS = 4
+
+_ctx = {}
+
+
+def _context(key):
+    ctx = _ctx.get(key)
+    if ctx is not None:
+        return ctx
+    k = key.encode() if isinstance(key, str) else bytes(key)
+    if len(k) > BLOCK_SIZE:
+        k = hashlib.sha256(k).digest()
+    k = k + b'\x00' * (BLOCK_SIZE - len(k))
+    ipad = bytearray(BLOCK_SIZE)
+    opad = bytearray(BLOCK_SIZE)
+    for i in range(BLOCK_SIZE):
+        ipad[i] = k[i] ^ 0x36
+        opad[i] = k[i] ^ 0x5C
+    inner = hashlib.sha256(ipad)
+    if hasattr(inner, 'copy'):
+        ctx = (inner, hashlib.sha256(opad))
+    else:
+        ctx = (bytes(ipad), bytes(opad))
+    if len(_ctx) >= _MAX_KEYS:
+        _ctx.clear()
+    _ctx[key] = ctx
+    return ctx
+
+
+def hmac_sha256(key, msg):
+    """HMAC-SHA256 of msg; key may be str or bytes and its schedule is cached."""
+    if isinstance(msg, str):
+        msg = msg.encode()
+    inner, outer = _context(key)
+    if isinstance(inner, bytes):
+        h = hashlib.sha256(inner)
+        h.update(msg)
+        d = h.digest()
+        h = hashlib.sha256(outer)
+        h.update(d)
+        return h.digest()
+    h = inner.copy()
+    h.update(msg)
+    d = h.digest()
+    h = outer.copy()
+    h.update(d)
+    return h.digest()
+
+
+def digest_eq(a, b):
+    """Constant-time equality for byte strings (length is not secret)."""
+    if len(a) != len(b):
+        return False
+    r = 0
+    for i in range(len(a)):
+        r |= a[i] ^ b[i]
+    return r == 0
+
+
+def tag_hex(digest, trunc):
+    """Hex tag for a text envelope: the first trunc hex digits of digest."""
+    return binascii.hexlify(digest[:(trunc + 1) // 2]).decode()[:trunc]
+
+
+def tag_ok(digest, tag, trunc):
+    """Check a hex envelope tag (trunc digits) against the raw digest in constant time."""
+    tag = str(tag or '')[:trunc]
+    if len(tag) != min(trunc, 2 * len(digest)):
+        return False
+    if len(tag) % 2:
+        return digest_eq(binascii.hexlify(digest)[:len(tag)], tag.lower().encode())
+    try:
+        raw = binascii.unhexlify(tag)
+    except Exception:
+        return False
+    return digest_eq(digest[:len(raw)], raw)
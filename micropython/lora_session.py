@@ -0,0 +1,196 @@
+# TMON hub session table: transient per-remote burst/session state for the LoRa hub.
+#
+# REMOTE_NODE_INFO[uid] holds what the hub knows about a remote across sessions (schedule,
+# site fields, uid index, slot) and is persisted to flash. Everything that only lives for one
+# HELLO..final-ACK exchange or one burst is a RemoteSession here instead: received chunks,
+# assembled payloads, batch id, END/NACK bookkeeping and timestamps.
+#
+# Chunks are kept per message type in a slot list preallocated to the count the first chunk
+# declares (CHUNK:i/n or the binary frame total), capped at LORA_SESSION_MAX_CHUNKS. Text
+# chunks are stored as their base64 DATA field, binary chunks as raw bytes. A session holds
+# at most LORA_SESSION_BYTE_BUDGET bytes of chunk data; a chunk beyond that is refused (the
+# remote's NACK round or retry fetches it again once the burst has been consumed).
+#
+# The table keeps at most LORA_MAX_SESSIONS sessions. Opening one more evicts the least
+# recently used, preferring sessions that are not active. Hub memory per concurrent remote is
+# therefore bounded by the byte budget plus one small object.
+
+try:
+    import utime as time
+except Exception:
+    import time
+
+try:
+    import settings
+except Exception:
+    settings = None
+
+
+def _cfg(name, default):
+    try:
+        return int(getattr(settings, name, default))
+    except Exception:
+        return default
+
+
+class RemoteSession:
+    __slots__ = ('uid', 'active', 'types', 'data', 'parts', 'stored', 'batch_id', 'first_ts',
+                 'last_chunk_ts', 'last_rx', 'saw_end', 'nack_rounds', 'touched', 'assembled')
+
+    def __init__(self, uid):
+        self.uid = uid
+        self.touched = time.time()
+        self.reset()
+
+    def reset(self):
+        """Forget everything from the previous session (new HELLO, final ACK)."""
+        self.active = False
+        self.types = set()
+        self.data = {}
+        self.parts = {}
+        self.stored = 0
+        self.batch_id = None
+        self.first_ts = 0
+        self.last_chunk_ts = 0
+        self.last_rx = 0
+        self.saw_end = False
+        self.nack_rounds = 0
+        # Message types fully assembled since HELLO (only these may be acknowledged).
+        self.assembled = set()
+
+    def begin(self, now=None):
+        """A HELLO opened a new session."""
+        self.reset()
+        self.active = True
+        self.first_ts = self.last_rx = time.time() if now is None else now
+
+    def put_chunk(self, msg_type, idx, total, piece, now=None):
+        """Store chunk idx of total; False when the index is invalid or over the byte budget.
+
+        A different total than the slots were allocated for starts a new burst of msg_type.
+        """
+        now = time.time() if now is None else now
+        slots = self.parts.get(msg_type)
+        if slots is None or len(slots) != total:
+            if total <= 0 or total > _cfg('LORA_SESSION_MAX_CHUNKS', 64):
+                return False
+            self.drop(msg_type)
+            slots = self.parts[msg_type] = [None] * total
+            self.first_ts = now
+        if idx < 0 or idx >= total:
+            return False
+        old = slots[idx]
+        used = self.stored - (len(old) if old is not None else 0)
+        if used + len(piece) > _cfg('LORA_SESSION_BYTE_BUDGET', 8192):
+            return False
+        slots[idx] = piece
+        self.stored = used + len(piece)
+        self.last_chunk_ts = self.last_rx = now
+        return True
+
+    def total(self, msg_type):
+        slots = self.parts.get(msg_type)
+        return len(slots) if slots is not None else 0
+
+    def have(self, msg_type):
+        n = 0
+        for p in self.parts.get(msg_type) or ():
+            if p is not None:
+                n += 1
+        return n
+
+    def missing(self, msg_type, total=None):
+        """Indices still missing (total: the count END declared, if known)."""
+        slots = self.parts.get(msg_type) or []
+        total = len(slots) if total is None else total
+        return [i for i in range(total) if i >= len(slots) or slots[i] is None]
+
+    def complete(self, msg_type):
+        slots = self.parts.get(msg_type)
+        return bool(slots) and None not in slots
+
+    def chunk_map(self, msg_type):
+        """{index: piece} of the chunks received so far (FEC recovery input)."""
+        out = {}
+        slots = self.parts.get(msg_type) or ()
+        for i in range(len(slots)):
+            if slots[i] is not None:
+                out[i] = slots[i]
+        return out
+
+    def pieces(self, msg_type):
+        return self.parts.get(msg_type) or []
+
+    def drop(self, msg_type):
+        slots = self.parts.pop(msg_type, None)
+        if slots:
+            for p in slots:
+                if p is not None:
+                    self.stored -= len(p)
+
+    def consume(self, msg_type):
+        """Forget an assembled/processed payload of msg_type and its chunks."""
+        self.drop(msg_type)
+        self.types.discard(msg_type)
+        self.data.pop(msg_type, None)
+
+    def clear_burst(self):
+        """Forget every assembled payload and partial chunk list (burst processed)."""
+        self.types = set()
+        self.data = {}
+        self.parts = {}
+        self.stored = 0
+
+    def close(self, msg_type='FIELD_DATA'):
+        """Final ACK sent (or burst refused): drop msg_type's chunks and the END/NACK bookkeeping."""
+        self.drop(msg_type)
+        self.assembled.discard(msg_type)
+        self.active = False
+        self.saw_end = False
+        self.batch_id = None
+        self.nack_rounds = 0
+        self.first_ts = 0
+        self.last_chunk_ts = 0
+
+
+_sessions = {}
+_stats = {'opened': 0, 'evicted': 0}
+
+
+def get(uid, create=True):
+    """The session for uid (opened on demand, evicting the least recently used if full)."""
+    uid = str(uid)
+    s = _sessions.get(uid)
+    if s is None:
+        if not create:
+            return None
+        limit = max(1, _cfg('LORA_MAX_SESSIONS', 8))
+        while len(_sessions) >= limit:
+            victim = None
+            for u in _sessions:
+                c = _sessions[u]
+                if victim is None or (c.active, c.touched) < (victim.active, victim.touched):
+                    victim = c
+            del _sessions[victim.uid]
+            _stats['evicted'] += 1
+        s = _sessions[uid] = RemoteSession(uid)
+        _stats['opened'] += 1
+    s.touched = time.time()
+    return s
+
+
+def discard(uid):
+    _sessions.pop(str(uid), None)
+
+
+def sessions():
+    return list(_sessions.values())
+
+
+def stats():
+    out = dict(_stats)
+    out['sessions'] = len(_sessions)
+    out['active'] = sum(1 for s in _sessions.values() if s.active)
+    out['bytes'] = sum(s.stored for s in _sessions.values())
+    out['max_sessions'] = max(1, _cfg('LORA_MAX_SESSIONS', 8))
+    return out
@@ -0,0 +1,227 @@
+# TMON LoRa check-in scheduler: hub-side TDMA slot table for remote sessions.
+#
+# Remotes used to be spaced by a hash of their uid plus +-30 s of jitter, so with dozens of
+# them HELLO/READY exchanges still overlapped at the hub. Here every remote owns a window
+# [offset, offset + length) in a repeating cycle of LORA_SYNC_RATE seconds anchored to the
+# hub's clock (time.time() % cycle). A window is the remote's smoothed session time (HELLO to
+# final ACK) * 1.25 + LORA_TDMA_GUARD_S, never below LORA_TDMA_MIN_SLOT_S. The NEXT value in
+# a final ACK is the exact number of seconds to the start of the remote's next window, so each
+# check-in also re-aligns the remote to the hub's clock.
+#
+# New remotes take the first gap that fits (first fit), with a quarter extra so the smoothed
+# session time can creep up without a move. A remote whose sessions outgrow its window is
+# moved; one whose sessions shrank keeps its offset and gives the tail back. Remotes not heard
+# for LORA_TDMA_EXPIRE_CYCLES cycles (times the remote's batch factor, see set_every) lose
+# their window. When no gap fits, the window goes
+# after the last one and the cycle stretches (in 25 % steps, whole minutes), so every remote
+# checks in a little less often instead of colliding. Changing the cycle shifts everyone's
+# phase for one round, so it only shrinks back (with a repack) once less than half is used.
+# Remotes learn about a moved window from their next ACK.
+#
+# The table is in memory; lora.py keeps each remote's [offset, length] in REMOTE_NODE_INFO
+# ('slot') and hands them to restore() after a reboot.
+
+try:
+    import utime as time
+except Exception:
+    import time
+
+try:
+    import settings
+except Exception:
+    settings = None
+
+# uid -> [offset or None, length, last_seen, avg_session_s or None, last_hello_ts]
+_slots = {}
+_cycle = 0
+_loaded = False
+_stats = {'placed': 0, 'moved': 0, 'repacks': 0, 'expired': 0}
+# uid -> check-ins only every n-th cycle (store-and-forward remotes)
+_every = {}
+
+
+def _cfg(name, default):
+    try:
+        return float(getattr(settings, name, default))
+    except Exception:
+        return float(default)
+
+
+def _used():
+    n = 0
+    for s in _slots.values():
+        if s[0] is not None:
+            n += s[1]
+    return n
+
+
+def _base_cycle():
+    return int(max(60.0, _cfg('LORA_SYNC_RATE', 300)))
+
+
+def cycle_s():
+    """Current cycle length: LORA_SYNC_RATE, stretched while the windows do not fit in it."""
+    global _cycle
+    if _cycle < _base_cycle():
+        _cycle = _base_cycle()
+    return _cycle
+
+
+def _grow(end):
+    global _cycle
+    c = cycle_s()
+    while c < end:
+        c = int(c * 1.25 + 59) // 60 * 60
+    _cycle = c
+
+
+def _last_end(skip=None):
+    end = 0
+    for u, s in _slots.items():
+        if u != skip and s[0] is not None:
+            end = max(end, s[0] + s[1])
+    return end
+
+
+def _length(avg):
+    if avg is None:
+        return int(_cfg('LORA_TDMA_MIN_SLOT_S', 6))
+    need = int(avg * 1.25 + _cfg('LORA_TDMA_GUARD_S', 2) + 0.999)
+    return max(int(_cfg('LORA_TDMA_MIN_SLOT_S', 6)), need)
+
+
+def _first_fit(length, cycle, skip=None):
+    taken = sorted((s[0], s[0] + s[1]) for u, s in _slots.items() if u != skip and s[0] is not None)
+    start = 0
+    for a, b in taken:
+        if a - start >= length:
+            return start
+        start = max(start, b)
+    if cycle - start >= length:
+        return start
+    return None
+
+
+def _repack():
+    order = sorted(_slots, key=lambda u: (_slots[u][0] is None, _slots[u][0] or 0))
+    off = 0
+    for u in order:
+        _slots[u][0] = off
+        off += _slots[u][1]
+    _stats['repacks'] += 1
+
+
+def _expire(now, keep):
+    global _cycle
+    limit = _cfg('LORA_TDMA_EXPIRE_CYCLES', 4) * cycle_s()
+    for u in list(_slots):
+        if u != keep and now - _slots[u][2] > limit * _every.get(u, 1):
+            del _slots[u]
+            _every.pop(u, None)
+            _stats['expired'] += 1
+    if cycle_s() > _base_cycle() and _used() * 2 < cycle_s():
+        _repack()
+        _cycle = 0
+        _grow(_last_end())
+
+
+def note_session(uid, started, now=None):
+    """Fold one session's duration (HELLO at started, final ACK now) into the remote's average."""
+    now = time.time() if now is None else now
+    s = _slots.get(uid)
+    if s is None:
+        s = _slots[uid] = [None, 0, now, None, None]
+    dur = now - started
+    if s[4] == started or dur <= 0 or dur > 600:
+        return
+    s[4] = started
+    s[3] = dur if s[3] is None else 0.7 * s[3] + 0.3 * dur
+
+
+def next_delay(uid, now=None):
+    """Seconds until the start of uid's next window, placing or resizing the window first."""
+    now = int(time.time() if now is None else now)
+    _expire(now, uid)
+    s = _slots.get(uid)
+    if s is None:
+        s = _slots[uid] = [None, 0, now, None, None]
+    s[2] = now
+    need = _length(s[3])
+    if s[0] is None or s[1] < need:
+        _stats['placed' if s[0] is None else 'moved'] += 1
+        size = need + need // 4
+        off = _first_fit(size, cycle_s(), skip=uid)
+        if off is None:
+            off = _last_end(skip=uid)
+            _grow(off + size)
+        s[0] = off
+        s[1] = size
+    elif need * 10 < s[1] * 6:
+        s[1] = need + need // 4
+    cycle = cycle_s()
+    delay = (s[0] - now % cycle) % cycle
+    min_delay = _cfg('LORA_TDMA_MIN_DELAY_S', 30)
+    while delay < min_delay:
+        delay += cycle
+    return int(delay)
+
+
+def slot_of(uid):
+    s = _slots.get(uid)
+    return [s[0], s[1]] if s and s[0] is not None else None
+
+
+def set_every(uid, n):
+    """uid only checks in every n-th cycle; keeps its window through the skipped ones."""
+    if n > 1:
+        _every[uid] = n
+    else:
+        _every.pop(uid, None)
+
+
+def release(uid):
+    _slots.pop(uid, None)
+    _every.pop(uid, None)
+
+
+def loaded():
+    return _loaded
+
+
+def restore(table, now=None):
+    """Load {uid: [offset, length]} saved by slot_of(); overlapping windows are repacked."""
+    global _loaded
+    _loaded = True
+    now = time.time() if now is None else now
+    for uid in table or {}:
+        try:
+            off, length = int(table[uid][0]), int(table[uid][1])
+        except Exception:
+            continue
+        _slots[str(uid)] = [off, length, now, None, None]
+    end = -1
+    for s in sorted(_slots.values(), key=lambda s: s[0] if s[0] is not None else 0):
+        if s[0] is None or s[0] < end:
+            _repack()
+            break
+        end = s[0] + s[1]
+    _grow(_last_end())
+
+
+def stats():
+    cycle = cycle_s()
+    used = _used()
+    taken = sorted((s[0], s[0] + s[1]) for s in _slots.values() if s[0] is not None)
+    gap = 0
+    start = 0
+    for a, b in taken:
+        gap = max(gap, a - start)
+        start = max(start, b)
+    gap = max(gap, cycle - start)
+    out = dict(_stats)
+    out['remotes'] = len(taken)
+    out['cycle_s'] = cycle
+    out['used_s'] = used
+    out['utilization'] = round(100.0 * used / cycle, 1) if cycle else 0.0
+    out['largest_gap_s'] = gap
+    return out
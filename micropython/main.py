@@ -32,7 +32,7 @@ try:
 except Exception:
     engine_loop = None
 try:
-    import urequests as requests
+    import http_client as requests
 except Exception:
     requests = None
 from wifi import connectToWifiNetwork, wifi_rssi_monitor
@@ -213,9 +213,9 @@ async def first_boot_provision():
         }
         url = hub.rstrip('/') + '/wp-json/tmon-admin/v1/device/check-in'
         try:
-            resp = requests.post(url, json=body, timeout=10)
+            resp = await requests.post(url, json=body, timeout=10)
         except TypeError:
-            resp = requests.post(url, json=body)
+            resp = await requests.post(url, json=body)
         ok = (resp is not None and getattr(resp, 'status_code', 0) == 200)
         if ok:
             try:
@@ -3,7 +3,7 @@
 
 # OTA scaffolding: version check and pending flag
 try:
-    import urequests as requests
+    import http_client as requests
 except Exception:
     requests = None
 
@@ -102,7 +102,7 @@ async def check_for_update():
     if not url or not requests:
         return
     try:
-        resp = requests.get(url, timeout=10)
+        resp = await requests.get(url, timeout=10)
         status = getattr(resp, 'status_code', None)
         if status == 200:
             remote_ver = _normalize_version(resp.text if hasattr(resp, 'text') else '')
@@ -314,7 +314,7 @@ async def apply_pending_update():
                 continue
             try:
                 await debug_print(f'OTA: fetching manifest {murl}', 'OTA')
-                r = requests.get(murl, timeout=15)
+                r = await requests.get(murl, timeout=15)
                 status = getattr(r, 'status_code', None)
                 body = getattr(r, 'text', '') if hasattr(r, 'text') else ''
                 await debug_print(f'OTA: manifest response {status} length={len(body)}', 'OTA')
@@ -355,7 +355,7 @@ async def apply_pending_update():
                     sig_url = getattr(settings, 'OTA_MANIFEST_SIG_URL', '') or ''
                     secret = getattr(settings, 'OTA_MANIFEST_HMAC_SECRET', '') or ''
                     if sig_url or secret:
-                        ok_sig = _verify_manifest_signature(body, sig_url, secret)
+                        ok_sig = await _verify_manifest_signature(body, sig_url, secret)
                         if not ok_sig:
                             await debug_print(f'OTA: manifest signature/HMAC verification failed for {murl}; trying next manifest', 'ERROR')
                             try:
@@ -472,7 +472,7 @@ async def apply_pending_update():
                 try:
                     url = _safe_join(base_url, name)
                     await debug_print(f'OTA: downloading {name} from {url} (attempt {attempts})', 'OTA')
-                    rr = requests.get(url, stream=True, timeout=20) if hasattr(requests, 'get') else requests.get(url, timeout=20)
+                    rr = await requests.get(url, stream=True, timeout=20)
                     status = getattr(rr, 'status_code', None)
                     content_len = None
                     try:
@@ -489,7 +489,10 @@ async def apply_pending_update():
                         pass
 
                     if status != 200:
-                        body_snip = getattr(rr, 'text', '')[:1024] if hasattr(rr, 'text') else ''
+                        try:
+                            body_snip = (await rr.read(1024)).decode('utf-8', 'ignore')
+                        except Exception:
+                            body_snip = ''
                         await debug_print(f'ota: download {name} HTTP {status}', 'ERROR')
                         _write_debug_artifact(f'ota_response_{name}.txt', (body_snip or '').encode('utf-8', 'ignore'))
                         try:
@@ -508,12 +511,13 @@ async def apply_pending_update():
                     total = 0
                     try:
                         # Stream and inspect first chunk for HTML/error pages (common cause of bad hashes)
-                        if hasattr(rr, 'iter_content'):
+                        if hasattr(rr, 'read'):
                             first_chunk = True
                             with open(tmp_path, 'wb') as wf:
-                                for chunk in rr.iter_content(1024):
+                                while True:
+                                    chunk = await rr.read(1024)
                                     if not chunk:
-                                        continue
+                                        break
                                     if first_chunk:
                                         first_chunk = False
                                         try:
@@ -667,6 +671,11 @@ async def apply_pending_update():
             record_exception('ota.apply_pending_update.clear_pending', e, status='WARN')
         await debug_print('OTA: apply completed', 'OTA')
         # Reboot device after OTA files are downloaded and applied
+        try:
+            import lora
+            lora.flush_remote_node_info(force=True)
+        except Exception:
+            pass
         try:
             from machine import soft_reset
             soft_reset()
@@ -721,7 +730,7 @@ def _normalize_sig_text(sig_txt):
         pass
     return None
 
-def _verify_manifest_signature(body_text, sig_url, secret):
+async def _verify_manifest_signature(body_text, sig_url, secret):
     try:
         if not secret and not sig_url:
             return True
@@ -729,9 +738,9 @@ def _verify_manifest_signature(body_text, sig_url, secret):
         sig_hex = None
         if sig_url and requests:
             try:
-                sresp = requests.get(sig_url, timeout=10)
+                sresp = await requests.get(sig_url, timeout=10)
             except TypeError:
-                sresp = requests.get(sig_url)
+                sresp = await requests.get(sig_url)
             if sresp and getattr(sresp, 'status_code', 0) == 200:
                 raw_sig = (getattr(sresp, 'text', '') or '').strip().splitlines()[0]
                 sig_hex = _normalize_sig_text(raw_sig)
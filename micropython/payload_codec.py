@@ -0,0 +1,316 @@
+# TMON payload codec: request-body encoding for field-data uploads.
+#
+# Compression is negotiated. The Unit Connector lists the encodings it can inflate in
+# 'accept_encoding' on every field-data response; until one has been seen, bodies go out as
+# plain JSON. After that, bodies of at least FIELD_DATA_COMPRESS_MIN_BYTES are sent with
+# 'Content-Encoding: deflate' (zlib-wrapped, RFC 1950) whenever that is actually smaller.
+# A 400/415 on a compressed body drops the negotiated encoding so the retry goes out plain.
+#
+# Encoding uses MicroPython's 'deflate' module (DeflateIO, firmware >= 1.21) and falls back
+# to zlib.compress, so the same module also runs under CPython for host-side checks.
+#
+# Batches can also be delta-encoded (DELTA_ENC, FIELD_DATA_DELTA). The first record stays
+# full; each later record carries only keys whose value changed since the previous record,
+# '_dt' for the timestamp ('timestamp' or 'ts') as an integer delta, and '_rm' listing keys
+# the previous record had and this one lacks. The envelope is marked 'data_enc': 'delta1'.
+# delta_decode rehydrates the full records (the Unit Connector mirrors it in PHP). HTTP
+# batches are only delta-encoded once the server lists 'delta1' in 'accept_data_enc'.
+#
+# Record keys are compacted with a server-owned key dictionary: {'v': <int>, 'keys': {long:
+# code}} fetched from /wp-json/tmon/v1/device/field-keys and cached in FIELD_KEY_DICT_FILE.
+# Codes are decimal strings, so they never collide with a real (identifier) key, and the
+# Unit Connector only ever appends entries, so any later version expands any earlier one.
+# Batches compacted with it carry 'kd': <version>. Keys the dictionary lacks go out
+# unchanged; the Unit Connector adds them and advertises the bumped version in
+# 'key_dict' on its response, which triggers a refetch. With no dictionary cached the
+# legacy built-in LEGACY_KEY_MAP is used (and no 'kd' is sent).
+
+try:
+    import io
+except Exception:
+    io = None
+
+try:
+    import deflate
+except Exception:
+    deflate = None
+
+try:
+    import zlib
+except Exception:
+    zlib = None
+
+try:
+    import settings
+except Exception:
+    settings = None
+
+ENCODING = 'deflate'
+DELTA_ENC = 'delta1'
+
+LEGACY_KEY_MAP = {
+    'cur_temp_f': 't_f',
+    'cur_temp_c': 't_c',
+    'cur_humid': 'hum',
+    'cur_bar_pres': 'bar',
+    'sys_voltage': 'v',
+    'free_mem': 'fm',
+    'loop_runtime': 'lr',
+    'script_runtime': 'sr',
+    'cur_device_temp_f': 'dt_f',
+    'cur_device_temp_c': 'dt_c',
+    'cur_device_humid': 'dh',
+    'cur_device_bar_pres': 'db',
+    'cur_soil_moisture': 'sm',
+    'cur_soil_temp_f': 'st_f',
+    'cur_soil_temp_c': 'st_c',
+    'engine1_speed_rpm': 'e1r',
+    'engine2_speed_rpm': 'e2r',
+    'engine1_batt_v': 'e1v',
+    'engine2_batt_v': 'e2v',
+    'cpu_temp': 'cpu',
+    'error_count': 'ec',
+}
+
+_accepted = ()
+_data_encs = ()
+_key_dict = None
+_server_key_version = None
+
+
+def deflate_bytes(raw):
+    """Return the zlib-wrapped deflate stream for raw bytes, or None if unavailable."""
+    if isinstance(raw, str):
+        raw = raw.encode('utf-8')
+    if deflate is not None and io is not None and hasattr(deflate, 'DeflateIO'):
+        try:
+            buf = io.BytesIO()
+            d = deflate.DeflateIO(buf, deflate.ZLIB)
+            d.write(raw)
+            d.close()
+            return buf.getvalue()
+        except Exception:
+            pass
+    if zlib is not None and hasattr(zlib, 'compress'):
+        try:
+            return zlib.compress(raw)
+        except Exception:
+            pass
+    return None
+
+
+def inflate_bytes(data):
+    """Inverse of deflate_bytes; returns None when the stream cannot be decoded."""
+    if deflate is not None and io is not None and hasattr(deflate, 'DeflateIO'):
+        try:
+            with deflate.DeflateIO(io.BytesIO(data), deflate.ZLIB) as d:
+                return d.read()
+        except Exception:
+            pass
+    if zlib is not None and hasattr(zlib, 'decompress'):
+        try:
+            return zlib.decompress(data)
+        except Exception:
+            pass
+    return None
+
+
+def _enc_list(adv):
+    if isinstance(adv, str):
+        adv = adv.split(',')
+    try:
+        return tuple(str(e).strip().lower() for e in (adv or ()))
+    except Exception:
+        return ()
+
+
+def note_server_encodings(resp_json):
+    """Record what a field-data response advertised (accept_encoding, accept_data_enc, key_dict)."""
+    global _accepted, _data_encs, _server_key_version
+    if not isinstance(resp_json, dict):
+        return
+    if 'accept_encoding' in resp_json:
+        _accepted = _enc_list(resp_json.get('accept_encoding'))
+    if 'accept_data_enc' in resp_json:
+        _data_encs = _enc_list(resp_json.get('accept_data_enc'))
+    if 'key_dict' in resp_json:
+        try:
+            _server_key_version = int(resp_json.get('key_dict'))
+        except Exception:
+            pass
+
+
+def reject_encoding():
+    """Forget the negotiated encodings after the server refused an encoded body."""
+    global _accepted, _data_encs
+    _accepted = ()
+    _data_encs = ()
+
+
+def negotiated():
+    return ENCODING in _accepted
+
+
+def encode_body(text):
+    """Return (body, content_encoding) for a JSON request body.
+
+    content_encoding is None when the body is sent as-is: compression disabled, not yet
+    negotiated, body below the size threshold, or the deflated form not smaller.
+    """
+    raw = text.encode('utf-8') if isinstance(text, str) else text
+    if not getattr(settings, 'FIELD_DATA_GZIP', True) or not negotiated():
+        return raw, None
+    if len(raw) < int(getattr(settings, 'FIELD_DATA_COMPRESS_MIN_BYTES', 256)):
+        return raw, None
+    packed = deflate_bytes(raw)
+    if packed is None or len(packed) >= len(raw):
+        return raw, None
+    return packed, ENCODING
+
+
+def _ts_key(rec):
+    if 'timestamp' in rec:
+        return 'timestamp'
+    if 'ts' in rec:
+        return 'ts'
+    return None
+
+
+def delta_encode(records):
+    """Return records with every record after the first reduced to its changes."""
+    out = []
+    prev = None
+    for rec in records:
+        if prev is None or not isinstance(rec, dict):
+            out.append(rec)
+            prev = rec if isinstance(rec, dict) else None
+            continue
+        d = {}
+        tk = _ts_key(prev)
+        for k in rec:
+            v = rec[k]
+            if k == tk and k in prev and type(v) is int and type(prev[k]) is int:
+                if v != prev[k]:
+                    d['_dt'] = v - prev[k]
+                continue
+            if k not in prev or prev[k] != v or type(prev[k]) is not type(v):
+                d[k] = v
+        gone = [k for k in prev if k not in rec]
+        if gone:
+            d['_rm'] = gone
+        out.append(d)
+        prev = rec
+    return out
+
+
+def delta_decode(records):
+    """Inverse of delta_encode."""
+    out = []
+    prev = None
+    for rec in records:
+        if prev is None or not isinstance(rec, dict):
+            out.append(rec)
+            prev = rec if isinstance(rec, dict) else None
+            continue
+        full = dict(prev)
+        for k in rec.get('_rm', ()):
+            full.pop(k, None)
+        for k in rec:
+            if k != '_dt' and k != '_rm':
+                full[k] = rec[k]
+        tk = _ts_key(prev)
+        if tk is not None and '_dt' in rec:
+            full[tk] = prev[tk] + rec['_dt']
+        out.append(full)
+        prev = full
+    return out
+
+
+def encode_batch(payload, negotiate=True):
+    """Delta-encode payload['data'] in place when enabled; returns True if it was encoded.
+
+    negotiate=False skips the server advertisement check (LoRa hop to a base running
+    this firmware, which decodes in process_remote_field_data).
+    """
+    if not getattr(settings, 'FIELD_DATA_DELTA', True):
+        return False
+    if negotiate and DELTA_ENC not in _data_encs:
+        return False
+    data = payload.get('data') if isinstance(payload, dict) else None
+    if not isinstance(data, list) or len(data) < 2:
+        return False
+    payload['data'] = delta_encode(data)
+    payload['data_enc'] = DELTA_ENC
+    return True
+
+
+def decode_batch(payload):
+    """Rehydrate a delta-encoded envelope in place; no-op for plain payloads."""
+    if isinstance(payload, dict) and payload.get('data_enc') == DELTA_ENC:
+        data = payload.get('data')
+        if isinstance(data, list):
+            payload['data'] = delta_decode(data)
+        payload.pop('data_enc', None)
+    return payload
+
+
+def _key_dict_path():
+    return getattr(settings, 'FIELD_KEY_DICT_FILE', getattr(settings, 'LOG_DIR', '/logs').rstrip('/') + '/field_keys.json')
+
+
+def _valid_key_dict(doc):
+    return isinstance(doc, dict) and isinstance(doc.get('v'), int) and isinstance(doc.get('keys'), dict)
+
+
+def load_key_dict():
+    """Return the cached server key dictionary, loading it from flash on first use."""
+    global _key_dict
+    if _key_dict is None:
+        doc = None
+        try:
+            from config_persist import read_json_safe
+            doc = read_json_safe(_key_dict_path(), None)
+        except Exception:
+            doc = None
+        _key_dict = doc if _valid_key_dict(doc) else {}
+    return _key_dict or None
+
+
+def store_key_dict(doc):
+    """Validate, cache and persist a dictionary fetched from the server."""
+    global _key_dict
+    if isinstance(doc, dict) and 'version' in doc and 'v' not in doc:
+        doc = {'v': doc.get('version'), 'keys': doc.get('keys')}
+    if not _valid_key_dict(doc):
+        return False
+    keys = {}
+    for k in doc['keys']:
+        code = doc['keys'][k]
+        if isinstance(code, str) and code.isdigit():
+            keys[k] = code
+    _key_dict = {'v': doc['v'], 'keys': keys}
+    try:
+        from config_persist import write_json_atomic
+        write_json_atomic(_key_dict_path(), _key_dict)
+    except Exception:
+        pass
+    return True
+
+
+def key_dict_version():
+    kd = load_key_dict()
+    return kd['v'] if kd else None
+
+
+def key_dict_stale():
+    """True when no dictionary is cached or the server advertised a different version."""
+    v = key_dict_version()
+    return v is None or (_server_key_version is not None and _server_key_version != v)
+
+
+def key_map():
+    """Return (mapping, version) for record compaction; version is None for the legacy map."""
+    kd = load_key_dict()
+    if kd:
+        return kd['keys'], kd['v']
+    return LEGACY_KEY_MAP, None
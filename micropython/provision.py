@@ -5,9 +5,9 @@
 import json
 import os
 try:
-    import urequests as requests
+    import http_client as requests  # asyncio-based; also runs under CPython for host testing
 except Exception:
-    import requests  # fallback for host testing
+    requests = None
 
 # Import device settings robustly: prefer local settings module; fallback to micropython.settings
 device_settings = None
@@ -36,16 +36,16 @@ except Exception:
         except Exception:
             pass
 
-def _attempt_endpoint(base_url, endpoint, params=None, json_body=None, timeout=REQUEST_TIMEOUT):
+async def _attempt_endpoint(base_url, endpoint, params=None, json_body=None, timeout=REQUEST_TIMEOUT):
     url = base_url.rstrip("/") + endpoint
     try:
         if json_body is not None:
-            resp = requests.post(url, json=json_body, timeout=timeout)
+            resp = await requests.post(url, json=json_body, timeout=timeout)
         else:
             if params:
                 qs = "&".join("{}={}".format(k, v) for k, v in params.items())
                 url = url + "?" + qs
-            resp = requests.get(url, timeout=timeout)
+            resp = await requests.get(url, timeout=timeout)
         if not resp:
             return None, 'no_response'
         code = getattr(resp, 'status_code', None)
@@ -69,7 +69,7 @@ def _attempt_endpoint(base_url, endpoint, params=None, json_body=None, timeout=R
         except Exception as e:
             record_exception('provision._attempt_endpoint.gc_collect', e, status='WARN')
 
-def fetch_provisioning(unit_id=None, machine_id=None, base_url=None, force=False):
+async def fetch_provisioning(unit_id=None, machine_id=None, base_url=None, force=False):
     """
     Fetch provisioning settings from Admin. Uses device settings if unit/machine not specified.
     Returns the settings dict or None.
@@ -95,7 +95,7 @@ def fetch_provisioning(unit_id=None, machine_id=None, base_url=None, force=False
 
     # Try GET on each path first, then fallback to POST
     for path in API_PATHS:
-        body, err = _attempt_endpoint(base, path, params=params)
+        body, err = await _attempt_endpoint(base, path, params=params)
         if err is None and body and 'provisioned' in body:
             site_val = body.get('site_url') or body.get('wordpress_api_url') or ''
             if (body.get('provisioned') or body.get('staged_exists')) and site_val:
@@ -114,7 +114,7 @@ def fetch_provisioning(unit_id=None, machine_id=None, base_url=None, force=False
             return body.get('settings') or {}
     json_body = params
     for path in API_PATHS:
-        body, err = _attempt_endpoint(base, path, json_body=json_body)
+        body, err = await _attempt_endpoint(base, path, json_body=json_body)
         if err is None and body and 'provisioned' in body:
             site_val = body.get('site_url') or body.get('wordpress_api_url') or ''
             if (body.get('provisioned') or body.get('staged_exists')) and site_val:
@@ -138,7 +138,7 @@ try:
     from firmware_updater import download_and_apply_firmware
 except Exception as e:
     record_exception('provision.import_firmware_updater', e, status='WARN')
-    def download_and_apply_firmware(url, version_hint=None, chunk_size=CHUNK_SIZE):
+    async def download_and_apply_firmware(url, version_hint=None, chunk_size=CHUNK_SIZE):
         try:
             from utils import provisioning_log
             provisioning_log(f"No firmware_updater; skipping firmware: {url}")
@@ -147,7 +147,7 @@ except Exception as e:
             print("No firmware_updater; skipping firmware:", url)
         return True
 
-def apply_settings(settings_doc):
+async def apply_settings(settings_doc):
     """
     Apply settings returned by Admin:
     - NODE_TYPE, UNIT_Name
@@ -185,7 +185,7 @@ def apply_settings(settings_doc):
             record_exception('provision.apply_settings.log_firmware_request', e, status='WARN')
             print("Firmware requested:", fw_ver, fw_url)
         try:
-            download_and_apply_firmware(fw_url, fw_ver, chunk_size=CHUNK_SIZE)
+            await download_and_apply_firmware(fw_url, fw_ver, chunk_size=CHUNK_SIZE)
         except Exception as e:
             try:
                 from utils import provisioning_log
@@ -1,9 +1,19 @@
 # Remote node deep-sleep cycle runner for battery-powered LoRa remotes.
 # UPDATED: Deep sleep is now conditional on successful LoRa sync + field data transmission.
+#
+# Store-and-forward: every wake takes one sample and keeps it in a small ring (RTC memory,
+# which survives deep sleep, spilling to REMOTE_SAMPLE_RING_FILE when it does not fit). Only
+# every K-th wake opens a LoRa session, shipping the ring as one delta-encoded batch; an alarm
+# (external wake, REMOTE_ALARM_TEMP_*_F, Frostwatch alert) sends right away. K is
+# REMOTE_BATCH_SAMPLES, raised on low battery and on a weak link, and is told to the hub
+# ('every') so it expects the next check-in K slots later. The wakes in between skip LoRa and
+# sleep one check-in interval (measured from the last session's NEXT).
 
 import gc
 import machine
 import settings
+import sdata
+import ujson
 import uasyncio as asyncio
 import utime as time
 
@@ -127,6 +137,127 @@ def _is_external_wake_event():
         return False
 
 
+def _rtc_memory():
+    try:
+        return machine.RTC()
+    except Exception:
+        return None
+
+
+def _ring_file():
+    return getattr(settings, 'REMOTE_SAMPLE_RING_FILE', settings.LOG_DIR + '/remote_samples.json')
+
+
+def _load_ring():
+    doc = None
+    rtc = _rtc_memory()
+    try:
+        raw = rtc.memory() if rtc else b''
+        if raw:
+            doc = ujson.loads(raw)
+    except Exception:
+        doc = None
+    if not isinstance(doc, dict):
+        try:
+            with open(_ring_file(), 'r') as f:
+                doc = ujson.load(f)
+        except Exception:
+            doc = None
+    if not isinstance(doc, dict) or not isinstance(doc.get('s'), list):
+        doc = {'s': [], 'every': 1, 'cyc': 0}
+    return doc
+
+
+def _store_ring(doc):
+    raw = ujson.dumps(doc)
+    rtc = _rtc_memory()
+    if rtc and len(raw) <= _safe_int(getattr(settings, 'REMOTE_RTC_MEMORY_BYTES', 2048), 2048):
+        try:
+            rtc.memory(raw.encode())
+            try:
+                import os
+                os.remove(_ring_file())
+            except Exception:
+                pass
+            return True
+        except Exception:
+            pass
+    try:
+        from config_persist import write_json_atomic
+        ok = write_json_atomic(_ring_file(), doc)
+        if ok and rtc:
+            rtc.memory(b'')
+        return ok
+    except Exception:
+        return False
+
+
+def _sample_record(now_epoch):
+    t = getattr(sdata, 'cur_temp_f', None)
+    if t is None:
+        t = getattr(sdata, 'cur_device_temp_f', None)
+    return {
+        'ts': now_epoch,
+        'v': getattr(sdata, 'sys_voltage', None),
+        't': t,
+        'h': getattr(sdata, 'cur_humid', None),
+        'rssi': getattr(sdata, 'lora_SigStr', None),
+    }
+
+
+def _sample_alarm(rec):
+    if _is_external_wake_event():
+        return 'ext_wake'
+    t = rec.get('t')
+    if not isinstance(t, (int, float)):
+        return None
+    lo = getattr(settings, 'REMOTE_ALARM_TEMP_LOW_F', None)
+    hi = getattr(settings, 'REMOTE_ALARM_TEMP_HIGH_F', None)
+    if lo is not None and t <= lo:
+        return 'temp_low'
+    if hi is not None and t >= hi:
+        return 'temp_high'
+    if getattr(settings, 'ENABLE_FROSTWATCH', False) and t <= getattr(settings, 'FROSTWATCH_ALERT_TEMP', 42):
+        return 'frost'
+    return None
+
+
+def _batch_factor(voltage_v, snr):
+    """Samples per session: REMOTE_BATCH_SAMPLES, more on low battery or a weak link."""
+    k = max(1, _safe_int(getattr(settings, 'REMOTE_BATCH_SAMPLES', 4), 4))
+    try:
+        v = float(voltage_v)
+        if v > 0 and v <= float(getattr(settings, 'REMOTE_BATTERY_CRITICAL_V', 3.30)):
+            k *= 3
+        elif v > 0 and v <= float(getattr(settings, 'REMOTE_BATTERY_LOW_V', 3.45)):
+            k *= 2
+    except Exception:
+        pass
+    try:
+        if snr is not None and float(snr) < float(getattr(settings, 'REMOTE_BATCH_WEAK_SNR_DB', -7)):
+            k += (k + 1) // 2
+    except Exception:
+        pass
+    return min(k, max(1, _safe_int(getattr(settings, 'REMOTE_BATCH_MAX_SAMPLES', 16), 16)))
+
+
+def _batch_payload(ring, every):
+    payload = {
+        'unit_id': getattr(settings, 'UNIT_ID', ''),
+        'batch_id': '%s-%d-%d' % (getattr(settings, 'UNIT_ID', ''), _now_epoch(), len(ring['s'])),
+        'node_type': 'remote',
+        'fw': getattr(settings, 'FIRMWARE_VERSION', ''),
+        'data': list(ring['s']),
+        'every': every,
+    }
+    try:
+        import payload_codec
+        payload_codec.encode_batch(payload, negotiate=False)
+    except Exception:
+        pass
+    return payload
+
+
 async def _run_remote_cycle_once():
     """
     Returns:
@@ -138,18 +269,45 @@ async def _run_remote_cycle_once():
     except Exception:
         pass
 
+    wake_epoch = _now_epoch()
     await sampleEnviroment()
     record_field_data()
 
     sync_success = False
     next_epoch = None
 
+    ring = _load_ring()
+    rec = _sample_record(wake_epoch)
+    ring['s'].append(rec)
+    cap = max(1, _safe_int(getattr(settings, 'REMOTE_BATCH_MAX_SAMPLES', 16), 16)) * 2
+    if len(ring['s']) > cap:
+        ring['s'] = ring['s'][-cap:]
+    alarm = _sample_alarm(rec)
+    every = max(1, _safe_int(ring.get('every'), 1))
+    cycle_s = _safe_int(ring.get('cyc'), 0)
+
+    if not alarm and len(ring['s']) < every and cycle_s >= 30:
+        # Sample-only wake: keep the reading, skip the radio, sleep one check-in interval.
+        _store_ring(ring)
+        next_epoch = wake_epoch + cycle_s
+        persist_next_lora_sync(next_epoch)
+        await debug_print(f"remote_sleep: stored sample {len(ring['s'])}/{every}, no session", "REMOTE_NODE")
+        # No voltage stretch here: the batch factor already covers low battery and the next
+        # session has to land in the hub's slot.
+        return max(15, next_epoch - _now_epoch()), True
+
+    if alarm:
+        await debug_print(f"remote_sleep: alarm {alarm} - sending {len(ring['s'])} sample(s) now", "REMOTE_NODE")
+    # Keep the samples across a failed session (and its retry wake).
+    _store_ring(ring)
+
     try:
         if not await init_lora():
             raise RuntimeError('remote_sleep: LoRa init failed')
 
         await ensure_lora_listening()
-        next_delay = await send_field_data_controlled(None)
+        next_every = _batch_factor(getattr(sdata, 'sys_voltage', None), ring.get('snr'))
+        next_delay = await send_field_data_controlled(_batch_payload(ring, next_every))
         ack_ok = (next_delay is not None)
 
         now_epoch = _now_epoch()
@@ -158,6 +316,8 @@ async def _run_remote_cycle_once():
                 next_epoch = now_epoch + next_delay
             else:
                 next_epoch = _compute_next_sync_epoch(now_epoch)
+            _store_ring({'s': [], 'every': next_every, 'cyc': max(30, next_epoch - wake_epoch),
+                         'snr': getattr(sdata, 'lora_snr', None)})
             sync_success = True
             await debug_print(f"remote_sleep: ACK received, next delay {next_delay}", "REMOTE_NODE")
         else:
@@ -36,8 +36,8 @@ PROVISION_LOG_FILE = LOG_DIR + '/provisioning.log'
 LOG_MAX_BYTES = 64 * 1024
 LOG_MAX_ROTATIONS = 3
 LOG_ROTATE_CHECK_INTERVAL_S = 300
+# FIELD_DATA_LOG is segmented by field_journal (FIELD_DATA_SEGMENT_BYTES) and is not size-rotated here.
 LOG_FILES_TO_ROTATE = [
-    FIELD_DATA_LOG,
     DATA_HISTORY_LOG,
     REMOTE_INFO_LOG,
     ERROR_LOG_FILE,
@@ -47,7 +47,17 @@ LOG_FILES_TO_ROTATE = [
 ]
 
 FIELD_DATA_DELIVERED_LOG = LOG_DIR + '/field_data.delivered.log'
+# Hard flash ceiling for all field-data journals (lanes + backlog); each active segment counts as a
+# full FIELD_DATA_SEGMENT_BYTES. Frost/heat has its own share and is evicted (oldest first) beyond
+# it. The one exception to "frost is kept" is the ceiling itself: if FIELD_DATA_FROST_MAX_BYTES plus
+# four more FIELD_DATA_SEGMENT_BYTES does not fit FIELD_DATA_MAX_BYTES, frost inside its share is
+# evicted as a last resort. The defaults (64K + 4 x 16K <= 256K) never reach that case.
 FIELD_DATA_MAX_BYTES = 256 * 1024
+FIELD_DATA_FROST_MAX_BYTES = 64 * 1024
+FIELD_DATA_SEGMENT_BYTES = 16 * 1024
+FIELD_DATA_BINARY = True  # struct-packed records + per-segment schema frame; False writes JSON lines
+FIELD_DATA_PRIORITY_LANES = True  # frost/heat, watch, relay lanes drained before normal records
+FIELD_DATA_EVICT_DOWNSAMPLE = 0  # N>1: thin an old normal segment to every Nth record before dropping it
 FIELD_DATA_MAX_BATCH = 50
 FIELD_DATA_LORA_MAX_BATCH = 3
 FIELD_DATA_MAX_ATTEMPTS = 5
@@ -55,8 +65,12 @@ FIELD_DATA_RETRY_BASE_S = 5
 FIELD_DATA_MAX_BACKOFF_S = 60
 FIELD_DATA_SEND_INTERVAL = 30
 FIELD_DATA_BACKOFF_S = 10
-FIELD_DATA_GZIP = True
-FIELD_DATA_COMPACT_KEYS = True
+FIELD_DATA_GZIP = True  # deflate field-data POST bodies once the server advertises accept_encoding
+FIELD_DATA_COMPRESS_MIN_BYTES = 256  # smaller bodies are sent uncompressed
+FIELD_DATA_DELTA = True  # batch records carry only changed keys (HTTP once UC advertises delta1; LoRa to base)
+FIELD_DATA_COMPACT_KEYS = True  # compact record keys with the UC key dictionary (legacy map until fetched)
+FIELD_KEY_DICT_FILE = LOG_DIR + '/field_keys.json'
+FIELD_KEY_DICT_RETRY_S = 3600  # min interval between failed key-dictionary fetches
 FIELD_DATA_SKIP_DEFAULTS = True
 FIELD_DATA_ADAPTIVE_BACKPRESSURE = True
 FIELD_DATA_MIN_BATCH = 5
@@ -86,6 +100,13 @@ WORDPRESS_API_URL = ""
 WORDPRESS_USERNAME = "agadmin"
 WORDPRESS_PASSWORD = "Pepper-1"
 
+# Async HTTP client + keep-alive pool shared by all WordPress/Admin REST calls (http_client.py)
+HTTP_TIMEOUT_S = 10  # default per-operation timeout when a call passes none
+HTTP_POOL_ENABLED = True  # False sends 'Connection: close' and never reuses sockets
+HTTP_POOL_IDLE_S = 30  # drop a pooled connection idle longer than this
+HTTP_POOL_MAX_REQUESTS = 50  # requests per connection before it is recycled
+HTTP_POOL_MAX_HOSTS = 2  # idle connections kept (one per scheme/host/port)
+
 MACHINE_ID = None
 UNIT_PROVISIONED = False
 TMON_ADMIN_API_URL = "https://tmonsystems.com"
@@ -156,6 +177,33 @@ LORA_HELLO_TIMEOUT_S = 15
 LORA_HELLO_RETRIES = 3
 LORA_SESSION_SILENCE_S = 5
 LORA_SESSION_SILENCE_ACK_S = 5
+# Hub session table (lora_session.py): at most this many remotes hold burst state at once (LRU
+# eviction), each with at most LORA_SESSION_MAX_CHUNKS chunks / LORA_SESSION_BYTE_BUDGET bytes
+# of chunk data. Legacy full bursts (SETTINGS/SDATA) larger than the budget need a bigger one.
+LORA_MAX_SESSIONS = 6
+LORA_SESSION_MAX_CHUNKS = 128
+LORA_SESSION_BYTE_BUDGET = 12288
+# Airtime / duty cycle (lora_airtime.py): every frame is charged its time on air; frequencies
+# inside LORA_DUTY_CYCLE_BANDS ((low_mhz, high_mhz, duty_pct), EU868 sub-bands) get a budget
+# of duty_pct % of LORA_DUTY_CYCLE_WINDOW_S. Low-priority types (OTA, bulk dumps) only go while
+# more than LORA_DUTY_LOW_RESERVE_PCT of it is left and wait at most LORA_DUTY_MAX_DEFER_S
+# (after that an OTA job waits for the remote's next check-in); normal frames keep
+# LORA_DUTY_NORMAL_RESERVE_PCT back for READY/NACK/ACK. The default 915 MHz
+# is outside every band, so it is only accounted (see diagnostics 'airtime').
+LORA_DUTY_CYCLE_ENABLED = True
+LORA_DUTY_CYCLE_BANDS = (
+    (863.0, 868.0, 1.0), (868.0, 868.6, 1.0), (868.7, 869.2, 0.1), (869.4, 869.65, 10.0), (869.7, 870.0, 1.0),
+)
+LORA_DUTY_CYCLE_WINDOW_S = 3600
+LORA_DUTY_LOW_RESERVE_PCT = 50
+LORA_DUTY_NORMAL_RESERVE_PCT = 10
+LORA_DUTY_MAX_DEFER_S = 10
+LORA_LOW_PRIORITY_TYPES = ('LORA_OTA_META', 'LORA_OTA_FILE', 'LORA_OTA_DATA', 'LORA_OTA_APPLY', 'SETTINGS', 'SDATA', 'STATE_FILES')
+# Hub: REMOTE_NODE_INFO is written behind, at most once per this many seconds (forced on reboot).
+LORA_NODE_INFO_FLUSH_S = 120
+# Selective repeat: the hub answers END with NACK:<uid>:MISS:<bitmap> while chunks are missing
+# and the remote resends only those, at most this many rounds per session (0 disables).
+LORA_NACK_MAX_ROUNDS = 2
 PAIRED_BASE_UID = ''
 
 # ===================== SD Card Support =====================
@@ -226,6 +274,15 @@ WIFI_SIGNAL_SAMPLE_INTERVAL_S = 30
 
 LORA_NEXT_SYNC = 100
 LORA_SYNC_RATE = 300
+# Hub-side TDMA check-ins (lora_slots.py): each remote owns a window in a LORA_SYNC_RATE-second
+# cycle sized from its measured session time (x1.25 + guard), and the final ACK's NEXT points
+# at its start. Windows of remotes silent for LORA_TDMA_EXPIRE_CYCLES cycles are freed.
+# False restores uid-hash + jitter spacing.
+LORA_TDMA_ENABLED = True
+LORA_TDMA_GUARD_S = 2
+LORA_TDMA_MIN_SLOT_S = 6
+LORA_TDMA_MIN_DELAY_S = 30
+LORA_TDMA_EXPIRE_CYCLES = 4
 LORA_SYNC_WINDOW = 2
 LORA_NEXT_SYNC_FILE = LOG_DIR + '/lora_next_sync.txt'
 # Must cover the full chunked send + base-side assembly/ACK window before a remote sleeps.
@@ -238,6 +295,18 @@ REMOTE_SLEEP_MULTIPLIER_CRITICAL = 3.0
 REMOTE_EXT_WAKE_PIN = None
 REMOTE_EXT_WAKE_LEVEL = 0
 REMOTE_EXT_WAKE_RECOVERY_DISABLE_SLEEP = False
+# Store-and-forward (remote_node.py): one sample per wake, one LoRa session per
+# REMOTE_BATCH_SAMPLES wakes (x2 at REMOTE_BATTERY_LOW_V, x3 at critical, +50 % when the last
+# session's SNR was below REMOTE_BATCH_WEAK_SNR_DB; at most REMOTE_BATCH_MAX_SAMPLES). Samples
+# wait in RTC memory (REMOTE_RTC_MEMORY_BYTES) or REMOTE_SAMPLE_RING_FILE. A reading at or past
+# an alarm temperature (None disables) is sent immediately.
+REMOTE_BATCH_SAMPLES = 4
+REMOTE_BATCH_MAX_SAMPLES = 16
+REMOTE_BATCH_WEAK_SNR_DB = -7
+REMOTE_RTC_MEMORY_BYTES = 2048
+REMOTE_SAMPLE_RING_FILE = LOG_DIR + '/remote_samples.json'
+REMOTE_ALARM_TEMP_LOW_F = None
+REMOTE_ALARM_TEMP_HIGH_F = None
 LORA_SLOT_SPACING_S = LORA_SYNC_WINDOW
 LORA_CHECK_IN_MINUTES = 5
 LORA_WATCHDOG_HARD_RESET_ON_IDLE = False
@@ -249,6 +318,11 @@ LORA_RETRY_BASE_DELAY_S = 1.5
 LORA_MAX_BACKOFF_S = 90
 LORA_MISSED_SYNC_THRESHOLD = 3
 LORA_HEARTBEAT_INTERVAL_S = 120
+# Interrupt-driven receive: DIO1 sets a ThreadSafeFlag and a reader task copies each frame into
+# a ring of LORA_RX_RING_SLOTS preallocated buffers. False falls back to polling RX_DONE.
+LORA_IRQ_RX = True
+LORA_RX_RING_SLOTS = 8
+LORA_RX_WAIT_MS = 250
 LORA_CRC_ENABLED = False
 LORA_HARD_REBOOT_ERR_CODES = [-2]
 LORA_ERR_PERSIST_REBOOTS = 2
@@ -261,6 +335,11 @@ LORA_HMAC_REJECT_UNSIGNED = False
 LORA_HMAC_REPLAY_PROTECT = False
 LORA_REPLAY_WINDOW = 8
 LORA_COUNTERS_FILE = '/logs/lora_counters.json'
+# Counter journal (lora_counters.py): TX counters are reserved this far ahead (one flash append
+# per this many frames; up to this many counters are skipped after a reboot) and the journal is
+# folded into LORA_COUNTERS_FILE after this many lines.
+LORA_COUNTER_RESERVE = 32
+LORA_COUNTER_LOG_MAX_LINES = 256
 LORA_SESSION_SOFT_CRC = True
 REMOTE_USE_CONTROLLED_SESSION_ONLY = True
 # When True  -> remote nodes use the battery-optimized deep-sleep cycle
@@ -284,6 +363,14 @@ FREQ = 915.0
 BW = 125.0
 SF = 10
 CR = 7
+# Adaptive data rate for simple sessions: the hub offers each remote the fastest LORA_ADR_RATES
+# entry (sf, bw) its smoothed HELLO SNR supports with LORA_ADR_MARGIN_DB to spare, as
+# 'DR:<sf>:<bw>' in READY. HELLO/READY stay on SF/BW; both ends switch for the chunks, END and
+# final ACK. The hub returns to SF/BW after the final ACK or LORA_ADR_HOLD_S without a frame.
+LORA_ADR_ENABLED = True
+LORA_ADR_MARGIN_DB = 8
+LORA_ADR_RATES = ((7, 250.0), (7, 125.0), (8, 125.0), (9, 125.0))
+LORA_ADR_HOLD_S = 20
 SYNC_WORD = 0xF4
 POWER = 17
 CURRENT_LIMIT = 140.0
@@ -299,6 +386,23 @@ ENABLE_LORA_OTA = True
 LORA_OTA_CHUNK_SIZE = 180
 LORA_OTA_MAX_RETRIES = 3
 LORA_OTA_STAGE_MANIFEST_FILE = LOG_DIR + '/lora_ota_staged_manifest.json'
+# Streamed LoRa OTA: this remote takes files as LORA_OTA_DATA chunks written straight to the
+# staged file under a running SHA-256 (advertised to the hub in the SETTINGS burst; remotes
+# without it get whole-file payloads). Progress (per-file chunk bitmaps) survives a closed OTA
+# window or a reboot and is saved every LORA_OTA_RESUME_SAVE_EVERY chunks; the next check-in
+# reports it and the hub sends only the missing chunks.
+LORA_OTA_STREAM = True
+LORA_OTA_RESUME_SAVE_EVERY = 16
+# Broadcast LoRa OTA (hub): stream-capable remotes on an older version are enrolled in one
+# campaign starting a TDMA cycle + LORA_OTA_BCAST_LEAD_S after it opens and receive the package
+# together (UID '*'); each repairs its gaps at its next check-in. Remotes listen until
+# LORA_OTA_END or LORA_OTA_BCAST_IDLE_S without a frame. After a campaign, stragglers get a
+# unicast push for LORA_OTA_BCAST_REPEAT_S before a new campaign may open.
+LORA_OTA_BROADCAST = True
+LORA_OTA_BCAST_LEAD_S = 60
+LORA_OTA_BCAST_MIN_LEAD_S = 20
+LORA_OTA_BCAST_IDLE_S = 60
+LORA_OTA_BCAST_REPEAT_S = 86400
 
 LAST_ERROR_CODE = 0
 LAST_ERROR_NAME = ''
@@ -384,7 +488,8 @@ OTA_APPLY_INTERVAL_S = 5
 OTA_RESTORE_ON_FAIL = True
 OTA_MAX_FILE_BYTES = 256*1024
 OTA_FILES_ALLOWLIST = [
-    'main.py','remote_node.py','lora.py','utils.py','sampling.py','settings.py','relay.py','oled.py','ota.py','wprest.py'
+    'main.py','remote_node.py','lora.py','utils.py','sampling.py','settings.py','relay.py','oled.py','ota.py','wprest.py',
+    'field_journal.py','log_rotate.py','payload_codec.py','http_client.py','lora_hmac.py','lora_slots.py','lora_session.py','lora_counters.py','lora_airtime.py'
 ]
 OTA_MANIFEST_SIG_URL = OTA_MANIFEST_URL + '.sig'
 OTA_MANIFEST_HMAC_SECRET = ''
@@ -510,5 +615,13 @@ REST_HEADER_CONFIRM = 'X-TMON-CONFIRM'
 # Additions for LoRa OTA
 LORA_MAX_PACKET_SIZE = 200
 LORA_CHUNK_SIZE = 80
+# Binary chunk frames (raw payload + raw truncated HMAC instead of base64 + hex text envelopes).
+# The base advertises them in READY; remotes fall back to text frames with bases that do not.
+LORA_BINARY_FRAMES = True
+# Forward error correction: after every k data chunks of a multi-chunk transfer one XOR parity
+# chunk is sent, so a receiver missing one chunk of a group rebuilds it instead of asking for a
+# retransmit. k per message type (smaller k = more redundancy, 1/k extra airtime); 0 or absent
+# sends no parity for that type.
+LORA_FEC_GROUP = {'LORA_OTA_FILE': 4, 'LORA_OTA_DATA': 4, 'FIELD_DATA': 8, 'SETTINGS': 8, 'SDATA': 8, 'STATE_FILES': 8}
 OTA_TEMP_FILE = '/ota_temp.py'
 
@@ -254,6 +254,11 @@ async def handle_reboot_command(parts):
             return
     else:
         print("Rebooting...")
+    try:
+        import lora
+        lora.flush_remote_node_info(force=True)
+    except Exception:
+        pass
     machine.reset()
 
 
@@ -119,26 +119,24 @@ def checkLogDirectory():
             pass
 
 def append_to_backlog(payload):
+    """Append a payload to the backlog journal (segmented, budgeted with the field-data lanes)."""
     checkLogDirectory()
     try:
-        with open(FIELD_DATA_BACKLOG, 'a') as f:
-            f.write(ujson.dumps(payload) + '\n')
+        import field_journal
+        field_journal.append(payload, FIELD_DATA_BACKLOG)
+        field_journal.seal(FIELD_DATA_BACKLOG)
     except Exception as e:
         print(f"Error appending to backlog: {e}")
 
 def read_backlog():
+    """Yield undelivered backlog payloads oldest first, one at a time (never the whole journal)."""
     checkLogDirectory()
     try:
-        try:
-            os.stat(FIELD_DATA_BACKLOG)
-        except OSError:
-            return []
-        with open(FIELD_DATA_BACKLOG, 'r') as f:
-            lines = f.readlines()
-        return [ujson.loads(line) for line in lines if line.strip()]
+        import field_journal
+        for _, _, _, rec in field_journal.iter_records(FIELD_DATA_BACKLOG):
+            yield rec
     except Exception as e:
         print(f"Error reading backlog: {e}")
-        return []
 
 
 def _field_data_record_priority(record):
@@ -151,9 +149,10 @@ def _field_data_record_priority(record):
             return 90
         if record.get('frost_act') or record.get('heat_act'):
             return 85
-        if any(k.endswith('_on') and 'relay' in k for k in record.keys()):
+        # Relay keys are present in every snapshot; only an energized/running relay counts.
+        if any(k.endswith('_on') and 'relay' in k and record[k] for k in record.keys()):
             return 80
-        if any(k.endswith('_runtime_s') and 'relay' in k for k in record.keys()):
+        if any(k.endswith('_runtime_s') and 'relay' in k and record[k] for k in record.keys()):
             return 75
     except Exception:
         pass
@@ -181,12 +180,8 @@ def _payload_priority(payload):
 def clear_backlog():
     checkLogDirectory()
     try:
-        try:
-            os.stat(FIELD_DATA_BACKLOG)
-            with open(FIELD_DATA_BACKLOG, 'w') as f:
-                f.write('')
-        except OSError:
-            pass
+        import field_journal
+        field_journal.clear(FIELD_DATA_BACKLOG)
     except Exception as e:
         print(f"Error clearing backlog: {e}")
 
@@ -1057,6 +1052,11 @@ class TMONAI:
     async def recover_system(self):
         try:
             await log_error('AI: Performing soft reset', 'recovery')
+            try:
+                import lora
+                lora.flush_remote_node_info(force=True)
+            except Exception:
+                pass
             machine.soft_reset()
         except Exception as e:
             await log_error(f'AI: Recovery failed: {e}', 'recovery')
@@ -1071,12 +1071,19 @@ class TMONAI:
 TMON_AI = TMONAI()
 
 # --- field data record + sender (restored) ---
-def append_field_data_entry(entry: dict):
-    """Append a JSON entry to FIELD_DATA_LOG using the standard path."""
+def append_field_data_entry(entry: dict, packed=False):
+    """Append an entry to its FIELD_DATA_LOG priority lane (binary frame when packed, else a JSON line)."""
     try:
         checkLogDirectory()
-        with open(settings.FIELD_DATA_LOG, 'a') as f:
-            f.write(ujson.dumps(entry) + '\n')
+        import field_journal
+        lane_path = field_journal.lane_path(_field_data_lane(entry))
+        field_journal.append(entry, lane_path, packed)
+        # Seal full segments here too, unless an upload currently holds the journal open.
+        if not _send_field_data_lock.locked():
+            try:
+                field_journal.seal(lane_path)
+            except Exception:
+                pass
         gc.collect()
     except Exception as e:
         try:
@@ -1152,29 +1159,9 @@ def _compact_field_record(record):
         return record
 
     skip_defaults = bool(getattr(settings, 'FIELD_DATA_SKIP_DEFAULTS', True))
-    key_map = {
-        'cur_temp_f': 't_f',
-        'cur_temp_c': 't_c',
-        'cur_humid': 'hum',
-        'cur_bar_pres': 'bar',
-        'sys_voltage': 'v',
-        'free_mem': 'fm',
-        'loop_runtime': 'lr',
-        'script_runtime': 'sr',
-        'cur_device_temp_f': 'dt_f',
-        'cur_device_temp_c': 'dt_c',
-        'cur_device_humid': 'dh',
-        'cur_device_bar_pres': 'db',
-        'cur_soil_moisture': 'sm',
-        'cur_soil_temp_f': 'st_f',
-        'cur_soil_temp_c': 'st_c',
-        'engine1_speed_rpm': 'e1r',
-        'engine2_speed_rpm': 'e2r',
-        'engine1_batt_v': 'e1v',
-        'engine2_batt_v': 'e2v',
-        'cpu_temp': 'cpu',
-        'error_count': 'ec',
-    }
+    # Server key dictionary when cached (batch carries 'kd'), else the legacy built-in map.
+    import payload_codec
+    key_map = payload_codec.key_map()[0]
 
     device_enabled = bool(
         getattr(settings, 'SAMPLE_DEVICE_TEMP', False)
@@ -1214,10 +1201,35 @@ def _compact_field_record(record):
     for k, v in record.items():
         if not _keep_val(k, v):
             continue
-        nk = key_map.get(k, k)
+        nk = k if k == 'timestamp' else key_map.get(k, k)
         compact[nk] = v
     return compact
 
+_field_key_dict_retry_at = 0
+
+async def _refresh_field_key_dict(requests, base_url):
+    """Fetch the Unit Connector key dictionary when none is cached or a newer one was advertised."""
+    global _field_key_dict_retry_at
+    try:
+        import payload_codec
+        if not bool(getattr(settings, 'FIELD_DATA_COMPACT_KEYS', False)) or not payload_codec.key_dict_stale():
+            return
+        now = time.time()
+        if now < _field_key_dict_retry_at:
+            return
+        _field_key_dict_retry_at = now + int(getattr(settings, 'FIELD_KEY_DICT_RETRY_S', 3600))
+        resp = await requests.get(base_url.rstrip('/') + '/wp-json/tmon/v1/device/field-keys', timeout=10)
+        try:
+            if resp.status_code == 200 and payload_codec.store_key_dict(resp.json()):
+                _field_key_dict_retry_at = 0
+                await debug_print(f'sfd: key dict v{payload_codec.key_dict_version()}', 'DEBUG')
+            else:
+                await debug_print(f'sfd: key dict fetch {resp.status_code}', 'WARN')
+        finally:
+            resp.close()
+    except Exception as e:
+        await debug_print(f'sfd: key dict fetch err: {e}', 'WARN')
+
 def record_field_data():
     """Append the current device telemetry snapshot for transport and storage."""
     entry = build_sdata_snapshot(include_meta=True)
@@ -1260,12 +1272,75 @@ def record_field_data():
     try:
         from utils import led_status_flash
         led_status_flash('FIELD_LOG')
-        append_field_data_entry(entry)
+        append_field_data_entry(entry, packed=bool(getattr(settings, 'FIELD_DATA_BINARY', True)))
     except Exception as e:
         print(f"Error recording field data: {e}")
 
+def _field_data_lane(record):
+    """Map a record to its field-data journal lane (frost, watch, relay, normal)."""
+    if not bool(getattr(settings, 'FIELD_DATA_PRIORITY_LANES', True)):
+        return 'normal'
+    priority = _field_data_record_priority(record)
+    if priority >= 100:
+        return 'frost'
+    if priority >= 85:
+        return 'watch'
+    if priority >= 80:
+        # relay*_runtime_s is cumulative, so only an energized relay selects this lane.
+        return 'relay'
+    return 'normal'
+
+
+def _iter_field_batches(batch_size, path=None, compact=True):
+    """Yield (compacted_records, journal_spans) one batch at a time from one journal lane.
+
+    A batch may be empty when every record in it failed to compact. compact=False yields
+    the records with their original keys (the LoRa sender picks fields by name).
+    """
+    import field_journal
+    batch = []
+    spans = []
+    for seq, start, end, rec in field_journal.iter_records(path):
+        field_journal.add_span(spans, seq, start, end)
+        try:
+            batch.append(_compact_field_record(rec) if compact else rec)
+        except Exception:
+            pass
+        rec = None
+        if len(batch) >= batch_size:
+            yield batch, spans
+            batch = []
+            spans = []
+    if spans:
+        yield batch, spans
+
+
+async def drain_backlog(deliver):
+    """Send backlog journal payloads one at a time, advancing its cursor per delivery.
+
+    deliver(payload, label) is awaited for each payload and returns True once it was accepted;
+    the first False stops the drain (the rest stays journaled) and returns False.
+    """
+    import field_journal
+    n = 0
+    try:
+        for seq, start, end, payload in field_journal.iter_records(FIELD_DATA_BACKLOG):
+            n += 1
+            if not await deliver(payload, f'backlog {n}'):
+                return False
+            field_journal.mark_delivered([(seq, start, end)], FIELD_DATA_BACKLOG)
+        field_journal.retire(FIELD_DATA_BACKLOG)
+    except Exception as e:
+        await debug_print(f'sfd: backlog drain err: {e}', 'ERROR')
+        return False
+    return True
+
+
 async def send_field_data_log():
-    """Send field_data.log to WordPress and rotate on confirmation."""
+    """Stream undelivered field-data journal records to WordPress one batch at a time.
+
+    Peak memory is one batch regardless of journal size; the cursor advances per delivered batch.
+    """
     try:
         load_persisted_wordpress_api_url()
         import wprest as _w
@@ -1304,61 +1379,19 @@ async def send_field_data_log():
             return
 
         async with _send_field_data_lock:
-            await debug_print('sfd: reading log', 'DEBUG')
-            current_items = []
-            total_lines = 0
-            batch = []
+            import field_journal
+            import payload_codec
+            for lane_path in field_journal.lane_paths():
+                try:
+                    field_journal.seal(lane_path)
+                except Exception:
+                    pass
             batch_default = int(getattr(settings, 'FIELD_DATA_MAX_BATCH', 10))
             batch_size = _get_adaptive_batch_size(batch_default)
             max_retries = int(getattr(settings, 'FIELD_DATA_MAX_ATTEMPTS', 5))
             backoff_base = int(getattr(settings, 'FIELD_DATA_RETRY_BASE_S', 5))
 
-            with open(settings.FIELD_DATA_LOG, 'rb') as f:
-                for raw_line in f:
-                    if not raw_line:
-                        continue
-                    try:
-                        line = raw_line.decode('utf-8', 'ignore')
-                    except Exception:
-                        try:
-                            line = raw_line.decode()
-                        except Exception:
-                            line = ''
-                    if line and line.strip():
-                        try:
-                            obj = ujson.loads(line)
-                            batch.append(_compact_field_record(obj))
-                            total_lines += 1
-                            if len(batch) >= batch_size:
-                                current_items.append({'payload': {'unit_id': settings.UNIT_ID, 'data': batch}, 'source': 'log'})
-                                batch = []
-                                if asyncio:
-                                    await asyncio.sleep_ms(1)
-                        except Exception as pe:
-                            await debug_print(f'send_field_data_log: JSON parse error on a line: {pe}', 'ERROR')
-            if batch:
-                current_items.append({'payload': {'unit_id': settings.UNIT_ID, 'data': batch}, 'source': 'log'})
-
-            await debug_print(f'sfd: read {total_lines} lines, {len(current_items)} batches', 'DEBUG')
-
-            backlog_items = []
-            try:
-                backlog = read_backlog()
-            except Exception:
-                backlog = []
-            for item in backlog:
-                backlog_items.append({'payload': item, 'source': 'backlog'})
-            if asyncio:
-                await asyncio.sleep_ms(5)
-            await debug_print(f'sfd: backlog {len(backlog_items)}', 'DEBUG')
-            payload_items = backlog_items + current_items
-            payload_items.sort(key=lambda item: _payload_priority(item['payload']), reverse=True)
-
-            if not payload_items:
-                await debug_print('sfd: no payloads', 'DEBUG')
-                return
-
-            import urequests as requests
+            import http_client as requests
 
             def _sanitize_json(obj, depth=0):
                 if depth > 6:
@@ -1404,14 +1437,9 @@ async def send_field_data_log():
                     return '<obj>'
 
             field_data_max_backoff = int(getattr(settings, 'FIELD_DATA_MAX_BACKOFF_S', 60))
-            sent_indices = []
-            for idx, item in enumerate(payload_items):
+
+            async def _deliver(payload, label):
                 delay = backoff_base
-                payload = item.get('payload', {})
-                try:
-                    await asyncio.sleep_ms(2)
-                except Exception:
-                    pass
                 try:
                     payload['machine_id'] = get_machine_id()
                 except Exception:
@@ -1426,7 +1454,7 @@ async def send_field_data_log():
                     pass
 
                 delivered = False
-                await debug_print(f'sfd: send {idx+1}/{len(payload_items)}', 'DEBUG')
+                await debug_print(f'sfd: send {label}', 'DEBUG')
 
                 for attempt in range(1, max_retries + 1):
                     try:
@@ -1448,11 +1476,15 @@ async def send_field_data_log():
                             if isinstance(payload, dict) and 'data' in payload:
                                 minimal['data'] = _sanitize_json(payload['data'])
                             encoded = ujson.dumps(minimal)
+                        body, content_encoding = payload_codec.encode_body(encoded)
+                        if content_encoding:
+                            headers['Content-Encoding'] = content_encoding
+                            await debug_print(f'sfd: {content_encoding} {len(encoded)}->{len(body)}B', 'DEBUG')
 
-                        resp = requests.post(
+                        resp = await requests.post(
                             WORDPRESS_API_URL + '/wp-json/tmon/v1/device/field-data',
                             headers=headers,
-                            data=encoded,
+                            data=body,
                             timeout=10
                         )
                         try:
@@ -1472,6 +1504,7 @@ async def send_field_data_log():
                                         resp_json = {}
                                 except Exception:
                                     pass
+                            payload_codec.note_server_encodings(resp_json)
                             ok_resp = (resp.status_code == 200) and ((resp_json.get('status') == 'ok') or (resp_bytes == b'OK'))
                             if ok_resp:
                                 try:
@@ -1485,7 +1518,7 @@ async def send_field_data_log():
                                 except Exception:
                                     pass
                                 delivered = True
-                                await debug_print(f'sfd: payload {idx+1} ok', 'DEBUG')
+                                await debug_print(f'sfd: payload {label} ok', 'DEBUG')
                                 try:
                                     from oled import display_message
                                     await display_message("Field Data Sent", 1.5)
@@ -1495,6 +1528,10 @@ async def send_field_data_log():
                                     await asyncio.sleep_ms(5)
                                 break
                             else:
+                                if (content_encoding or (isinstance(payload, dict) and payload.get('data_enc'))) and resp.status_code in (400, 415):
+                                    # Server could not decode the body; fall back to plain JSON records.
+                                    payload_codec.reject_encoding()
+                                    payload_codec.decode_batch(payload)
                                 await log_error(f'sfd: delivery fail att{attempt} {resp.status_code}', 'field_data')
                         finally:
                             try:
@@ -1508,43 +1545,57 @@ async def send_field_data_log():
                     await asyncio.sleep(min(field_data_max_backoff, delay) + jitter)
                     delay = min(delay * 2, field_data_max_backoff)
 
-                if delivered:
-                    sent_indices.append(idx)
+                return delivered
+
+            # Stream one batch at a time, draining lanes in priority order with the legacy
+            # backlog ahead of the normal lane. Stop at the first batch that exhausts its retries.
+            sent = 0
+            stalled = False
+            await _refresh_field_key_dict(requests, WORDPRESS_API_URL)
+            key_version = payload_codec.key_dict_version() if bool(getattr(settings, 'FIELD_DATA_COMPACT_KEYS', False)) else None
+
+            for lane in field_journal.LANES:
+                lane_path = field_journal.lane_path(lane)
+                if lane == 'normal' and not await drain_backlog(_deliver):
+                    stalled = True
+                    break
+                for data, spans in _iter_field_batches(batch_size, lane_path):
+                    if data:
+                        payload = {'unit_id': settings.UNIT_ID, 'data': data}
+                        data = None
+                        if key_version is not None:
+                            payload['kd'] = key_version
+                        payload_codec.encode_batch(payload)
+                        ok = await _deliver(payload, f'{sent + 1} {lane}')
+                        payload = None
+                    else:
+                        ok = True
+                    if not ok:
+                        await debug_print(f'sfd: batch {sent + 1} failed after max', 'ERROR')
+                        await log_error('Field data log delivery failed after max retries, will try again later.', 'field_data')
+                        _update_adaptive_batch_size(batch_default, False)
+                        stalled = True
+                        break
+                    try:
+                        field_journal.mark_delivered(spans, lane_path)
+                    except Exception as e:
+                        await debug_print(f'sfd: cursor update err: {e}', 'ERROR')
+                    sent += 1
                     _update_adaptive_batch_size(batch_default, True)
-                else:
-                    await debug_print(f'sfd: payload {idx+1} failed after max', 'ERROR')
-                    await log_error('Field data log delivery failed after max retries, will try again later.', 'field_data')
-                    _update_adaptive_batch_size(batch_default, False)
-                if asyncio and (idx % 3 == 0):
                     try:
+                        gc.collect()
                         await asyncio.sleep_ms(1)
                     except Exception:
                         pass
+                if stalled:
+                    break
 
-            if total_lines:
-                delivered_current_all = all(
-                    idx in sent_indices
-                    for idx, item in enumerate(payload_items)
-                    if item.get('source') == 'log'
-                )
-                if delivered_current_all:
-                    await debug_print('sfd: rotate field log', 'DEBUG')
-                    rotate_field_data_log()
-
-            unsent = [item['payload'] for idx, item in enumerate(payload_items) if idx not in sent_indices]
-            if unsent:
-                await debug_print(f'sfd: backlog write {len(unsent)}', 'DEBUG')
-                clear_backlog()
-                for i, p in enumerate(unsent):
-                    append_to_backlog(p)
-                    if asyncio and (i % 5 == 0):
-                        try:
-                            await asyncio.sleep_ms(1)
-                        except Exception:
-                            pass
-            else:
-                await debug_print('sfd: all delivered, clear backlog', 'DEBUG')
-                clear_backlog()
+            for lane_path in field_journal.lane_paths():
+                try:
+                    field_journal.retire(lane_path)
+                except Exception:
+                    pass
+            await debug_print(f'sfd: sent {sent} batch(es){" (stalled)" if stalled else ""}', 'DEBUG')
     except Exception as e:
         await debug_print(f'sfd: exception {type(e).__name__}: {e}', 'ERROR')
         await log_error(f'sfd: failed send: {type(e).__name__}: {e}', 'field_data')
@@ -1555,8 +1606,8 @@ async def send_field_data_via_lora():
 
     Uses a similar batching/retry strategy as send_field_data_log, but sends
     via LoRa instead of HTTP. A batch is only treated as delivered after an
-    explicit base ACK is observed, then corresponding lines are removed from
-    FIELD_DATA_LOG to avoid duplicates.
+    explicit base ACK is observed, then the field-data journal cursor is
+    advanced past it so it is never resent.
     After field data, best-effort send settings.py and sdata.py snapshots.
 
     Returns:
@@ -1602,19 +1653,13 @@ async def send_field_data_via_lora():
 
     async with _send_field_data_lock:
         try:
-            # Read entire log as bytes to keep per-line indices
-            try:
-                with open(settings.FIELD_DATA_LOG, 'rb') as f:
-                    raw_lines = f.readlines()
-            except Exception as e:
-                await debug_print(f'sfd_lora: read log err: {e}', 'ERROR')
-                return
-            if asyncio:
-                await asyncio.sleep_ms(5)
+            import field_journal
+            for lane_path in field_journal.lane_paths():
+                try:
+                    field_journal.seal(lane_path)
+                except Exception:
+                    pass
 
-            batches = []
-            batch = []
-            batch_indices = []
             try:
                 batch_default = int(getattr(settings, 'FIELD_DATA_LORA_MAX_BATCH', 3))
                 batch_size = _get_adaptive_batch_size(batch_default)
@@ -1622,39 +1667,14 @@ async def send_field_data_via_lora():
                 batch_default = 3
                 batch_size = _get_adaptive_batch_size(batch_default)
 
-            for idx, raw in enumerate(raw_lines):
-                if not raw:
-                    continue
-                try:
-                    line = raw.decode('utf-8', 'ignore')
-                except Exception:
-                    try:
-                        line = raw.decode()
-                    except Exception:
-                        line = ''
-                if not line.strip():
-                    continue
-                try:
-                    obj = _compact_field_record(ujson.loads(line))
-                except Exception as pe:
-                    await debug_print(f'sfd_lora: JSON parse err on line {idx}: {pe}', 'ERROR')
-                    continue
-                batch.append(obj)
-                batch_indices.append(idx)
-                if len(batch) >= batch_size:
-                    batches.append((batch, batch_indices))
-                    batch, batch_indices = [], []
-                if asyncio and idx and idx % 20 == 0:
-                    await asyncio.sleep_ms(1)
-            if batch:
-                batches.append((batch, batch_indices))
-
-            if not batches:
-                await debug_print('sfd_lora: no records to send', 'DEBUG')
-                return
+            import sdata
+
+            def _batches():
+                # Lanes in priority order; one batch is materialized at a time.
+                for lane_path in field_journal.lane_paths():
+                    for batch, spans in _iter_field_batches(batch_size, lane_path, compact=False):
+                        yield batch, spans, lane_path
 
-            batches.sort(key=lambda batch_info: _payload_priority({'data': batch_info[0]}), reverse=True)
-            acked_indices = set()
             try:
                 max_attempts = int(getattr(settings, 'FIELD_DATA_MAX_ATTEMPTS', 5))
             except Exception:
@@ -1668,7 +1688,11 @@ async def send_field_data_via_lora():
             except Exception:
                 field_data_max_backoff = 60
 
-            for bi, (data_batch, idx_list) in enumerate(batches):
+            bi = -1
+            for bi, (data_batch, span_list, lane_path) in enumerate(_batches()):
+                if not data_batch:
+                    field_journal.mark_delivered(span_list, lane_path)
+                    continue
                 try:
                     batch_epoch = int(time.time())
                 except Exception:
@@ -1703,10 +1727,15 @@ async def send_field_data_via_lora():
                     'fw': getattr(settings, 'FIRMWARE_VERSION', ''),
                     'data': minimal_records,
                 }
+                try:
+                    import payload_codec
+                    payload_codec.encode_batch(payload, negotiate=False)
+                except Exception:
+                    pass
 
                 delivered = False
                 delay = base_delay
-                await debug_print(f'sfd_lora: batch {bi+1}/{len(batches)} size={len(data_batch)}', 'DEBUG')
+                await debug_print(f'sfd_lora: batch {bi+1} size={len(data_batch)}', 'DEBUG')
 
                 for attempt in range(1, max_attempts + 1):
                     try:
@@ -1737,37 +1766,13 @@ async def send_field_data_via_lora():
                         await asyncio.sleep(30)
 
                     if delivered:
-                        acked_indices.update(idx_list)
                         await debug_print(f'sfd_lora: batch {bi+1} delivered', 'DEBUG')
                         _update_adaptive_batch_size(batch_default, True)
-                        # Preserve delivered records in history before trimming current log.
-                        try:
-                            with open(settings.DATA_HISTORY_LOG, 'ab') as hist:
-                                for line_idx in idx_list:
-                                    if 0 <= line_idx < len(raw_lines):
-                                        try:
-                                            hist.write(raw_lines[line_idx])
-                                        except Exception:
-                                            pass
-                        except Exception as e:
-                            await debug_print(f'sfd_lora: history append err: {e}', 'ERROR')
-                        # Immediately rewrite field_data.log so delivered records are removed even if subsequent batches fail
+                        # Advance the journal cursor immediately so later failures never resend this batch.
                         try:
-                            with open(settings.FIELD_DATA_LOG, 'wb') as f:
-                                for idx, raw in enumerate(raw_lines):
-                                    if idx not in acked_indices:
-                                        try:
-                                            f.write(raw)
-                                        except Exception:
-                                            pass
-                                    if asyncio and idx and idx % 40 == 0:
-                                        try:
-                                            await asyncio.sleep_ms(1)
-                                        except Exception:
-                                            pass
-                            await debug_print(f'sfd_lora: trimmed {len(acked_indices)} delivered lines', 'DEBUG')
+                            field_journal.mark_delivered(span_list, lane_path)
                         except Exception as e:
-                            await debug_print(f'sfd_lora: trim err: {e}', 'ERROR')
+                            await debug_print(f'sfd_lora: cursor update err: {e}', 'ERROR')
                         break
 
                     await debug_print(f'sfd_lora: batch {bi+1} att{attempt} failed, retry', 'WARN')
@@ -1781,11 +1786,20 @@ async def send_field_data_via_lora():
                 if not delivered:
                     await debug_print(f'sfd_lora: batch {bi+1} failed after retries', 'ERROR')
                     _update_adaptive_batch_size(batch_default, False)
+                    # Undelivered records stay behind the cursor for the next cycle.
+                    break
                 if asyncio and (bi % 2 == 0):
                     try:
                         await asyncio.sleep_ms(1)
                     except Exception:
                         pass
+            if bi < 0:
+                await debug_print('sfd_lora: no records to send', 'DEBUG')
+            for lane_path in field_journal.lane_paths():
+                try:
+                    field_journal.retire(lane_path)
+                except Exception:
+                    pass
         except Exception as e:
             await debug_print(f'sfd_lora: outer exc {e}', 'ERROR')
 
@@ -1842,7 +1856,7 @@ async def periodic_provision_check():
                 await debug_print('prov: no hub', 'PROVISION')
             else:
                 try:
-                    import urequests as _r
+                    import http_client as _r
                 except Exception:
                     _r = None
 
@@ -1861,9 +1875,9 @@ async def periodic_provision_check():
 
                     await _a.sleep(0)
                     try:
-                        resp = _r.post(hub.rstrip('/') + '/wp-json/tmon-admin/v1/device/check-in', json=body, timeout=10)
+                        resp = await _r.post(hub.rstrip('/') + '/wp-json/tmon-admin/v1/device/check-in', json=body, timeout=10)
                     except TypeError:
-                        resp = _r.post(hub.rstrip('/') + '/wp-json/tmon-admin/v1/device/check-in', json=body)
+                        resp = await _r.post(hub.rstrip('/') + '/wp-json/tmon-admin/v1/device/check-in', json=body)
 
                     status = getattr(resp, 'status_code', 0)
                     if status == 200:
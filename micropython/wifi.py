@@ -3,7 +3,6 @@
 import utime as time
 import network
 import uasyncio as asyncio
-import urequests
 import gc
 import sdata
 
@@ -189,6 +188,7 @@ async def connectToWifiNetwork():
 			if wlan.isconnected():
 				await debug_print("Connected.", "WIFI")
 				sdata.WIFI_CONNECTED = True
+				_drop_http_pool()
 				try:
 					s.net_wifi_MAC = wlan.config('mac')
 					s.net_wifi_IP = wlan.ifconfig()[0]
@@ -299,7 +299,10 @@ async def showNetworkWIFI():
 async def check_internet_connection():
 	# ...existing code...
 	try:
-		response = urequests.get("http://www.google.com")
+		import http_client
+		# Awaited with a timeout so a dead uplink cannot stall the loop; only the status is needed.
+		timeout = getattr(get_settings(), 'HTTP_TIMEOUT_S', 10)
+		response = await http_client.get("http://www.google.com", stream=True, timeout=timeout)
 		try:
 			if response and getattr(response, 'status_code', 0) == 200:
 				sdata.WAN_CONNECTED = True
@@ -330,6 +333,14 @@ async def check_internet_connection():
 	finally:
 		await asyncio.sleep(0)
 
+def _drop_http_pool():
+	# Pooled keep-alive sockets belong to the previous association; never reuse them.
+	try:
+		import http_client
+		http_client.close_all()
+	except Exception:
+		pass
+
 def disable_wifi():
 	# ...existing code...
 	try:
@@ -337,6 +348,7 @@ def disable_wifi():
 		wlan.active(False)
 	except Exception as e:
 		record_exception('wifi.disable_wifi', e, status='WARN')
+	_drop_http_pool()
 	sdata.WIFI_CONNECTED = False
 
 async def wifi_rssi_monitor():
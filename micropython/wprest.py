@@ -9,12 +9,9 @@ except Exception:
     except Exception:
         asyncio = None
 try:
-    import urequests as requests
+    import http_client as requests
 except Exception:
-    try:
-        import requests
-    except Exception:
-        requests = None
+    requests = None
 
 try:
     import ujson as json
@@ -28,13 +25,13 @@ from utils import (
     persist_unit_name,
     persist_custom_settings,
     append_to_backlog,
-    read_backlog,
-    clear_backlog,
+    drain_backlog,
     format_exception,
     log_exception,
 )
 from config_persist import read_json_safe, write_json_atomic
 import settings
+import payload_codec
 import os
 try:
     from diagnostics import get_diagnostics_snapshot
@@ -58,8 +55,8 @@ def _current_wp_url():
     except Exception:
         return ''
 
-# Minimal async HTTP client wrappers are not necessary when using urequests synchronously,
-# but we wrap calls with try/except and timeouts where possible for safety.
+# All HTTP goes through http_client (asyncio streams + keep-alive pool), so each awaited
+# request yields to the LoRa and sensor tasks; calls still pass explicit timeouts.
 
 def _auth_headers(mode=None):
     """Return headers for different auth modes:
@@ -334,9 +331,9 @@ async def register_with_wp():
             try:
                 url = base.rstrip('/') + path
                 try:
-                    resp = requests.post(url, json=payload, headers=hdrs, timeout=8)
+                    resp = await requests.post(url, json=payload, headers=hdrs, timeout=8)
                 except TypeError:
-                    resp = requests.post(url, json=payload, headers=hdrs)
+                    resp = await requests.post(url, json=payload, headers=hdrs)
                 status = getattr(resp, 'status_code', 0)
                 body_snip = ''
                 try:
@@ -401,8 +398,10 @@ async def register_with_wp():
         return False
 
 async def send_data_to_wp():
-    """Send recent field data batches to WordPress field-data endpoint (best-effort).
-       This implementation uses same semantics as utils.send_field_data_log but is a lightweight wrapper.
+    """Send backlog field data payloads to WordPress field-data endpoint (best-effort).
+       Payloads are streamed from the backlog journal one at a time and each is marked delivered
+       as soon as it is accepted (utils.drain_backlog); the first failure leaves the rest journaled.
+       Returns True if at least one payload was posted.
     """
     try:
         from utils import is_http_allowed_for_node
@@ -416,21 +415,26 @@ async def send_data_to_wp():
         if not getattr(settings, 'WORDPRESS_API_URL', ''):
             await debug_print('wprest: no WP url', 'WARN')
             return False
-        backlog = read_backlog()
-        if not backlog:
-            if asyncio:
-                await asyncio.sleep_ms(5)
-            return False
         url = settings.WORDPRESS_API_URL.rstrip('/') + '/wp-json/tmon/v1/device/field-data'
         hdrs = _auth_headers()
-        for payload in backlog:
+        posted = [0]
+
+        async def _post(payload, label):
             try:
                 js = json.dumps(payload)
             except Exception:
                 js = '{}'
             try:
-                resp = requests.post(url, data=js, headers=hdrs, timeout=10)
+                req_hdrs = hdrs
+                data, content_encoding = payload_codec.encode_body(js)
+                if content_encoding:
+                    req_hdrs = dict(hdrs)
+                    req_hdrs['Content-Encoding'] = content_encoding
+                resp = await requests.post(url, data=data, headers=req_hdrs, timeout=10)
                 code, body, parsed = _extract_response(resp)
+                payload_codec.note_server_encodings(parsed)
+                if content_encoding and code in (400, 415):
+                    payload_codec.reject_encoding()
                 if resp:
                     try:
                         resp.close()
@@ -441,8 +445,8 @@ async def send_data_to_wp():
                 ok_resp = (code in (200, 201)) or (isinstance(parsed, dict) and parsed.get('status') == 'ok')
                 if ok_resp:
                     _mark_rest_success()
-                    clear_backlog()
-                    await debug_print('wprest: field data posted', 'INFO')
+                    posted[0] += 1
+                    await debug_print(f'wprest: field data {label} posted', 'INFO')
                     return True
                 if code == 401:
                     await _record_rest_failure('send_data_to_wp', code, '/wp-json/tmon/v1/device/field-data', 'unauthorized')
@@ -453,9 +457,12 @@ async def send_data_to_wp():
             except Exception as e:
                 await _record_rest_failure('send_data_to_wp', 0, '/wp-json/tmon/v1/device/field-data', 'request_exception', {'exception': format_exception(e)})
                 await debug_print(f'wprest: send_field_data err {format_exception(e)}', 'ERROR')
+            return False
+
+        await drain_backlog(_post)
         if asyncio:
             await asyncio.sleep_ms(5)
-        return False
+        return posted[0] > 0
     except Exception as e:
         await _record_rest_failure('send_data_to_wp', 0, '', 'unhandled_exception', {'exception': format_exception(e)})
         await log_exception('send_data_to_wp', e)
@@ -529,9 +536,9 @@ async def send_settings_to_wp():
                     hdrs = {}
                 try:
                     try:
-                        resp = requests.post(target, json=payload, headers=hdrs, timeout=8)
+                        resp = await requests.post(target, json=payload, headers=hdrs, timeout=8)
                     except TypeError:
-                        resp = requests.post(target, json=payload, headers=hdrs)
+                        resp = await requests.post(target, json=payload, headers=hdrs)
                     code = getattr(resp, 'status_code', 0)
                     body = (getattr(resp, 'text', '') or '')[:400]
                     try:
@@ -589,9 +596,9 @@ async def poll_ota_jobs():
             try:
                 url = wp_url.rstrip('/') + p
                 try:
-                    resp = requests.get(url, headers=_auth_headers(), timeout=8)
+                    resp = await requests.get(url, headers=_auth_headers(), timeout=8)
                 except TypeError:
-                    resp = requests.get(url, headers=_auth_headers())
+                    resp = await requests.get(url, headers=_auth_headers())
                 code, _body_text, parsed = _extract_response(resp, max_chars=1200)
                 if code == 200:
                     jobs = parsed.get('jobs', []) if isinstance(parsed, dict) else []
@@ -655,9 +662,9 @@ async def send_ota_job_status(job_id, status, info=None):
                     url = wp_url.rstrip('/') + p
                     hdrs = _auth_headers()
                     try:
-                        resp = requests.post(url, json=payload, headers=hdrs, timeout=8)
+                        resp = await requests.post(url, json=payload, headers=hdrs, timeout=8)
                     except TypeError:
-                        resp = requests.post(url, json=payload, headers=hdrs)
+                        resp = await requests.post(url, json=payload, headers=hdrs)
                     code, _body_text, parsed = _extract_response(resp)
                     if code in (200, 201):
                         _mark_rest_success()
@@ -744,9 +751,9 @@ async def send_diagnostics_to_wp(extra=None):
                         headers = _auth_headers(auth_mode)
                         url = wp_url.rstrip('/') + p
                         try:
-                            resp = requests.post(url, json=payload, headers=headers, timeout=8)
+                            resp = await requests.post(url, json=payload, headers=headers, timeout=8)
                         except TypeError:
-                            resp = requests.post(url, json=payload, headers=headers)
+                            resp = await requests.post(url, json=payload, headers=headers)
                         code, _body_text, parsed = _extract_response(resp)
                         if code in (200, 201):
                             _mark_rest_success()
@@ -829,9 +836,9 @@ async def confirm_staged_settings_applied(changed_keys=None, applied_keys=None,
                     url = wp_url.rstrip('/') + path
                     headers = _auth_headers(auth_mode)
                     try:
-                        resp = requests.post(url, json=payload, headers=headers, timeout=8)
+                        resp = await requests.post(url, json=payload, headers=headers, timeout=8)
                     except TypeError:
-                        resp = requests.post(url, json=payload, headers=headers)
+                        resp = await requests.post(url, json=payload, headers=headers)
                     code, body_text, parsed = _extract_response(resp, max_chars=600)
                     if code in (200, 201, 202):
                         _mark_rest_success()
@@ -993,7 +1000,7 @@ async def fetch_settings_from_wp():
 
                 try:
 
-                    resp = requests.get(
+                    resp = await requests.get(
                         url,
                         headers=_auth_headers(),
                         timeout=8
@@ -1001,7 +1008,7 @@ async def fetch_settings_from_wp():
 
                 except TypeError:
 
-                    resp = requests.get(
+                    resp = await requests.get(
                         url,
                         headers=_auth_headers()
                     )
@@ -1263,9 +1270,9 @@ async def _post_command_result(job_id, status='done', result=None):
         resp = None
         try:
             try:
-                resp = requests.post(wp_url.rstrip('/') + p, json=payload, headers=_auth_headers(), timeout=timeout_s)
+                resp = await requests.post(wp_url.rstrip('/') + p, json=payload, headers=_auth_headers(), timeout=timeout_s)
             except TypeError:
-                resp = requests.post(wp_url.rstrip('/') + p, json=payload, headers=_auth_headers())
+                resp = await requests.post(wp_url.rstrip('/') + p, json=payload, headers=_auth_headers())
             code = int(getattr(resp, 'status_code', 0) or 0)
             if code in (200, 201, 202):
                 return True
@@ -1313,9 +1320,9 @@ async def poll_device_commands():
             resp = None
             try:
                 try:
-                    resp = requests.post(wp_url.rstrip('/') + p, json=body, headers=_auth_headers(), timeout=8)
+                    resp = await requests.post(wp_url.rstrip('/') + p, json=body, headers=_auth_headers(), timeout=8)
                 except TypeError:
-                    resp = requests.post(wp_url.rstrip('/') + p, json=body, headers=_auth_headers())
+                    resp = await requests.post(wp_url.rstrip('/') + p, json=body, headers=_auth_headers())
                 code, _body, parsed = _extract_response(resp, max_chars=2000)
                 if code in (200, 201) and parsed is not None:
                     if isinstance(parsed, dict) and isinstance(parsed.get('commands'), list):
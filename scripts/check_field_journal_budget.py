@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""Host check of the field-data journal byte budget (micropython/field_journal.py).
+
+Usage:
+  python3 scripts/check_field_journal_budget.py
+
+Writes records into the frost, watch and normal lanes of a scratch journal and seals after
+every write, the way record_field_data does. Checks that:
+  - the journals never exceed FIELD_DATA_MAX_BYTES on flash (hard ceiling),
+  - with FIELD_DATA_FROST_MAX_BYTES plus the active segments inside the ceiling (the shipped
+    defaults), normal/watch data is evicted and no frost record is lost,
+  - frost beyond its own share loses its oldest records first,
+  - with a frost share that cannot fit beside the other active segments, frost is evicted
+    as the last resort (oldest first) rather than breaking the ceiling.
+Exits non-zero if any expectation fails.
+"""
+import json
+import os
+import shutil
+import sys
+import tempfile
+import types
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(REPO_ROOT, 'micropython'))
+
+# field_journal only reads paths and budget tunables from settings; avoid importing the
+# device settings module (it pulls in MicroPython-only modules).
+sys.modules.setdefault('settings', types.SimpleNamespace(
+    LOG_DIR='', FIELD_DATA_LOG='', DATA_HISTORY_LOG=None, FIELD_DATA_PRIORITY_LANES=True,
+    FIELD_DATA_EVICT_DOWNSAMPLE=0, LOG_MAX_ROTATIONS=3))
+
+import field_journal  # noqa: E402
+
+SETTINGS = sys.modules['settings']
+SEG = 1000
+
+
+def setup(max_bytes, frost_max):
+    work = tempfile.mkdtemp(prefix='tmon_fj_')
+    SETTINGS.LOG_DIR = work
+    SETTINGS.FIELD_DATA_LOG = os.path.join(work, 'field_data.log')
+    SETTINGS.FIELD_DATA_SEGMENT_BYTES = SEG
+    SETTINGS.FIELD_DATA_MAX_BYTES = max_bytes
+    SETTINGS.FIELD_DATA_FROST_MAX_BYTES = frost_max
+    field_journal._states.clear()
+    field_journal._writers.clear()
+    return work
+
+
+def on_flash(work):
+    """Bytes of journal data on disk (segments and active files; cursor files excluded)."""
+    total = 0
+    for name in os.listdir(work):
+        if name.endswith('.seg') or name.endswith('.log'):
+            total += os.path.getsize(os.path.join(work, name))
+    return total
+
+
+def write(lane, i):
+    path = field_journal.lane_path(lane)
+    field_journal.append({'lane': lane, 'i': i, 'pad': 'x' * 60}, path)
+    field_journal.seal(path)
+
+
+def frost_ids():
+    return [r[3]['i'] for r in field_journal.iter_records(field_journal.lane_path('frost'))]
+
+
+def check(cond, msg, failures):
+    print(('ok   ' if cond else 'FAIL ') + msg)
+    if not cond:
+        failures.append(msg)
+
+
+def run(max_bytes, frost_max, frost_n, other_n):
+    work = setup(max_bytes, frost_max)
+    peak = 0
+    try:
+        for i in range(frost_n):
+            write('frost', i)
+            peak = max(peak, on_flash(work))
+        for i in range(other_n):
+            write('normal' if i % 3 else 'watch', i)
+            peak = max(peak, on_flash(work))
+        return peak, frost_ids(), field_journal.get_stats()
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+def main():
+    failures = []
+
+    # Defaults scaled down: frost share (its active segment included) + the other 4 active
+    # segments (8 kB) fits the 12 kB ceiling.
+    peak, ids, stats = run(12 * SEG, 4 * SEG, 25, 600)
+    print('in budget: peak %d B, frost kept %d/25, evicted %d records' % (peak, len(ids), stats['evicted_records']))
+    check(peak <= 12 * SEG, 'ceiling held while normal/watch were evicted', failures)
+    check(ids == list(range(25)), 'no frost record evicted inside its share', failures)
+    check(stats['evicted_records'] > 0, 'normal/watch records were evicted', failures)
+
+    # Frost alone overflows its share: oldest frost records go first.
+    peak, ids, stats = run(12 * SEG, 4 * SEG, 80, 0)
+    print('frost over share: peak %d B, frost kept %d/80 (first %s)' % (peak, len(ids), ids[:1]))
+    check(peak <= 12 * SEG, 'ceiling held with frost over its share', failures)
+    check(ids and ids[-1] == 79 and ids[0] > 0, 'oldest frost dropped, newest kept', failures)
+
+    # Misconfigured: a 9 kB frost share + 4 kB of other active segments exceeds the 10 kB
+    # ceiling. 70 frost records (~7.4 kB with headroom) stay inside the share, so any frost
+    # loss here is the last-resort eviction.
+    peak, ids, stats = run(10 * SEG, 9 * SEG, 70, 300)
+    print('last resort: peak %d B, frost kept %d/70, evicted %d records' % (peak, len(ids), stats['evicted_records']))
+    check(peak <= 10 * SEG, 'ceiling held by evicting frost as a last resort', failures)
+    check(0 < len(ids) < 70 and ids[-1] == 69, 'frost evicted oldest first as the last resort', failures)
+
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""Host check: an incomplete FIELD_DATA burst is never acknowledged (micropython/lora.py).
+
+Usage:
+  python3 scripts/check_lora_nack_giveup.py
+
+Runs a remote and a hub in one process against the real lora.py: every frame the remote
+sends is handed straight to the hub's handle_incoming_packet, and the hub's replies are
+queued for the remote's lora_recv. Chunk 1 of the burst (and its FEC parity) is dropped on
+every transmission, so the NACK rounds cannot complete it. The remote's journal is driven
+through utils.send_field_data_via_lora. Exits non-zero if the hub ACKs the batch, does not
+send the final NACK, or the remote's field_journal cursor moves. A second pass without the
+drop checks that the same batch is delivered and the cursor advances. Pass -v to see the
+nodes' debug output.
+"""
+import asyncio
+import json
+import os
+import shutil
+import sys
+import tempfile
+import types
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(REPO_ROOT, 'micropython'))
+
+import mp_shims  # noqa: E402
+
+mp_shims.install()
+
+import settings  # noqa: E402
+
+WORK = tempfile.mkdtemp(prefix='tmon_nack_')
+settings.LOG_DIR = WORK
+settings.FIELD_DATA_LOG = os.path.join(WORK, 'field_data.log')
+settings.DATA_HISTORY_LOG = os.path.join(WORK, 'data_history.log')
+settings.LORA_HMAC_ENABLED = True
+settings.LORA_HMAC_REPLAY_PROTECT = False
+settings.LORA_NACK_MAX_ROUNDS = 2
+settings.FIELD_DATA_MAX_ATTEMPTS = 1
+settings.REMOTE_NODE_INFO = {}
+settings.LORA_PEER_COUNTERS = {}
+
+import field_journal  # noqa: E402
+import lora  # noqa: E402
+import utils  # noqa: E402
+
+REMOTE_UID = '170171'
+HUB_UID = '100'
+
+inbox = []       # hub -> remote
+hub_sent = []    # clear text of everything the hub sent
+staged = []
+drop_chunk = [True]
+
+
+def as_remote():
+    settings.NODE_TYPE = 'remote'
+    settings.UNIT_ID = REMOTE_UID
+
+
+def as_hub():
+    settings.NODE_TYPE = 'base'
+    settings.UNIT_ID = HUB_UID
+
+
+async def fake_send(data, remote_uid=None, prio=None):
+    if isinstance(data, str):
+        data = data.encode()
+    if settings.NODE_TYPE == 'remote':
+        if lora.is_binary_frame(data):
+            frame = lora.decode_binary_frame(data)
+            if drop_chunk[0] and frame and (frame.get('seq') == 1 or frame.get('parity')):
+                return True
+        as_hub()
+        try:
+            await lora.handle_incoming_packet(data)
+        finally:
+            as_remote()
+        return True
+    clear = await lora._unsecure_message(data.decode()) if not lora.is_binary_frame(data) else None
+    hub_sent.append(clear)
+    inbox.append(data)
+    return True
+
+
+async def fake_recv(timeout_ms=0):
+    await asyncio.sleep(0)
+    if inbox:
+        return inbox.pop(0), 0
+    return None, -1
+
+
+def cursor():
+    st = field_journal._load(settings.FIELD_DATA_LOG)
+    return st.get('tail'), st.get('off')
+
+
+async def _quiet(message, status):
+    pass
+
+
+async def main():
+    if '-v' not in sys.argv[1:]:
+        lora.debug_print = utils.debug_print = _quiet
+    lora._safe_send = fake_send
+    lora.lora_recv = fake_recv
+    lora.lora = types.SimpleNamespace()
+    lora.save_remote_node_info = lambda: None
+    lora.stage_remote_field_data = lambda uid, recs: staged.append(len(recs))
+
+    as_remote()
+    with open(settings.FIELD_DATA_LOG, 'a') as f:
+        for i in range(40):
+            f.write(json.dumps({'timestamp': 1760000000 + i * 60, 'cur_temp_f': 70.0 + i / 10}) + '\n')
+    field_journal.seal()
+    before = cursor()
+
+    await utils.send_field_data_via_lora()
+    after = cursor()
+    acks = [m for m in hub_sent if m and m.startswith('ACK:%s:NEXT' % REMOTE_UID)]
+    nacks = [m for m in hub_sent if m and m.startswith('NACK:')]
+    print('lossy pass: cursor %s -> %s, hub NACKs %d, ACKs %d, staged %s' % (before, after, len(nacks), len(acks), staged))
+    failures = []
+    if acks:
+        failures.append('hub acknowledged an incomplete burst')
+    if len(nacks) < settings.LORA_NACK_MAX_ROUNDS + 1:
+        failures.append('hub did not send a final NACK after the last round')
+    if after != before:
+        failures.append('remote journal cursor moved')
+    if staged:
+        failures.append('hub staged an incomplete burst')
+
+    drop_chunk[0] = False
+    hub_sent.clear()
+    inbox.clear()
+    await utils.send_field_data_via_lora()
+    delivered = cursor()
+    print('clean pass: cursor %s -> %s, staged %s' % (after, delivered, staged))
+    if delivered == after or not staged:
+        failures.append('clean resend was not delivered')
+
+    for msg in failures:
+        print('FAIL: ' + msg)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    try:
+        rc = asyncio.run(main())
+    finally:
+        shutil.rmtree(WORK, ignore_errors=True)
+    sys.exit(rc)
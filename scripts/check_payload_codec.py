@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""Host-side check of the field-data request-body codec (micropython/payload_codec.py).
+
+Usage:
+  python3 scripts/check_payload_codec.py [payload.json]
+
+Builds a field-data POST body the way send_field_data_log does (or loads one from a file),
+runs it through payload_codec.encode_body after a simulated server advertisement, and
+decodes the result with zlib.decompress, which is what the Unit Connector's gzuncompress()
+does. The batch is also delta-encoded ('data_enc': 'delta1') and rehydrated with
+payload_codec.decode_batch, the reference decoder the Unit Connector mirrors in
+tmon_uc_fd_delta_decode(). Prints sizes and exits non-zero if any round trip fails.
+"""
+import copy
+import json
+import os
+import sys
+import types
+import zlib
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(REPO_ROOT, 'micropython'))
+
+# payload_codec only reads a couple of thresholds from settings; avoid importing the
+# device settings module (it pulls in MicroPython-only modules).
+sys.modules.setdefault('settings', types.SimpleNamespace(FIELD_DATA_GZIP=True, FIELD_DATA_COMPRESS_MIN_BYTES=256))
+
+import payload_codec  # noqa: E402
+
+
+def sample_payload(count=50):
+    data = []
+    for i in range(count):
+        data.append({
+            'timestamp': 1760000000 + i * 60,
+            'unit_id': '170170',
+            'machine_id': 'e6614103e7a1c92f',
+            'name': 'North Field',
+            'cur_temp_f': 71.6 + (i % 5) * 0.1,
+            'cur_humid': 41.2,
+            'cur_bar_pres': 1013.2,
+            'sys_voltage': 4.98,
+            'wifi_rssi': -61 - (i % 3),
+            'free_mem': 81920 - i * 16,
+            'error_count': 0,
+            'relay1_on': False,
+        })
+    return {'unit_id': '170170', 'machine_id': 'e6614103e7a1c92f', 'firmware_version': 'v2.06.0',
+            'node_type': 'base', 'data': data}
+
+
+def check(payload):
+    text = json.dumps(payload)
+    failures = 0
+
+    payload_codec.reject_encoding()
+    body, enc = payload_codec.encode_body(text)
+    if enc is not None or body != text.encode('utf-8'):
+        print('FAIL: body compressed before the server advertised an encoding')
+        failures += 1
+
+    payload_codec.note_server_encodings({'status': 'ok', 'accept_encoding': ['deflate', 'gzip']})
+    body, enc = payload_codec.encode_body(text)
+    if enc != 'deflate':
+        print('FAIL: negotiated body was not deflated (%d bytes)' % len(text))
+        failures += 1
+    else:
+        plain = zlib.decompress(body)
+        if json.loads(plain) != payload:
+            print('FAIL: inflated body does not match the original payload')
+            failures += 1
+        if payload_codec.inflate_bytes(body) != plain:
+            print('FAIL: payload_codec.inflate_bytes disagrees with zlib')
+            failures += 1
+        print('deflate: %d -> %d bytes (%.1fx)' % (len(text), len(body), len(text) / float(len(body))))
+
+    small, enc = payload_codec.encode_body('{"unit_id":"1","data":[]}')
+    if enc is not None:
+        print('FAIL: body below FIELD_DATA_COMPRESS_MIN_BYTES was compressed')
+        failures += 1
+
+    payload_codec.reject_encoding()
+    if payload_codec.negotiated():
+        print('FAIL: reject_encoding did not clear the negotiated encoding')
+        failures += 1
+
+    delta = copy.deepcopy(payload)
+    if payload_codec.encode_batch(delta):
+        print('FAIL: batch delta-encoded before the server advertised delta1')
+        failures += 1
+    payload_codec.note_server_encodings({'status': 'ok', 'accept_data_enc': ['delta1']})
+    if not payload_codec.encode_batch(delta):
+        print('FAIL: negotiated batch was not delta-encoded')
+        failures += 1
+    else:
+        delta_text = json.dumps(delta)
+        if payload_codec.decode_batch(json.loads(delta_text)) != payload:
+            print('FAIL: delta-decoded batch does not match the original payload')
+            failures += 1
+        packed = payload_codec.deflate_bytes(delta_text)
+        print('delta1: %d -> %d bytes (%.1fx), with deflate %d bytes' % (
+            len(text), len(delta_text), len(text) / float(len(delta_text)), len(packed)))
+    return failures
+
+
+def main(argv):
+    if argv:
+        with open(argv[0]) as f:
+            payload = json.load(f)
+    else:
+        payload = sample_payload()
+    failures = check(payload)
+    print('OK' if not failures else '%d check(s) failed' % failures)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""Host check: a deep-sleep remote records the link SNR/RSSI it batches on (micropython/lora.py).
+
+Usage:
+  python3 scripts/check_remote_link_snr.py
+
+Runs one simple FIELD_DATA session between a remote and a hub in one process (frames are
+handed straight across, as in check_lora_nack_giveup.py). The fake radio reports a weak link
+(SNR -12 dB, RSSI -121 dBm) to the remote and a strong one to the hub. After the final ACK,
+sdata.lora_snr / sdata.lora_SigStr must hold the remote's reading, which is what
+remote_node stores in its ring for _batch_factor; a low SNR must then raise the number of
+samples per session over a good link. Exits non-zero otherwise.
+"""
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import types
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(REPO_ROOT, 'micropython'))
+
+import mp_shims  # noqa: E402
+
+mp_shims.install()
+
+import settings  # noqa: E402
+
+WORK = tempfile.mkdtemp(prefix='tmon_snr_')
+settings.LOG_DIR = WORK
+settings.LORA_HMAC_ENABLED = True
+settings.LORA_HMAC_REPLAY_PROTECT = False
+settings.LORA_ADR_ENABLED = False
+settings.REMOTE_NODE_INFO = {}
+settings.LORA_PEER_COUNTERS = {}
+
+import lora  # noqa: E402
+import remote_node  # noqa: E402
+import sdata  # noqa: E402
+import utils  # noqa: E402
+
+REMOTE_UID = '170171'
+HUB_UID = '100'
+REMOTE_SNR, REMOTE_RSSI = -12.0, -121
+HUB_SNR, HUB_RSSI = 9.5, -70
+
+inbox = []
+
+
+class Radio:
+    """Reports the last frame's link quality as seen by whichever node is running."""
+
+    def getSNR(self):
+        return REMOTE_SNR if settings.NODE_TYPE == 'remote' else HUB_SNR
+
+    def getRSSI(self):
+        return REMOTE_RSSI if settings.NODE_TYPE == 'remote' else HUB_RSSI
+
+
+def as_remote():
+    settings.NODE_TYPE = 'remote'
+    settings.UNIT_ID = REMOTE_UID
+
+
+def as_hub():
+    settings.NODE_TYPE = 'base'
+    settings.UNIT_ID = HUB_UID
+
+
+async def fake_send(data, remote_uid=None, prio=None):
+    if isinstance(data, str):
+        data = data.encode()
+    if settings.NODE_TYPE == 'remote':
+        as_hub()
+        try:
+            await lora.handle_incoming_packet(data)
+        finally:
+            as_remote()
+    else:
+        inbox.append(data)
+    return True
+
+
+async def fake_recv(timeout_ms=0):
+    await asyncio.sleep(0)
+    if inbox:
+        return inbox.pop(0), 0
+    return None, -1
+
+
+async def _quiet(message, status):
+    pass
+
+
+async def main():
+    if '-v' not in sys.argv[1:]:
+        lora.debug_print = utils.debug_print = _quiet
+    lora._safe_send = fake_send
+    lora.lora_recv = fake_recv
+    lora.lora = Radio()
+    lora.save_remote_node_info = lambda: None
+    lora.stage_remote_field_data = lambda uid, recs: None
+
+    as_remote()
+    payload = {'unit_id': REMOTE_UID, 'batch_id': 'snr-1',
+               'data': [{'ts': i, 't_f': 70 + i} for i in range(8)]}
+    delay = await lora.send_field_data_controlled(payload)
+    snr = getattr(sdata, 'lora_snr', None)
+    rssi = getattr(sdata, 'lora_SigStr', None)
+    weak = remote_node._batch_factor(4.0, snr)
+    good = remote_node._batch_factor(4.0, HUB_SNR)
+    print('session delay %s, recorded snr %s rssi %s, batch factor %d (good link %d)' % (delay, snr, rssi, weak, good))
+
+    failures = []
+    if delay is None:
+        failures.append('session did not get its final ACK')
+    if snr != REMOTE_SNR or rssi != REMOTE_RSSI:
+        failures.append('remote link quality not recorded at the final ACK')
+    if weak <= good:
+        failures.append('low SNR did not raise the batch factor')
+    for msg in failures:
+        print('FAIL: ' + msg)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    try:
+        rc = asyncio.run(main())
+    finally:
+        shutil.rmtree(WORK, ignore_errors=True)
+    sys.exit(rc)
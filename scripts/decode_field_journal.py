@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""Decode TMON field-data journal files (field_data.log, *.seg, data_history.log.N) to JSON lines.
+
+Usage:
+  python3 scripts/decode_field_journal.py /path/to/field_data.3.seg [more files...]
+
+Handles both legacy JSON lines and the binary schema/record frames written when
+FIELD_DATA_BINARY is enabled. Each decoded record is printed as one JSON object per line.
+"""
+import json
+import os
+import sys
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(REPO_ROOT, 'micropython'))
+
+import field_journal  # noqa: E402
+
+
+def decode_file(path):
+    sc = None
+    with open(path, 'rb') as f:
+        while True:
+            nbytes, kind, data, complete = field_journal._read_frame(f)
+            if not nbytes:
+                break
+            if not complete:
+                continue
+            if kind == field_journal._FRAME_SCHEMA:
+                sc = field_journal._load_schema(data) or sc
+                continue
+            rec = field_journal._decode_frame(kind, data, sc)
+            if rec is not None:
+                yield rec
+
+
+def main(argv):
+    if not argv:
+        print(__doc__.strip(), file=sys.stderr)
+        return 2
+    for path in argv:
+        for rec in decode_file(path):
+            print(json.dumps(rec, sort_keys=True))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,74 @@
+"""MicroPython module stand-ins for host-side scripts that import the firmware (micropython/).
+
+Usage (before importing any firmware module):
+  import mp_shims
+  mp_shims.install()
+
+Registers uasyncio (sleeps return at once), utime (ticks_*), machine (inert Pin/I2C/SPI/...),
+ubinascii, uhashlib, ujson and uos in sys.modules unless a real module is already there.
+"""
+import asyncio
+import binascii
+import hashlib
+import json
+import os
+import sys
+import time
+import types
+
+
+def install():
+    """Register the stand-ins (existing sys.modules entries win)."""
+    async def _no_wait(*_a, **_k):
+        await _real_sleep(0)
+    _real_sleep = asyncio.sleep
+    uasyncio = types.ModuleType('uasyncio')
+    uasyncio.__dict__.update({k: getattr(asyncio, k) for k in dir(asyncio) if not k.startswith('_')})
+    uasyncio.sleep = _no_wait
+    uasyncio.sleep_ms = _no_wait
+
+    class ThreadSafeFlag:
+        def __init__(self):
+            self._e = asyncio.Event()
+
+        def set(self):
+            self._e.set()
+
+        async def wait(self):
+            await self._e.wait()
+            self._e.clear()
+    uasyncio.ThreadSafeFlag = ThreadSafeFlag
+
+    utime = types.ModuleType('utime')
+    utime.__dict__.update({k: getattr(time, k) for k in dir(time) if not k.startswith('_')})
+    utime.ticks_ms = lambda: int(time.monotonic() * 1000)
+    utime.ticks_diff = lambda a, b: a - b
+    utime.ticks_add = lambda a, b: a + b
+    utime.sleep_ms = lambda ms: None
+
+    class _Any:
+        def __init__(self, *a, **k):
+            pass
+
+        def __getattr__(self, _name):
+            return lambda *a, **k: 0
+
+    class Pin(_Any):
+        IN, OUT, PULL_UP, IRQ_RISING = 0, 1, 2, 1
+
+        def value(self, *a):
+            return 0
+    machine = types.ModuleType('machine')
+    machine.Pin = Pin
+    machine.I2C = machine.SoftI2C = machine.SPI = machine.SoftSPI = machine.UART = _Any
+    machine.ADC = machine.PWM = machine.RTC = machine.WDT = _Any
+    machine.unique_id = lambda: b'\x01\x02\x03\x04'
+    machine.reset = lambda: None
+    machine.freq = lambda *a: 240000000
+
+    mods = {
+        'uasyncio': uasyncio, 'utime': utime, 'machine': machine,
+        'ubinascii': binascii, 'uhashlib': hashlib, 'ujson': json, 'uos': os,
+    }
+    for name, mod in mods.items():
+        sys.modules.setdefault(name, mod)
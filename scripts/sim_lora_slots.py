@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""Host simulation of hub check-in scheduling (micropython/lora_slots.py).
+
+Usage:
+  python3 scripts/sim_lora_slots.py [remotes] [hours]
+
+Simulates one base and N remotes (default 40) for a number of hours (default 24), once with
+the previous spacing (LORA_SYNC_RATE + uid hash % LORA_NEXT_SYNC + randint(-30, 30)) and once
+with the TDMA slot table. Each session (HELLO to final ACK) lasts 3-9 s depending on the
+remote, +-20 % per session, and the remote wakes 0.5 s late; NEXT in the final ACK sets the
+next session. Halfway through, a fifth of the remotes leave and new ones join. Prints how
+many sessions overlapped another one at the hub (overall, and over the last quarter once the
+table has settled) and the slot table's utilization report, and exits non-zero if the slot
+table still lets sessions overlap in the settled quarter.
+"""
+import heapq
+import os
+import random
+import sys
+import types
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(REPO_ROOT, 'micropython'))
+
+# lora_slots only reads its tunables from settings; avoid importing the device settings module.
+sys.modules.setdefault('settings', types.SimpleNamespace(
+    LORA_SYNC_RATE=300, LORA_NEXT_SYNC=100, LORA_TDMA_GUARD_S=2, LORA_TDMA_MIN_SLOT_S=6,
+    LORA_TDMA_MIN_DELAY_S=30, LORA_TDMA_EXPIRE_CYCLES=4))
+
+import lora_slots  # noqa: E402
+
+SETTINGS = sys.modules['settings']
+
+
+def legacy_delay(uid, rng):
+    seed = 0
+    for c in uid:
+        seed = (seed * 31 + ord(c)) % SETTINGS.LORA_NEXT_SYNC
+    return max(60, SETTINGS.LORA_SYNC_RATE + seed + rng.randint(-30, 30))
+
+
+def tdma_delay(uid, hello, now):
+    lora_slots.note_session(uid, hello, now)
+    return lora_slots.next_delay(uid, now)
+
+
+def simulate(n, hours, scheduler, seed=1):
+    rng = random.Random(seed)
+    end = hours * 3600.0
+    base = {}
+    events = []
+    for i in range(n):
+        uid = str(170000 + i)
+        base[uid] = rng.uniform(3.0, 9.0)
+        heapq.heappush(events, (rng.uniform(0, 300), uid))
+    left = set(rng.sample(sorted(base), n // 5))
+    joiners = [str(270000 + i) for i in range(n // 5)]
+    joined = False
+    busy_until = 0.0
+    sessions = 0
+    overlaps = 0
+    settled = 0
+    while events:
+        t, uid = heapq.heappop(events)
+        if t > end:
+            break
+        if not joined and t > end / 2:
+            joined = True
+            for j in joiners:
+                base[j] = rng.uniform(3.0, 9.0)
+                heapq.heappush(events, (t + rng.uniform(0, 300), j))
+        if joined and uid in left:
+            continue
+        dur = base[uid] * rng.uniform(0.8, 1.2)
+        sessions += 1
+        if t < busy_until:
+            overlaps += 1
+            if t > end * 0.75:
+                settled += 1
+        busy_until = max(busy_until, t + dur)
+        ack = t + dur
+        if scheduler == 'tdma':
+            nxt = tdma_delay(uid, t, ack)
+        else:
+            nxt = legacy_delay(uid, rng)
+        heapq.heappush(events, (ack + nxt + 0.5, uid))
+    return sessions, overlaps, settled
+
+
+def main(argv):
+    n = int(argv[0]) if argv else 40
+    hours = float(argv[1]) if len(argv) > 1 else 24.0
+    for name in ('legacy', 'tdma'):
+        s, o, settled = simulate(n, hours, name)
+        print('%-7s %d sessions, %d overlapped (%.1f%%), %d in the last quarter' % (
+            name + ':', s, o, 100.0 * o / max(1, s), settled))
+    print('slots:  %s' % lora_slots.stats())
+    return 1 if settled else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
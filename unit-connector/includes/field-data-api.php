@@ -14,6 +14,11 @@ add_action('rest_api_init', function() {
         'callback' => 'tmon_uc_receive_field_data',
         'permission_callback' => '__return_true',
     ));
+    register_rest_route('tmon/v1', '/device/field-keys', array(
+        'methods' => 'GET',
+        'callback' => 'tmon_uc_get_field_key_dict',
+        'permission_callback' => '__return_true',
+    ));
     register_rest_route('tmon/v1', '/device/data-history', array(
         'methods' => 'POST',
         'callback' => 'tmon_uc_receive_data_history',
@@ -114,6 +119,148 @@ function tmon_uc_fd_verify_sig($data) {
     return hash_equals(substr($digest, 0, $len), substr($sig, 0, $len));
 }
 
+// Request-body encodings the field-data endpoint can inflate; advertised to devices in every ok response
+function tmon_uc_fd_accept_encodings() {
+    $enc = [];
+    if (function_exists('gzuncompress')) $enc[] = 'deflate';
+    if (function_exists('gzdecode')) $enc[] = 'gzip';
+    return $enc;
+}
+
+// Record encodings (payload 'data_enc') the field-data endpoint can rehydrate
+function tmon_uc_fd_accept_data_encs() {
+    return ['delta1'];
+}
+
+// Rehydrate a 'delta1' batch: record 0 is full; each later record holds only changed keys,
+// '_dt' (integer delta for 'timestamp' or 'ts') and '_rm' (keys dropped since the previous record).
+function tmon_uc_fd_delta_decode($records) {
+    $out = [];
+    $prev = null;
+    foreach ($records as $rec) {
+        if ($prev === null || !is_array($rec)) {
+            $out[] = $rec;
+            $prev = is_array($rec) ? $rec : null;
+            continue;
+        }
+        $full = $prev;
+        if (isset($rec['_rm']) && is_array($rec['_rm'])) {
+            foreach ($rec['_rm'] as $k) unset($full[$k]);
+        }
+        foreach ($rec as $k => $v) {
+            if ($k === '_dt' || $k === '_rm') continue;
+            $full[$k] = $v;
+        }
+        $tk = array_key_exists('timestamp', $prev) ? 'timestamp' : (array_key_exists('ts', $prev) ? 'ts' : null);
+        if ($tk !== null && isset($rec['_dt'])) {
+            $full[$tk] = intval($prev[$tk]) + intval($rec['_dt']);
+        }
+        $out[] = $full;
+        $prev = $full;
+    }
+    return $out;
+}
+
+// Versioned field-key dictionary used by devices to compact record keys ('kd' in the payload).
+// Codes are decimal strings assigned in insertion order and never reassigned, so the current
+// dictionary expands batches compacted with any earlier version. Unmapped keys arriving in a
+// 'kd' batch are appended (bumping 'v'); devices refetch when 'key_dict' in the response changes.
+function tmon_uc_fd_key_dict() {
+    $doc = get_option('tmon_uc_field_key_dict');
+    if (!is_array($doc) || !isset($doc['keys']) || !is_array($doc['keys'])) {
+        $seed = [
+            'cur_temp_f', 'cur_temp_c', 'cur_humid', 'cur_bar_pres', 'sys_voltage', 'free_mem',
+            'loop_runtime', 'script_runtime', 'cur_device_temp_f', 'cur_device_temp_c',
+            'cur_device_humid', 'cur_device_bar_pres', 'cur_soil_moisture', 'cur_soil_temp_f',
+            'cur_soil_temp_c', 'engine1_speed_rpm', 'engine2_speed_rpm', 'engine1_batt_v',
+            'engine2_batt_v', 'cpu_temp', 'error_count', 'unit_id', 'machine_id',
+            'firmware_version', 'NODE_TYPE', 'ts_iso', 'lora_SigStr', 'wifi_rssi',
+        ];
+        $doc = tmon_uc_fd_key_dict_add(['v' => 0, 'keys' => []], $seed);
+    }
+    return $doc;
+}
+
+function tmon_uc_fd_key_dict_add($doc, $keys) {
+    $n = count($doc['keys']);
+    $changed = false;
+    foreach ($keys as $k) {
+        $k = (string)$k;
+        if (isset($doc['keys'][$k]) || in_array($k, ['timestamp', 'ts', '_dt', '_rm'], true)) continue;
+        if (!preg_match('/^[A-Za-z_][A-Za-z0-9_]{0,63}$/', $k)) continue;
+        if ($n >= 1000) break;
+        $doc['keys'][$k] = (string)$n;
+        $n++;
+        $changed = true;
+    }
+    if ($changed) {
+        $doc['v'] = intval($doc['v']) + 1;
+        update_option('tmon_uc_field_key_dict', $doc, false);
+    }
+    return $doc;
+}
+
+function tmon_uc_get_field_key_dict($request) {
+    $doc = tmon_uc_fd_key_dict();
+    return rest_ensure_response(['v' => intval($doc['v']), 'keys' => (object)$doc['keys']]);
+}
+
+// Expand dictionary codes in $data['data'] back to full keys and learn any unmapped keys.
+// Returns WP_REST_Response when the batch references a dictionary version this site never issued.
+function tmon_uc_fd_expand_keys($data) {
+    $doc = tmon_uc_fd_key_dict();
+    if (intval($data['kd']) > intval($doc['v'])) {
+        return new WP_REST_Response(['status'=>'error','message'=>'Unknown key dictionary version','key_dict'=>intval($doc['v'])], 409);
+    }
+    $rev = [];
+    foreach ($doc['keys'] as $long => $code) $rev[(string)$code] = (string)$long;
+    $unmapped = [];
+    $records = (isset($data['data']) && is_array($data['data'])) ? $data['data'] : [];
+    foreach ($records as $i => $rec) {
+        if (!is_array($rec)) continue;
+        $out = [];
+        foreach ($rec as $k => $v) {
+            $ks = (string)$k;
+            if (ctype_digit($ks)) {
+                if (isset($rev[$ks])) $out[$rev[$ks]] = $v;
+                continue;
+            }
+            if (!isset($doc['keys'][$ks])) $unmapped[$ks] = true;
+            $out[$ks] = $v;
+        }
+        $records[$i] = $out;
+    }
+    $data['data'] = $records;
+    unset($data['kd']);
+    if ($unmapped) tmon_uc_fd_key_dict_add($doc, array_keys($unmapped));
+    return $data;
+}
+
+// Decode a field-data body, inflating it first when the device sent Content-Encoding: deflate/gzip.
+// Returns the decoded array, or WP_REST_Response on an undecodable/unsupported body.
+function tmon_uc_fd_request_data($request) {
+    $encoding = strtolower(trim((string)$request->get_header('content_encoding')));
+    if ($encoding === '' || $encoding === 'identity') {
+        return $request->get_json_params();
+    }
+    if (!in_array($encoding, tmon_uc_fd_accept_encodings(), true)) {
+        return new WP_REST_Response(['status'=>'error','message'=>'Unsupported Content-Encoding','accept_encoding'=>tmon_uc_fd_accept_encodings()], 415);
+    }
+    $raw = (string)$request->get_body();
+    $plain = false;
+    if ($encoding === 'deflate') {
+        // RFC 1950 zlib stream; tolerate raw deflate from clients that omit the header
+        $plain = @gzuncompress($raw);
+        if ($plain === false && function_exists('gzinflate')) $plain = @gzinflate($raw);
+    } else {
+        $plain = @gzdecode($raw);
+    }
+    if ($plain === false) {
+        return new WP_REST_Response(['status'=>'error','message'=>'Invalid compressed payload'], 400);
+    }
+    return json_decode($plain, true);
+}
+
 // Truthy helper reused for relay and feature detection
 function tmon_uc_truthy($val) {
     return in_array($val, [true, 1, '1', 'true', 'yes', 'on'], true);
@@ -270,7 +417,23 @@ function tmon_uc_rest_export_field_data($request) {
 
 function tmon_uc_receive_field_data($request) {
     global $wpdb;
-    $data = $request->get_json_params();
+    $data = tmon_uc_fd_request_data($request);
+    if ($data instanceof WP_REST_Response) {
+        return $data;
+    }
+    if (is_array($data) && isset($data['data_enc'])) {
+        if ($data['data_enc'] !== 'delta1' || !isset($data['data']) || !is_array($data['data'])) {
+            return new WP_REST_Response(['status'=>'error','message'=>'Unsupported data_enc','accept_data_enc'=>tmon_uc_fd_accept_data_encs()], 415);
+        }
+        $data['data'] = tmon_uc_fd_delta_decode($data['data']);
+        unset($data['data_enc']);
+    }
+    if (is_array($data) && isset($data['kd'])) {
+        $data = tmon_uc_fd_expand_keys($data);
+        if ($data instanceof WP_REST_Response) {
+            return $data;
+        }
+    }
     if (!is_array($data) || empty($data)) {
         return new WP_REST_Response(['status'=>'error','message'=>'Invalid JSON payload'], 400);
     }
@@ -601,7 +764,7 @@ function tmon_uc_receive_field_data($request) {
     }
 
     // Include resolved unit_id/machine_id for device to persist mapping
-    return rest_ensure_response(['status' => 'ok', 'received' => $received > 0, 'count' => $received, 'unit_id' => $unit_id ?: ($data['unit_id'] ?? ''), 'machine_id' => $machine_id]);
+    return rest_ensure_response(['status' => 'ok', 'received' => $received > 0, 'count' => $received, 'unit_id' => $unit_id ?: ($data['unit_id'] ?? ''), 'machine_id' => $machine_id, 'accept_encoding' => tmon_uc_fd_accept_encodings(), 'accept_data_enc' => tmon_uc_fd_accept_data_encs(), 'key_dict' => intval(tmon_uc_fd_key_dict()['v'])]);
 }
 
 function tmon_uc_receive_data_history($request) {